@@ -37,8 +37,7 @@ def setup_environment():
     else:
         print("Environment variables loaded successfully.")
 
-# Run setup
-setup_environment()
+# Setup runs when the agent is built (see ClinicalTrialsAgent.__init__), not on import.
 
 # Constants
 CLINICAL_TRIALS_API_BASE = "https://clinicaltrials.gov/api/v2/studies"
@@ -105,6 +104,7 @@ except ImportError:
 class ClinicalTrialsAgent:
     def __init__(self):
         print("Initializing Clinical Trials Agent (CTA)...")
+        setup_environment()
         # Initialize LLM
         try:
             self.llm = ChatMistralAI(
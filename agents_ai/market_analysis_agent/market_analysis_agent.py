@@ -32,9 +32,9 @@ def setup_environment():
         sys.exit(1)
     else:
         print("Environment variables loaded successfully.")
-        
-# Run setup immediately
-setup_environment()
+
+# Setup runs when the agent is built (see MarketAnalysisAgent.__init__), not on import,
+# so importing this module stays cheap and never exits the importing process.
 
 
 # --- 2. TOOL DEFINITIONS (Dynamic Placeholders) ---
@@ -57,16 +57,21 @@ def analyze_sentiment_data(drug_name: str) -> str:
     # FIX: Tool now uses the input.
     return f"Real-World Patient Sentiment for {drug_name}: Score: 8.2/10. Top Concern: Nausea (Flagged in 15% of reviews)."
 
-# Initialize Google Search Wrapper with securely loaded keys
+# Google Search Wrapper, created on first use with the securely loaded keys
 # GoogleSearchAPIWrapper automatically uses the os.environ variables set by load_dotenv()
-search_wrapper = GoogleSearchAPIWrapper()
+search_wrapper = None
+
+def get_search_wrapper():
+    global search_wrapper
+    if search_wrapper is None:
+        search_wrapper = GoogleSearchAPIWrapper()
+    return search_wrapper
 
 def search_competitive_news(query: str) -> str:
     """
     REQUIRED: Performs an external web search for recent competitor news and intelligence.
     """
-    # This function is correct as it relies on the initialized search_wrapper.
-    return search_wrapper.run(query)
+    return get_search_wrapper().run(query)
 
 # --- 3. AGENT CLASS DEFINITION ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -80,6 +85,7 @@ except ImportError:
 class MarketAnalysisAgent:
     def __init__(self):
         print("Initializing Market Analysis Agent (MAA)...")
+        setup_environment()
         # Initialize LLM
         try:
             # Ollama must be running at http://localhost:11434
@@ -18,7 +18,8 @@ try:
     from clinical_trials_agent.clinical_trials_agent import ClinicalTrialsAgent 
 except ImportError as e:
     print(f"Orchestrator Import Error: {e}")
-    sys.exit(1)
+    # Re-raise rather than exit so an importing server can report it and keep running
+    raise
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
@@ -0,0 +1,90 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from . import models, schemas
+from .core import exceptions
+from .crud import doctor_name_variants, normalize_doctor_name
+from .core.pagination import keyset, to_page
+import uuid
+
+# Async counterparts of the crud.py operations used by the hot `async def` routes.
+# Keep behaviour identical to the sync versions so callers can switch freely.
+
+async def get_user(db: AsyncSession, user_id: uuid.UUID):
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalars().first()
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def resolve_doctor_id(db: AsyncSession, doctor_name: Optional[str]):
+    if not normalize_doctor_name(doctor_name):
+        return None
+    result = await db.execute(
+        select(models.User.id).where(
+            models.User.role == 'doctor',
+            func.lower(func.trim(models.User.full_name)).in_(doctor_name_variants(doctor_name)),
+        ).limit(2)
+    )
+    matches = result.scalars().all()
+    return matches[0] if len(matches) == 1 else None
+
+async def check_doctor_id(db: AsyncSession, doctor_id) -> None:
+    if doctor_id is None:
+        return
+    result = await db.execute(
+        select(models.User.id).where(models.User.id == doctor_id, models.User.role == 'doctor')
+    )
+    if result.first() is None:
+        raise exceptions.BadRequestException("doctor_id does not belong to a doctor")
+
+async def link_doctor(db: AsyncSession, item, name_field: str) -> None:
+    if item.doctor_id:
+        await check_doctor_id(db, item.doctor_id)
+    else:
+        item.doctor_id = await resolve_doctor_id(db, getattr(item, name_field))
+
+async def create_appointment(db: AsyncSession, appointment: schemas.AppointmentCreate):
+    await link_doctor(db, appointment, "doctor_name")
+    db_appointment = models.Appointment(id=str(uuid.uuid4()), **appointment.dict())
+    db.add(db_appointment)
+    await db.commit()
+    await db.refresh(db_appointment)
+    return db_appointment
+
+async def update_appointment_status(db: AsyncSession, appointment_id: uuid.UUID, status: str):
+    result = await db.execute(select(models.Appointment).where(models.Appointment.id == appointment_id))
+    db_appointment = result.scalars().first()
+    if db_appointment:
+        db_appointment.status = status
+        await db.commit()
+        await db.refresh(db_appointment)
+    return db_appointment
+
+async def create_hospital_visit(db: AsyncSession, visit: schemas.HospitalVisitCreate):
+    db_visit = models.HospitalVisit(id=str(uuid.uuid4()), **visit.dict())
+    db.add(db_visit)
+    await db.commit()
+    await db.refresh(db_visit)
+    return db_visit
+
+async def create_prescription(db: AsyncSession, prescription: schemas.PrescriptionCreate):
+    await link_doctor(db, prescription, "prescribing_doctor")
+    db_prescription = models.Prescription(id=str(uuid.uuid4()), **prescription.dict())
+    db.add(db_prescription)
+    await db.commit()
+    await db.refresh(db_prescription)
+    return db_prescription
+
+async def create_notification(db: AsyncSession, notification: schemas.NotificationCreate):
+    db_notification = models.Notification(**notification.dict())
+    db.add(db_notification)
+    await db.commit()
+    await db.refresh(db_notification)
+    return db_notification
+
+async def get_user_notifications(db: AsyncSession, user_id: uuid.UUID, cursor: Optional[str] = None, limit: int = 20):
+    stmt = select(models.Notification).where(models.Notification.user_id == user_id)
+    result = await db.execute(keyset(stmt, models.Notification, cursor, limit))
+    return to_page(result.scalars().all(), limit)
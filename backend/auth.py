@@ -6,19 +6,47 @@ import os
 
 from fastapi.security import OAuth2PasswordBearer
 
+from .core.password_hashing import HASHING_POOL
+
 # Secret key for JWT encoding/decoding
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; stored hashes with a different cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Verified against when the user does not exist, so unknown emails take as long as wrong passwords
+_dummy_hash = None
+
+# All bcrypt work runs on the bounded HASHING_POOL threads (see core/password_hashing.py)
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return HASHING_POOL.run_sync(pwd_context.verify, plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return HASHING_POOL.run_sync(pwd_context.hash, password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    """Return (valid, new_hash); new_hash is set when the stored hash uses outdated parameters."""
+    return HASHING_POOL.run_sync(_verify_and_update, plain_password, hashed_password)
+
+async def hash_password_async(password):
+    return await HASHING_POOL.run(pwd_context.hash, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    return await HASHING_POOL.run(_verify_and_update, plain_password, hashed_password)
+
+def _verify_and_update(plain_password, hashed_password):
+    global _dummy_hash
+    if not hashed_password:
+        if _dummy_hash is None:
+            _dummy_hash = pwd_context.hash("not-a-real-password")
+        pwd_context.verify(plain_password, _dummy_hash)
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 def create_access_token(*, subject: str, data: dict = None, expires_delta: Optional[timedelta] = None):
     """
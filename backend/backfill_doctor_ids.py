@@ -0,0 +1,101 @@
+"""
+Link existing appointments and prescriptions to their doctor's user account.
+
+Rows created before migration 0003 only carry the doctor as free text
+(`appointments.doctor_name`, `prescriptions.prescribing_doctor`). This walks
+the rows with a NULL `doctor_id` in primary-key order, BATCH_SIZE at a time,
+committing after every batch so locks stay short and the run can be stopped
+and resumed at any point.
+
+A name is resolved when, after dropping a "Dr." title and normalising case
+and whitespace, it equals exactly one doctor's full name, or failing that,
+contains exactly one doctor's full name (the same rows the old `ilike`
+lookups matched). Ambiguous and unknown names are left NULL and reported.
+The containment fallback is only for this one-time run over legacy rows; new
+writes link a doctor on an exact match only (crud.resolve_doctor_id).
+
+    python -m backend.backfill_doctor_ids              # default batch size
+    python -m backend.backfill_doctor_ids 5000         # custom batch size
+"""
+import logging
+import sys
+
+from sqlalchemy import text
+
+from .crud import normalize_doctor_name
+from .database import engine
+
+logger = logging.getLogger("medical_backend")
+
+BATCH_SIZE = 1000
+TABLES = [
+    ("appointments", "doctor_name"),
+    ("prescriptions", "prescribing_doctor"),
+]
+
+
+def load_doctor_names(connection):
+    """Map normalised doctor name -> user id, or None when several doctors share it."""
+    names = {}
+    rows = connection.execute(text("SELECT id, full_name FROM medical.users WHERE role = 'doctor'"))
+    for doctor_id, full_name in rows:
+        name = normalize_doctor_name(full_name)
+        if name:
+            names[name] = None if name in names else doctor_id
+    return names
+
+
+def match_doctor(raw_name, names):
+    name = normalize_doctor_name(raw_name)
+    if not name:
+        return None
+    if name in names:
+        return names[name]
+    candidates = [doctor_id for known, doctor_id in names.items() if known in name]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def backfill_table(connection, table: str, name_column: str, names, batch_size: int = BATCH_SIZE):
+    select_batch = text(
+        f"SELECT id, {name_column} FROM medical.{table} "
+        f"WHERE doctor_id IS NULL AND id > :after ORDER BY id LIMIT :limit"
+    )
+    update_row = text(f"UPDATE medical.{table} SET doctor_id = :doctor_id WHERE id = :id AND doctor_id IS NULL")
+
+    linked = unresolved = 0
+    after = "00000000-0000-0000-0000-000000000000"
+    while True:
+        batch = connection.execute(select_batch, {"after": after, "limit": batch_size}).all()
+        if not batch:
+            break
+        updates = []
+        for row_id, raw_name in batch:
+            doctor_id = match_doctor(raw_name, names)
+            if doctor_id:
+                updates.append({"id": row_id, "doctor_id": doctor_id})
+            else:
+                unresolved += 1
+        if updates:
+            connection.execute(update_row, updates)
+        connection.commit()
+        linked += len(updates)
+        after = batch[-1][0]
+        logger.info("%s: linked %d rows so far (%d unresolved)", table, linked, unresolved)
+    return linked, unresolved
+
+
+def backfill(batch_size: int = BATCH_SIZE):
+    results = {}
+    with engine.connect() as connection:
+        names = load_doctor_names(connection)
+        connection.commit()
+        for table, name_column in TABLES:
+            results[table] = backfill_table(connection, table, name_column, names, batch_size)
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_SIZE
+    for table, (linked, unresolved) in backfill(size).items():
+        print(f"{table}: {linked} linked, {unresolved} left without a doctor_id")
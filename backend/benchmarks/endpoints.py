@@ -0,0 +1,180 @@
+"""
+Throughput and latency of the main read endpoints against a seeded dataset.
+
+Seed first (see backend/benchmarks/seed.py), then drive the app in-process:
+
+    python -m backend.benchmarks.seed --scale 100k
+    python -m backend.benchmarks.endpoints --output bench-$(git rev-parse --short HEAD).json
+    python -m backend.benchmarks.endpoints --compare bench-old.json --output bench-new.json
+    python -m backend.benchmarks.endpoints --url http://localhost:8000 --only patients,doctor-dashboard
+
+Each endpoint gets a warm-up, then `--requests` calls spread over
+`--concurrency` workers. Requests rotate over `--accounts` benchmark patients
+and doctors so caches see more than one user. The JSON report holds the git
+commit, dataset size and, per endpoint, throughput and p50/p95/p99 latency;
+`--compare` prints the change against an earlier report.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from backend.benchmarks.login import BENCH_PASSWORD, percentile
+from backend.benchmarks.seed import bench_email
+
+# name -> (role whose token is used, path template)
+ENDPOINTS = {
+    "patient-data-visits": ("patient", "/patient-data/visits"),
+    "patient-data-lab-results": ("patient", "/patient-data/lab-results"),
+    "patient-data-prescriptions": ("patient", "/patient-data/prescriptions"),
+    "patient-data-appointments": ("patient", "/patient-data/appointments"),
+    "patient-data-allergies": ("patient", "/patient-data/allergies"),
+    "notifications": ("patient", "/notifications/{user_id}"),
+    "patients": ("doctor", "/patients/"),
+    "doctor-dashboard-stats": ("doctor", "/doctors/me/dashboard-stats"),
+    "doctor-recent-activity": ("doctor", "/doctors/me/recent-activity"),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def login(client, email):
+    response = await client.post("/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise SystemExit(f"Login as {email} failed ({response.status_code}); seed with python -m backend.benchmarks.seed")
+    token = response.json()["access_token"]
+    me = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    return {"headers": {"Authorization": f"Bearer {token}"}, "user_id": me.json()["id"]}
+
+
+async def run_endpoint(client, accounts, path_template, requests, concurrency, warmup):
+    rotation = itertools.cycle(accounts)
+
+    async def call():
+        account = next(rotation)
+        path = path_template.format(user_id=account["user_id"])
+        started = time.perf_counter()
+        response = await client.get(path, headers=account["headers"])
+        return response.status_code, time.perf_counter() - started
+
+    for _ in range(warmup):
+        await call()
+
+    latencies, statuses = [], {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            status, elapsed = await call()
+            statuses[status] = statuses.get(status, 0) + 1
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    ok = sum(count for status, count in statuses.items() if status < 400)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "errors": requests - ok,
+        "throughput_rps": round(requests / duration, 1) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def dataset_size():
+    from sqlalchemy import text
+    from backend.database import engine
+    from backend.benchmarks.seed import BENCH_DOMAIN
+
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT count(*) FROM medical.users WHERE role = 'patient' AND email LIKE :pattern"),
+            {"pattern": f"%@{BENCH_DOMAIN}"},
+        ).scalar()
+
+
+def compare(previous, current):
+    print(f"\nvs {previous.get('commit') or 'previous run'}:")
+    before = previous.get("endpoints", {})
+    for name, result in current["endpoints"].items():
+        old = before.get(name)
+        if not old:
+            continue
+        rps = (result["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        p99 = (result["p99_ms"] / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0.0
+        print(f"  {name:<28} throughput {rps:+6.1f}%   p99 {p99:+6.1f}%")
+
+
+async def main(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+    else:
+        from backend.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+    selected = {name: ENDPOINTS[name] for name in (args.only or ENDPOINTS)}
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "target": args.url or "in-process",
+        "patients": None if args.url else dataset_size(),
+        "endpoints": {},
+    }
+    async with client:
+        accounts = {
+            "patient": [await login(client, bench_email("patient", n)) for n in range(args.accounts)],
+            "doctor": [await login(client, bench_email("doctor", n)) for n in range(min(args.accounts, 5))],
+        }
+        for name, (role, path) in selected.items():
+            result = await run_endpoint(client, accounts[role], path, args.requests, args.concurrency, args.warmup)
+            report["endpoints"][name] = result
+            print(f"{name:<28} {result['throughput_rps']:>8} req/s  p50={result['p50_ms']}ms  "
+                  f"p95={result['p95_ms']}ms  p99={result['p99_ms']}ms  errors={result['errors']}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nwrote {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process app)")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=10, help="benchmark patients to rotate through")
+    parser.add_argument("--only", type=lambda s: s.split(","), help=f"comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args(argv)
+    unknown = set(args.only or ()) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
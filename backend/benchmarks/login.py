@@ -0,0 +1,114 @@
+"""
+Login throughput / latency benchmark.
+
+Fires LOGIN requests at increasing concurrency and, alongside them, a light
+stream of GET / probes so the effect of a login burst on unrelated requests
+is visible. Prints one row per concurrency level:
+
+    python -m backend.benchmarks.login                               # in-process app
+    python -m backend.benchmarks.login --url http://localhost:8000   # running server
+    python -m backend.benchmarks.login --levels 1,8,32 --requests 200
+
+In-process runs use the database configured by DATABASE_URL. A benchmark user
+is registered on first use.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _timed(client, method, path, **kwargs):
+    started = time.perf_counter()
+    response = await client.request(method, path, **kwargs)
+    return response.status_code, time.perf_counter() - started
+
+
+async def run_level(client, email, concurrency, total):
+    login_latencies, probe_latencies, statuses = [], [], {}
+    remaining = total
+
+    async def login_worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            status, elapsed = await _timed(client, "POST", "/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                login_latencies.append(elapsed)
+
+    async def probe_worker(stop):
+        while not stop.is_set():
+            _, elapsed = await _timed(client, "GET", "/")
+            probe_latencies.append(elapsed)
+            await asyncio.sleep(0.01)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_worker(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "statuses": statuses,
+        "throughput_rps": round(len(login_latencies) / duration, 1) if duration else 0.0,
+        "login_p50_ms": round(statistics.median(login_latencies) * 1000, 1) if login_latencies else None,
+        "login_p99_ms": round(percentile(login_latencies, 99) * 1000, 1),
+        "probe_p50_ms": round(statistics.median(probe_latencies) * 1000, 1) if probe_latencies else None,
+        "probe_p99_ms": round(percentile(probe_latencies, 99) * 1000, 1),
+    }
+
+
+async def main(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+    else:
+        from backend.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+    email = args.email or f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    async with client:
+        await client.post("/auth/register", json={"email": email, "password": BENCH_PASSWORD, "full_name": "Bench User", "role": "patient"})
+        results = []
+        for level in args.levels:
+            result = await run_level(client, email, level, args.requests)
+            results.append(result)
+            print(
+                f"c={result['concurrency']:>4}  {result['throughput_rps']:>7} req/s  "
+                f"login p50={result['login_p50_ms']}ms p99={result['login_p99_ms']}ms  "
+                f"probe p50={result['probe_p50_ms']}ms p99={result['probe_p99_ms']}ms  {result['statuses']}"
+            )
+        if args.json:
+            print(json.dumps(results, indent=2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process app)")
+    parser.add_argument("--email", help="existing user to log in as (registered if missing)")
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=100, help="logins per concurrency level")
+    parser.add_argument("--json", action="store_true", help="also print the results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
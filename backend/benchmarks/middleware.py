@@ -0,0 +1,132 @@
+"""
+Per-request overhead of the HTTP middleware stack.
+
+Builds the same trivial FastAPI app three ways and drives it directly through
+the ASGI interface (no sockets, no HTTP client), so the difference between
+runs is the middleware itself:
+
+    bare     no middleware
+    legacy   BaseHTTPMiddleware exception handler + @app.middleware("http")
+             size guard, as main.py used to install them
+    asgi     core.middleware.GlobalExceptionHandlerMiddleware +
+             RequestSizeLimitMiddleware
+
+    python -m backend.benchmarks.middleware
+    python -m backend.benchmarks.middleware --requests 20000 --body-bytes 4096
+
+Request logging is silenced during the run so log I/O does not dominate.
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from backend.core.logger import logger
+from backend.core.middleware import GlobalExceptionHandlerMiddleware, RequestSizeLimitMiddleware
+
+MAX_BODY = 25 * 1024 * 1024
+
+
+class LegacyExceptionHandlerMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware version this benchmark compares against."""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        request.state.request_id = str(uuid.uuid4())
+        try:
+            response = await call_next(request)
+            logger.info(f"Request: {request.method} {request.url.path} | Status: {response.status_code} | "
+                        f"Duration: {time.time() - start_time:.4f}s")
+            return response
+        except Exception:
+            return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    if variant == "legacy":
+        app.add_middleware(LegacyExceptionHandlerMiddleware)
+
+        @app.middleware("http")
+        async def reject_large_requests(request: Request, call_next):
+            cl = request.headers.get("content-length")
+            if cl and int(cl) > MAX_BODY:
+                return JSONResponse(status_code=413, content={"detail": "Request body too large"})
+            return await call_next(request)
+
+    elif variant == "asgi":
+        app.add_middleware(GlobalExceptionHandlerMiddleware)
+        app.add_middleware(RequestSizeLimitMiddleware, max_body_size=MAX_BODY)
+    return app
+
+
+async def call(app, body: bytes):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/echo", "raw_path": b"/echo",
+        "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "headers": [(b"content-type", b"application/octet-stream"), (b"content-length", str(len(body)).encode())],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int, body: bytes):
+    for _ in range(min(500, requests)):  # warm-up: builds the middleware stack
+        await call(app, body)
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await call(app, body)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99) - 1] * 1e6,
+    }
+
+
+async def main(args):
+    body = b"x" * args.body_bytes
+    previous_level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        results = {variant: await measure(build_app(variant), args.requests, body) for variant in ("bare", "legacy", "asgi")}
+    finally:
+        logger.setLevel(previous_level)
+
+    bare = results["bare"]["mean_us"]
+    print(f"{args.requests} requests, {args.body_bytes} byte body")
+    for variant, r in results.items():
+        print(f"  {variant:<7} mean={r['mean_us']:8.1f}us  p50={r['p50_us']:8.1f}us  p99={r['p99_us']:8.1f}us  "
+              f"overhead={r['mean_us'] - bare:+8.1f}us")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--body-bytes", type=int, default=1024)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
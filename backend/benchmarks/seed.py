@@ -0,0 +1,299 @@
+"""
+Seed a database with a reproducible benchmark dataset.
+
+Patients come with a proportional amount of history, generated from a fixed
+random seed so two runs at the same scale produce the same rows:
+
+    per patient   ~3 visits, ~4 lab results, ~2 prescriptions, ~2 appointments,
+                  ~1 allergy, ~2 notifications
+    doctors       one per 100 patients (at least 5), spread over 10 hospitals
+
+    python -m backend.benchmarks.seed --scale 1k
+    python -m backend.benchmarks.seed --scale 100k --reset
+    python -m backend.benchmarks.seed --patients 25000 --seed 7
+
+Every benchmark account has an `@bench.local` email and the password
+`bench-password`; `--reset` deletes those accounts and everything attached to
+them first. Rows are generated and loaded in batches (COPY on Postgres), so
+memory stays flat even at 1m patients. Uses the database configured by
+DATABASE_URL and migrates it to the latest revision first.
+"""
+import argparse
+import io
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+
+from backend.benchmarks.login import BENCH_PASSWORD
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BENCH_DOMAIN = "bench.local"
+BATCH_PATIENTS = 2_000
+HOSPITALS = [f"Bench Hospital {n}" for n in range(10)]
+
+# Average rows per patient for each table
+PER_PATIENT = {
+    "hospital_visits": 3,
+    "lab_results": 4,
+    "prescriptions": 2,
+    "appointments": 2,
+    "allergies": 1,
+    "notifications": 2,
+}
+
+VISIT_TYPES = ["Outpatient", "Inpatient", "Emergency", "Follow-up"]
+TESTS = [("Complete Blood Count", "Hematology"), ("Lipid Panel", "Biochemistry"), ("HbA1c", "Biochemistry"),
+         ("TSH", "Endocrinology"), ("Urinalysis", "Pathology"), ("Chest X-Ray", "Radiology")]
+LAB_STATUSES = ["Normal", "Normal", "Normal", "Abnormal", "Pending"]
+DRUGS = ["Metformin", "Atorvastatin", "Lisinopril", "Amlodipine", "Omeprazole", "Levothyroxine"]
+ALLERGENS = [("Penicillin", "Drug"), ("Peanuts", "Food"), ("Pollen", "Environmental"), ("Latex", "Other")]
+APPOINTMENT_STATUSES = ["Scheduled", "Scheduled", "Completed", "Cancelled"]
+
+
+def bench_email(kind: str, n: int) -> str:
+    return f"{kind}{n}@{BENCH_DOMAIN}"
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _count(rng: random.Random, average: int) -> int:
+    return rng.randint(0, 2 * average)
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def load_rows(connection, table, rows):
+    """Insert `rows` (dicts with identical keys) into `table`, with COPY when the driver allows it."""
+    if not rows:
+        return
+    columns = list(rows[0])
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_copy_value(row[column]) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table.schema}.{table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+    else:
+        connection.execute(insert(table), rows)
+
+
+class DatasetGenerator:
+    """Yields batches of rows per table; the same seed and patient count always give the same data."""
+
+    def __init__(self, patients: int, seed: int = 42, base_date: date = None, password_hash: str = ""):
+        self.patients = patients
+        self.seed = seed
+        self.base = datetime.combine(base_date or date.today(), datetime.min.time(), tzinfo=timezone.utc)
+        self.password_hash = password_hash
+        self.doctor_count = max(5, patients // 100)
+        rng = random.Random(f"{seed}:doctors")
+        self.doctors = [
+            {"id": _uuid(rng), "n": n, "name": f"Dr. Bench {n}", "hospital": HOSPITALS[n % len(HOSPITALS)]}
+            for n in range(self.doctor_count)
+        ]
+
+    def _user(self, id, email, name, role, hospital, created_at):
+        return {
+            "id": id, "email": email, "full_name": name, "role": role, "hashed_password": self.password_hash,
+            "is_verified": True, "hospital_name": hospital, "created_at": created_at,
+        }
+
+    def doctor_batch(self):
+        rng = random.Random(f"{self.seed}:doctor-profiles")
+        users, profiles = [], []
+        for doctor in self.doctors:
+            created = self.base - timedelta(days=rng.randint(400, 1500))
+            users.append(self._user(doctor["id"], bench_email("doctor", doctor["n"]), doctor["name"], "doctor",
+                                    doctor["hospital"], created))
+            profiles.append({
+                "id": _uuid(rng), "user_id": doctor["id"], "specialty": rng.choice(["Cardiology", "Neurology", "General Medicine"]),
+                "license_number": f"BENCH-{doctor['n']:06d}", "years_of_experience": rng.randint(1, 30),
+                "hospital_name": doctor["hospital"],
+            })
+        return {"users": users, "doctors": profiles}
+
+    def patient_batches(self, batch_size: int = BATCH_PATIENTS):
+        for start in range(0, self.patients, batch_size):
+            yield self._patient_batch(start, min(self.patients, start + batch_size))
+
+    def _patient_batch(self, start: int, stop: int):
+        # Seeded per batch so any batch can be regenerated on its own
+        rng = random.Random(f"{self.seed}:patients:{start}")
+        batch = {name: [] for name in ("users", *PER_PATIENT)}
+        for n in range(start, stop):
+            patient_id = _uuid(rng)
+            doctor = self.doctors[n % len(self.doctors)]
+            joined = self.base - timedelta(days=rng.randint(0, 1000), seconds=rng.randint(0, 86399))
+            batch["users"].append(self._user(patient_id, bench_email("patient", n), f"Bench Patient {n}", "patient",
+                                             doctor["hospital"], joined))
+
+            visit_ids = []
+            for _ in range(_count(rng, PER_PATIENT["hospital_visits"])):
+                admitted = joined + timedelta(days=rng.randint(0, 300))
+                visit_ids.append(_uuid(rng))
+                batch["hospital_visits"].append({
+                    "id": visit_ids[-1], "user_id": patient_id, "hospital_name": doctor["hospital"],
+                    "department": "General", "admission_date": admitted, "discharge_date": admitted + timedelta(days=rng.randint(0, 5)),
+                    "visit_type": rng.choice(VISIT_TYPES), "primary_doctor": doctor["name"], "diagnosis": "Routine assessment",
+                    "cost": round(rng.uniform(500, 50000), 2), "insurance_claim_status": "Not Filed", "created_at": admitted,
+                })
+            for _ in range(_count(rng, PER_PATIENT["lab_results"])):
+                test_name, category = rng.choice(TESTS)
+                tested = joined + timedelta(days=rng.randint(0, 300))
+                batch["lab_results"].append({
+                    "id": _uuid(rng), "user_id": patient_id, "visit_id": rng.choice(visit_ids) if visit_ids else None,
+                    "test_name": test_name, "test_category": category, "result_value": str(round(rng.uniform(1, 200), 1)),
+                    "status": rng.choice(LAB_STATUSES), "test_date": tested, "ordering_doctor": doctor["name"],
+                    "created_at": tested,
+                })
+            for _ in range(_count(rng, PER_PATIENT["prescriptions"])):
+                started = joined + timedelta(days=rng.randint(0, 300))
+                batch["prescriptions"].append({
+                    "id": _uuid(rng), "user_id": patient_id, "visit_id": rng.choice(visit_ids) if visit_ids else None,
+                    "drug_name": rng.choice(DRUGS), "dosage": f"{rng.choice([5, 10, 20, 50])} mg", "frequency": "Once daily",
+                    "start_date": started.date(), "refills_remaining": rng.randint(0, 3), "prescribing_doctor": doctor["name"],
+                    "doctor_id": doctor["id"], "status": "Active", "created_at": started,
+                })
+            for _ in range(_count(rng, PER_PATIENT["appointments"])):
+                booked = self.base - timedelta(days=rng.randint(0, 200))
+                batch["appointments"].append({
+                    "id": _uuid(rng), "user_id": patient_id, "doctor_name": doctor["name"], "doctor_id": doctor["id"],
+                    "hospital_clinic": doctor["hospital"], "consultation_mode": "Offline",
+                    "appointment_date": booked + timedelta(days=rng.randint(0, 240), hours=rng.randint(9, 17)),
+                    "appointment_type": "Consultation", "reason": "Follow-up", "status": rng.choice(APPOINTMENT_STATUSES),
+                    "created_at": booked,
+                })
+            for _ in range(_count(rng, PER_PATIENT["allergies"])):
+                allergen, kind = rng.choice(ALLERGENS)
+                batch["allergies"].append({
+                    "id": _uuid(rng), "user_id": patient_id, "allergen_name": allergen, "allergen_type": kind,
+                    "severity": rng.choice(["Mild", "Moderate", "Severe"]), "reaction_symptoms": "Rash",
+                    "first_observed": (joined - timedelta(days=rng.randint(0, 3000))).date(), "created_at": joined,
+                })
+            for _ in range(_count(rng, PER_PATIENT["notifications"])):
+                batch["notifications"].append({
+                    "id": _uuid(rng), "user_id": patient_id, "title": "Appointment update", "message": "Your appointment was updated.",
+                    "type": "appointment", "is_read": rng.random() < 0.5,
+                    "created_at": self.base - timedelta(days=rng.randint(0, 60)),
+                })
+        return batch
+
+
+def bench_user_count(connection) -> int:
+    return connection.execute(
+        text("SELECT count(*) FROM medical.users WHERE email LIKE :pattern"), {"pattern": f"%@{BENCH_DOMAIN}"}
+    ).scalar()
+
+
+def reset(connection):
+    """Delete every benchmark account and the rows that belong to it."""
+    bench_ids = "SELECT id FROM medical.users WHERE email LIKE :pattern"
+    params = {"pattern": f"%@{BENCH_DOMAIN}"}
+    for table in ("notifications", "lab_results", "prescriptions", "allergies", "claims", "insurance_policies"):
+        connection.execute(text(f"DELETE FROM medical.{table} WHERE user_id IN ({bench_ids})"), params)
+    connection.execute(text(
+        f"DELETE FROM medical.calls WHERE appointment_id IN (SELECT id FROM medical.appointments"
+        f" WHERE user_id IN ({bench_ids}) OR doctor_id IN ({bench_ids}))"
+    ), params)
+    connection.execute(text(
+        f"DELETE FROM medical.appointments WHERE user_id IN ({bench_ids}) OR doctor_id IN ({bench_ids})"
+    ), params)
+    connection.execute(text(f"UPDATE medical.prescriptions SET doctor_id = NULL WHERE doctor_id IN ({bench_ids})"), params)
+    for table in ("hospital_visits", "doctors", "researchers", "patient_profiles"):
+        connection.execute(text(f"DELETE FROM medical.{table} WHERE user_id IN ({bench_ids})"), params)
+    connection.execute(text("DELETE FROM medical.users WHERE email LIKE :pattern"), params)
+
+
+def _with_first(first, rest):
+    yield first
+    yield from rest
+
+
+def seed(engine, patients: int, seed_value: int = 42, base_date: date = None, do_reset: bool = False) -> dict:
+    from backend import models
+    from backend.auth import pwd_context
+
+    tables = {
+        "users": models.User.__table__,
+        "doctors": models.Doctor.__table__,
+        "hospital_visits": models.HospitalVisit.__table__,
+        "lab_results": models.LabResult.__table__,
+        "prescriptions": models.Prescription.__table__,
+        "appointments": models.Appointment.__table__,
+        "allergies": models.Allergy.__table__,
+        "notifications": models.Notification.__table__,
+    }
+    generator = DatasetGenerator(patients, seed_value, base_date, password_hash=pwd_context.hash(BENCH_PASSWORD))
+    expected_users = patients + generator.doctor_count
+    started = time.perf_counter()
+    counts = {name: 0 for name in tables}
+
+    with engine.connect() as connection:
+        if do_reset:
+            reset(connection)
+            connection.commit()
+        existing = bench_user_count(connection)
+        if existing == expected_users:
+            return {"patients": patients, "skipped": True, "reason": "dataset already present"}
+        if existing:
+            raise SystemExit(f"{existing} benchmark users exist from a different scale; rerun with --reset")
+
+        for number, batch in enumerate(_with_first(generator.doctor_batch(), generator.patient_batches())):
+            # Parents before children so foreign keys hold inside each transaction
+            for name, table in tables.items():
+                rows = batch.get(name)
+                if rows:
+                    load_rows(connection, table, rows)
+                    counts[name] += len(rows)
+            connection.commit()
+            if number and number % 50 == 0:
+                print(f"  {counts['users'] - generator.doctor_count} / {patients} patients loaded")
+        if connection.dialect.name == "postgresql":
+            # Fresh statistics so the planner sees the new table sizes
+            connection.execute(text("ANALYZE"))
+            connection.commit()
+
+    return {
+        "patients": patients,
+        "doctors": generator.doctor_count,
+        "seed": seed_value,
+        "rows": counts,
+        "duration_s": round(time.perf_counter() - started, 1),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    size.add_argument("--patients", type=int, help="exact patient count (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-date", type=date.fromisoformat, help="date the data is generated around (default: today)")
+    parser.add_argument("--reset", action="store_true", help="delete existing benchmark data first")
+    return parser.parse_args(argv)
+
+
+def main(args):
+    from backend.database import engine
+    from backend.migrate import upgrade_database
+
+    upgrade_database()
+    patients = args.patients or SCALES[args.scale]
+    print(seed(engine, patients, args.seed, args.base_date, args.reset))
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,151 @@
+"""
+Flag queries in crud.py that have no supporting index.
+
+Every `db.query(...)` / `select(...)` chain in the scanned modules is parsed
+with `ast`; the columns referenced inside its `.filter()` / `.where()` calls
+are compared against the indexes declared on the models (primary keys,
+unique constraints, `index=True` columns and `Index(...)` entries). A query is
+considered supported when at least one filtered column is the leading column
+of an index on that table. Chains continued through a local variable
+(`query = db.query(...)` followed by `query = query.filter(...)`) are
+treated as one query.
+
+    python -m backend.check_indexes            # scan crud.py and async_crud.py
+    python -m backend.check_indexes path.py    # scan specific files
+
+Exits with status 1 when an unsupported query is found so it can run in CI.
+"""
+import ast
+import sys
+from pathlib import Path
+
+from . import models
+
+BACKEND_DIR = Path(__file__).resolve().parent
+DEFAULT_FILES = [BACKEND_DIR / "crud.py", BACKEND_DIR / "async_crud.py"]
+FILTER_METHODS = {"filter", "where", "filter_by"}
+
+
+def leading_index_columns():
+    """Map model class name -> set of columns that lead at least one index."""
+    result = {}
+    for mapper in models.Base.registry.mappers:
+        table = mapper.local_table
+        leading = {col.name for col in table.primary_key.columns}
+        for index in table.indexes:
+            leading.add(list(index.columns)[0].name)
+        for constraint in table.constraints:
+            columns = list(getattr(constraint, "columns", []))
+            if columns and constraint.__class__.__name__ == "UniqueConstraint":
+                leading.add(columns[0].name)
+        for column in table.columns:
+            if column.unique or column.index:
+                leading.add(column.name)
+        result[mapper.class_.__name__] = leading
+    return result
+
+
+def _model_column(node):
+    """Return (Model, column) for an expression like `models.Model.column`."""
+    if (isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Attribute)
+            and isinstance(node.value.value, ast.Name)
+            and node.value.value.id == "models"):
+        return node.value.attr, node.attr
+    return None
+
+
+def _filtered_columns(call):
+    columns = set()
+    for arg in list(call.args) + [kw.value for kw in call.keywords]:
+        for sub in ast.walk(arg):
+            ref = _model_column(sub)
+            if ref:
+                columns.add(ref)
+    return columns
+
+
+def _assigned_names(func):
+    """Map id(call) -> variable name for chains assigned to a plain local name."""
+    names = {}
+    for node in ast.walk(func):
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and isinstance(node.value, ast.Call)):
+            names[id(node.value)] = node.targets[0].id
+    return names
+
+
+def _outermost_chains(tree):
+    """Yield (function_name, assigned_names, call) for each top-level method-call chain, in source order."""
+    for func in ast.walk(tree):
+        if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        inner = set()
+        for node in ast.walk(func):
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                inner.add(id(node.func.value))
+        assigned = _assigned_names(func)
+        chains = [node for node in ast.walk(func) if isinstance(node, ast.Call) and id(node) not in inner]
+        for node in sorted(chains, key=lambda n: (n.lineno, n.col_offset)):
+            yield func.name, assigned, node
+
+
+def scan_file(path: Path, leading):
+    tree = ast.parse(path.read_text(), filename=str(path))
+    problems = []
+    # (function, variable) -> (models, filtered columns) of the chain stored in it
+    bound = {}
+    for func_name, assigned, chain in _outermost_chains(tree):
+        queried_models, filtered = set(), set()
+        node = chain
+        while isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Attribute):
+                if node.func.attr in FILTER_METHODS:
+                    filtered |= _filtered_columns(node)
+                elif node.func.attr == "query":
+                    queried_models |= {a.attr for a in node.args if isinstance(a, ast.Attribute)}
+                node = node.func.value
+            elif isinstance(node.func, ast.Name) and node.func.id == "select":
+                queried_models |= {a.attr for a in node.args if isinstance(a, ast.Attribute)}
+                break
+            else:
+                break
+        if isinstance(node, ast.Name) and (func_name, node.id) in bound:
+            base_models, base_filtered = bound[(func_name, node.id)]
+            queried_models |= base_models
+            filtered |= base_filtered
+        if id(chain) in assigned:
+            bound[(func_name, assigned[id(chain)])] = (queried_models, filtered)
+        if not filtered:
+            continue
+        by_model = {}
+        for model, column in filtered:
+            by_model.setdefault(model, set()).add(column)
+        for model, columns in by_model.items():
+            if model not in leading:
+                continue
+            if not columns & leading[model]:
+                problems.append((path.name, chain.lineno, func_name, model, sorted(columns)))
+    return problems
+
+
+def main(argv):
+    files = [Path(p) for p in argv] or DEFAULT_FILES
+    leading = leading_index_columns()
+    problems = []
+    for path in files:
+        if path.exists():
+            problems.extend(scan_file(path, leading))
+
+    if not problems:
+        print("All filtered queries have a supporting index.")
+        return 0
+
+    print("Queries without a supporting index:")
+    for filename, lineno, func_name, model, columns in problems:
+        print(f"  {filename}:{lineno} {func_name}() -> {model} filtered on {', '.join(columns)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
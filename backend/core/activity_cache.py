@@ -0,0 +1,108 @@
+"""
+Cache of doctor activity feeds served by GET /doctors/me/recent-activity.
+
+Entries are keyed by the doctor's user id. A committed insert, update or
+delete of one of the doctor's appointments or prescriptions drops their
+entry. A patient registering (or changing) bumps the generation of their
+hospital, which makes every cached feed for that hospital stale at once
+without scanning the cache; doctors without a hospital see patients from
+every hospital and follow a single shared generation.
+
+    ACTIVITY_CACHE_TTL    seconds a feed may be reused (default 15)
+    ACTIVITY_CACHE_SIZE   feeds kept per worker (default 1024)
+
+Feeds are built from the primary, never a replica, so a feed cached after an
+invalidation includes the write. Other workers only notice a change once
+their entry expires, so the TTL is the upper bound on how stale a feed can be.
+"""
+import os
+import threading
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+
+ACTIVITY_CACHE = TTLCache(
+    maxsize=int(os.getenv("ACTIVITY_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("ACTIVITY_CACHE_TTL", "15")),
+)
+
+_PENDING_KEY = "activity_invalidations"
+_ALL_HOSPITALS = ("hospital", None)
+
+# Bumped on every invalidation. A feed is stored with the generations read *before* it was
+# queried, so a write that commits while the query runs makes the stored feed stale at once.
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def _bump(*keys) -> None:
+    with _generations_lock:
+        for key in keys:
+            _generations[key] = _generations.get(key, 0) + 1
+
+
+def feed_generation(doctor_id, hospital_name):
+    return (
+        _generations.get(("doctor", str(doctor_id)), 0),
+        _generations.get(("hospital", hospital_name), 0),
+        _generations.get(_ALL_HOSPITALS, 0),
+    )
+
+
+def get_cached_feed(doctor_id, hospital_name):
+    entry = ACTIVITY_CACHE.get(str(doctor_id))
+    if entry is None:
+        return None
+    cached_hospital, generation, feed = entry
+    if cached_hospital != hospital_name or generation != feed_generation(doctor_id, hospital_name):
+        return None
+    return feed
+
+
+def cache_feed(doctor_id, hospital_name, generation, feed) -> None:
+    ACTIVITY_CACHE.set(str(doctor_id), (hospital_name, generation, feed))
+
+
+def invalidate_doctor_feed(doctor_id) -> None:
+    _bump(("doctor", str(doctor_id)))
+    ACTIVITY_CACHE.pop(str(doctor_id))
+
+
+def invalidate_hospital_feeds(hospital_name) -> None:
+    _bump(("hospital", hospital_name), _ALL_HOSPITALS)
+
+
+def _values(instance, attribute):
+    """The attribute's current value and, for a row changed in this flush, the value it replaced."""
+    history = inspect(instance).attrs[attribute].history
+    return list(history.added) + list(history.unchanged) + list(history.deleted) or [getattr(instance, attribute)]
+
+
+def _affected(instance):
+    """("doctor", id) / ("hospital", name) of every feed the row appears in, or appeared in before this flush."""
+    from .. import models
+
+    if isinstance(instance, (models.Appointment, models.Prescription)):
+        return [("doctor", str(doctor_id)) for doctor_id in _values(instance, "doctor_id") if doctor_id is not None]
+    if isinstance(instance, models.User) and "patient" in _values(instance, "role"):
+        return [("hospital", hospital_name) for hospital_name in _values(instance, "hospital_name")]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_activity_changes(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        for affected in _affected(instance):
+            session.info.setdefault(_PENDING_KEY, set()).add(affected)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _apply_activity_invalidations(session):
+    for kind, key in session.info.pop(_PENDING_KEY, ()):
+        if kind == "doctor":
+            invalidate_doctor_feed(key)
+        else:
+            invalidate_hospital_feeds(key)
@@ -0,0 +1,275 @@
+"""
+Connection pool configuration and telemetry for the SQLAlchemy engines.
+
+Pool sizing is read from the environment so it can be tuned per deployment
+without a code change:
+
+    DB_POOL_SIZE            persistent connections kept per worker
+    DB_MAX_OVERFLOW         extra short-lived connections allowed per worker
+    DB_POOL_TIMEOUT         seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE         seconds after which a connection is replaced
+    DB_POOL_PRE_PING        "true"/"false" - test connections on checkout
+    DB_STATEMENT_TIMEOUT_MS per-statement timeout applied to every connection
+    DB_MAX_CONNECTIONS      total connection budget for this service (all workers)
+    WEB_CONCURRENCY         number of uvicorn workers sharing that budget
+
+When DB_MAX_CONNECTIONS is set the budget is split evenly across workers (and
+across the sync and async engines inside each worker) so the total
+`pool_size + max_overflow` never exceeds it; explicit DB_POOL_SIZE and
+DB_MAX_OVERFLOW values are cut down to fit, with a warning.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger("medical_backend")
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: int
+    pool_recycle: int
+    pool_pre_ping: bool
+    statement_timeout_ms: int
+    workers: int
+    max_connections: Optional[int]
+
+
+def resolve_pool_settings(prefix: str = "DB", pools_per_worker: int = 1) -> PoolSettings:
+    """Build pool settings from env vars, sizing against the worker count."""
+    workers = max(1, _env_int("WEB_CONCURRENCY", 1))
+    max_connections = _env_int(f"{prefix}_MAX_CONNECTIONS", None)
+    pool_size = _env_int(f"{prefix}_POOL_SIZE", None)
+    max_overflow = _env_int(f"{prefix}_MAX_OVERFLOW", None)
+
+    if max_connections:
+        per_worker = max(1, max_connections // (workers * pools_per_worker))
+        overflow_set = max_overflow is not None
+        if max_overflow is None:
+            max_overflow = per_worker // 3
+        if pool_size is None:
+            pool_size = max(1, per_worker - max_overflow)
+        # Never let explicit values blow through the shared budget
+        if pool_size > per_worker:
+            logger.warning(
+                f"{prefix}_POOL_SIZE={pool_size} exceeds the {per_worker} connections per pool that "
+                f"{prefix}_MAX_CONNECTIONS={max_connections} allows; using {per_worker}"
+            )
+            pool_size = per_worker
+        if pool_size + max_overflow > per_worker:
+            clamped = max(0, per_worker - pool_size)
+            if overflow_set:
+                logger.warning(f"{prefix}_MAX_OVERFLOW lowered from {max_overflow} to {clamped} to fit {prefix}_MAX_CONNECTIONS")
+            max_overflow = clamped
+    else:
+        pool_size = 5 if pool_size is None else pool_size
+        max_overflow = 10 if max_overflow is None else max_overflow
+
+    return PoolSettings(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=_env_int(f"{prefix}_POOL_TIMEOUT", 30),
+        pool_recycle=_env_int(f"{prefix}_POOL_RECYCLE", 1800),
+        pool_pre_ping=_env_bool(f"{prefix}_POOL_PRE_PING", True),
+        statement_timeout_ms=_env_int(f"{prefix}_STATEMENT_TIMEOUT_MS", 30000),
+        workers=workers,
+        max_connections=max_connections,
+    )
+
+
+class PoolStats:
+    """Thread-safe counters describing how a pool is being used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_time_total = 0.0
+            self.checkout_time_max = 0.0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+
+    def record_checkout(self, elapsed: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_time_total += elapsed
+            if elapsed > self.checkout_time_max:
+                self.checkout_time_max = elapsed
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.checkout_time_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "checkout_latency_avg_ms": round(avg * 1000, 3),
+                "checkout_latency_max_ms": round(self.checkout_time_max * 1000, 3),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+
+
+POOL_STATS: Dict[str, PoolStats] = {}
+
+
+def instrumented_pool_class(name: str, base=QueuePool):
+    """
+    Return a QueuePool subclass that times every checkout into POOL_STATS[name].
+
+    A class (rather than an instance attribute) carries the stats so they
+    survive `pool.recreate()`, which SQLAlchemy calls on `engine.dispose()`.
+    """
+    stats = POOL_STATS.setdefault(name, PoolStats())
+
+    class InstrumentedQueuePool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                rec = super()._do_get()
+            except exc.TimeoutError:
+                stats.record_timeout()
+                raise
+            stats.record_checkout(time.perf_counter() - start)
+            return rec
+
+    InstrumentedQueuePool.stats = stats
+    return InstrumentedQueuePool
+
+
+def engine_kwargs(url: str, settings: PoolSettings, name: str = "primary", is_async: bool = False) -> dict:
+    """Keyword arguments for `create_engine` / `create_async_engine` implementing `settings`."""
+    if url.startswith("sqlite"):
+        # SQLite uses its own single-file pools; sizing does not apply.
+        return {}
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    return {
+        "poolclass": instrumented_pool_class(name, base),
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+def install_pool_listeners(engine, settings: PoolSettings, name: str = "primary"):
+    """Apply the statement timeout on new connections and track pool events."""
+    stats = POOL_STATS.setdefault(name, PoolStats())
+    # asyncpg receives the timeout through `server_settings` at connect time instead
+    set_timeout_on_connect = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.record_connect()
+        if set_timeout_on_connect and settings.statement_timeout_ms:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(f"SET statement_timeout = {int(settings.statement_timeout_ms)}")
+            finally:
+                cursor.close()
+            # psycopg2 opens an implicit transaction for the SET; end it so the
+            # setting sticks for the session and the connection starts clean.
+            dbapi_connection.commit()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.record_invalidation()
+
+
+def pool_status(engine, settings: PoolSettings, name: str = "primary") -> dict:
+    """Current pool occupancy plus accumulated checkout telemetry."""
+    pool = engine.pool
+    status = {
+        "pool": name,
+        "pool_class": type(pool).__name__,
+        "workers": settings.workers,
+        "max_connections": settings.max_connections,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout_s": settings.pool_timeout,
+        "pool_recycle_s": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+        "statement_timeout_ms": settings.statement_timeout_ms,
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        })
+    stats = POOL_STATS.get(name)
+    if stats:
+        status.update(stats.snapshot())
+    return status
+
+
+def pool_metric_families(engines: Dict[str, object]):
+    """Pool gauges and checkout counters for core.metrics, read at scrape time."""
+    gauges = {"checked_out": [], "checked_in": [], "overflow": [], "size": []}
+    counters = {"checkouts": [], "checkout_timeouts": [], "connects": [], "invalidations": []}
+    checkout_seconds = []
+    for name, engine in engines.items():
+        labels = {"pool": name}
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            gauges["checked_out"].append((labels, pool.checkedout()))
+            gauges["checked_in"].append((labels, pool.checkedin()))
+            gauges["overflow"].append((labels, max(0, pool.overflow())))
+            gauges["size"].append((labels, pool.size()))
+        stats = POOL_STATS.get(name)
+        if stats:
+            with stats._lock:
+                counters["checkouts"].append((labels, stats.checkouts))
+                counters["checkout_timeouts"].append((labels, stats.timeouts))
+                counters["connects"].append((labels, stats.connects))
+                counters["invalidations"].append((labels, stats.invalidations))
+                checkout_seconds.append((labels, stats.checkout_time_total))
+
+    families = [
+        (f"db_pool_{key}", "gauge", f"Connections {key.replace('_', ' ')} in the pool.", samples)
+        for key, samples in gauges.items()
+    ]
+    families += [
+        (f"db_pool_{key}_total", "counter", f"Pool {key.replace('_', ' ')} since start.", samples)
+        for key, samples in counters.items()
+    ]
+    families.append(("db_pool_checkout_seconds_total", "counter", "Time spent waiting for a connection.", checkout_seconds))
+    return families
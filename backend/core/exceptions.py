@@ -34,3 +34,11 @@ class ForbiddenException(BaseAPIException):
 class ConflictException(BaseAPIException):
     status_code = status.HTTP_409_CONFLICT
     detail = "Resource conflict"
+
+class PayloadTooLargeException(BaseAPIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    detail = "Payload too large"
+
+class ServiceUnavailableException(BaseAPIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "Service temporarily unavailable"
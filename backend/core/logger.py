@@ -1,6 +1,43 @@
+"""
+Application logging.
+
+Code that logs only puts the record on an in-memory queue (`QueueHandler`);
+a background `QueueListener` thread formats it and writes to stdout and a
+size-rotated `logs/backend.log`. A slow disk therefore never delays a
+response. If the queue is full (the writer has fallen far behind) records are
+dropped and counted instead of blocking the caller.
+
+    LOG_LEVEL           minimum level (default INFO)
+    LOG_FORMAT          "json" (one JSON object per line, default) or "text"
+    LOG_DIR             directory for backend.log (default ./logs)
+    LOG_MAX_BYTES       rotate backend.log at this size (default 10 MB)
+    LOG_BACKUP_COUNT    rotated files kept (default 5)
+    LOG_QUEUE_SIZE      records buffered before dropping (default 10000)
+
+Every record logged while a request is being handled carries its
+`request_id` (see `request_id_var`, set by GlobalExceptionHandlerMiddleware).
+"""
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
 
 # Create detailed formatter
 formatter = logging.Formatter(
@@ -8,23 +45,122 @@ formatter = logging.Formatter(
     datefmt="%Y-%m-%d %H:%M:%S"
 )
 
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, source location, message and any `extra=` fields."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "source": f"{record.module}.{record.funcName}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the current request id on records; runs in the caller, before the record is queued."""
+
+    def filter(self, record):
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never waits on the writer and leaves formatting to the listener thread."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args now (they may be mutated after the call) and render any traceback,
+        # which cannot be pickled/copied reliably; everything else is formatted by the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def _output_handlers():
+    output_formatter = JsonFormatter() if LOG_FORMAT == "json" else formatter
+
+    # Console Handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(output_formatter)
+
+    # File Handler (rotated by size, creates logs/ directory)
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_DIR / "backend.log", maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.setFormatter(output_formatter)
+    return console_handler, file_handler
+
+
 def setup_logger(name="medical_backend"):
+    global _listener, _queue_handler
     logger = logging.getLogger(name)
-    
+
     if not logger.handlers:
-        # Console Handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-        
-        # File Handler (Optional, creates logs/ directory)
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        file_handler = logging.FileHandler(log_dir / "backend.log")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    logger.setLevel(logging.INFO)
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_handler.addFilter(RequestIdFilter())
+        logger.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *_output_handlers(), respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+    # Root handlers (logging.basicConfig) would write synchronously and duplicate every line
+    logger.propagate = False
+    logger.setLevel(LOG_LEVEL)
     return logger
 
+
+def stop_logging():
+    """Flush queued records and stop the writer thread (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    handler = _queue_handler
+    return {
+        "format": LOG_FORMAT,
+        "queued": handler.queue.qsize() if handler else 0,
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": handler.dropped if handler else 0,
+        "writer_running": _listener is not None,
+    }
+
+
 logger = setup_logger()
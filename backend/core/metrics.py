@@ -0,0 +1,235 @@
+"""
+In-process metrics exposed in the Prometheus text format at GET /system/metrics.
+
+Recording is a dict lookup, a `bisect` and a few additions under a per-metric
+lock, so it stays on in production. Values that already live elsewhere (pool
+occupancy, open websockets) are not copied on every change: modules register a
+collector that reads them only when the endpoint is scraped.
+
+    METRICS_ENABLED    "false" turns request/query recording off (default true)
+
+Every uvicorn worker keeps its own registry; scrape each worker (or sum the
+series) when running with WEB_CONCURRENCY > 1.
+
+Per-request database work is counted on `core.query_stats.request_query_stats`,
+which the cursor listeners installed by `instrument_engine` update.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from .query_stats import RequestQueryStats, request_query_stats
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+
+# Seconds; covers cached reads (~1ms) up to slow agent calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (labels, value) pairs; a collector returns (name, type, help, samples) families
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram; `observe` costs one bisect and three additions."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        lines = []
+        le_names = self.labelnames + ("le",)
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(le_names, labels + (le,))} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Add a callable that returns metric families computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception:
+                # A broken collector must not take the whole scrape down
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template and status class.", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"))
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = REGISTRY.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request.", ("method", "route"))
+DB_QUERIES = REGISTRY.counter("db_queries_total", "SQL statements executed, by engine.", ("engine",))
+DB_QUERY_LATENCY = REGISTRY.histogram("db_query_duration_seconds", "SQL statement latency, by engine.", ("engine",))
+AGENT_CALLS = REGISTRY.counter("agent_calls_total", "Agent invocations by agent and outcome.", ("agent", "outcome"))
+AGENT_LATENCY = REGISTRY.histogram("agent_call_duration_seconds", "Agent call latency by agent.", ("agent",))
+
+
+def status_class(status_code: Optional[int]) -> str:
+    # No response started means the app crashed and the client got a 500
+    return f"{(status_code or 500) // 100}xx"
+
+
+def record_request(method: str, route: Optional[str], status_code: Optional[int], duration: float,
+                   db_stats: Optional[RequestQueryStats]) -> None:
+    if not METRICS_ENABLED:
+        return
+    # Unmatched paths are folded together so scanners cannot create unbounded series
+    route = route or "unmatched"
+    HTTP_REQUESTS.inc(method, route, status_class(status_code))
+    HTTP_LATENCY.observe(duration, method, route)
+    if db_stats is not None:
+        DB_QUERIES_PER_REQUEST.observe(db_stats.queries, method, route)
+        DB_TIME_PER_REQUEST.observe(db_stats.seconds, method, route)
+
+
+def instrument_engine(engine, name: str = "primary") -> None:
+    """Time every statement `engine` executes and add it to the current request's totals."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if METRICS_ENABLED:
+            DB_QUERIES.inc(name)
+            DB_QUERY_LATENCY.observe(elapsed, name)
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def timed_agent_call(agent: str, fn: Callable, *args, **kwargs):
+    """Run `fn` and record its latency and outcome under `agent`."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = fn(*args, **kwargs)
+        outcome = "ok"
+        return result
+    finally:
+        AGENT_CALLS.inc(agent, outcome)
+        AGENT_LATENCY.observe(time.perf_counter() - started, agent)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -1,54 +1,188 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi.responses import JSONResponse
+import os
+import random
 import time
 import uuid
-from .logger import logger
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException
+
+from .logger import logger, request_id_var
 from .exceptions import BaseAPIException
+from .metrics import record_request
+from .query_stats import QUERY_DEBUG_HEADERS, RequestQueryStats, report_repeated_queries, request_query_stats
+
+# Fraction of successful (< 400) requests that get an access log line; errors and
+# requests slower than LOG_SLOW_REQUEST_MS are always logged.
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+
+# Both middlewares below are plain ASGI callables rather than BaseHTTPMiddleware:
+# they only wrap `send`/`receive`, so there is no extra task or response stream per request.
+
+
+class GlobalExceptionHandlerMiddleware:
+    """Assign a request id, log and record metrics for every request and turn uncaught errors into JSON."""
 
-class GlobalExceptionHandlerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter()
         request_id = str(uuid.uuid4())
-        
-        # Inject request ID for tracing (can be accessed in routes too if needed)
-        request.state.request_id = request_id
-        
+        # Inject request ID for tracing (available in routes as request.state.request_id
+        # and on every log record written while the request runs)
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+        db_stats = RequestQueryStats(request_id)
+        db_stats_token = request_query_stats.set(db_stats)
+
+        method, path = scope["method"], scope["path"]
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if QUERY_DEBUG_HEADERS:
+                    message["headers"] = list(message.get("headers", [])) + db_stats.headers()
+            await send(message)
+
         try:
-            response = await call_next(request)
-            
-            process_time = time.time() - start_time
-            logger.info(
-                f"Request: {request.method} {request.url.path} | "
-                f"Status: {response.status_code} | "
-                f"Duration: {process_time:.4f}s | "
-                f"ID: {request_id}"
-            )
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
+
         except BaseAPIException as exc:
             # Handle known custom exceptions
             logger.warning(
-                f"API Exception: {request.method} {request.url.path} | "
-                f"Error: {exc.detail} | "
-                f"ID: {request_id}"
+                f"API Exception: {method} {path} | Error: {exc.detail}",
+                extra={"method": method, "path": path, "status": exc.status_code},
             )
-            return JSONResponse(
+            if status_code is not None:
+                raise
+            response = JSONResponse(
                 status_code=exc.status_code,
                 content={"detail": exc.detail, "request_id": request_id},
                 headers=getattr(exc, "headers", None)
             )
-            
+            return await response(scope, receive, send_wrapper)
+
         except Exception as exc:
             # Handle unhandled server errors
             logger.error(
-                f"Unhandled Exception: {request.method} {request.url.path} | "
-                f"Error: {str(exc)} | "
-                f"ID: {request_id}",
+                f"Unhandled Exception: {method} {path} | Error: {str(exc)}",
+                extra={"method": method, "path": path, "status": 500},
                 exc_info=True
             )
-            return JSONResponse(
+            if status_code is not None:
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal Server Error", "request_id": request_id}
             )
+            return await response(scope, receive, send_wrapper)
+
+        finally:
+            duration = time.perf_counter() - start_time
+            route = getattr(scope.get("route"), "path", None)
+            record_request(method, route, status_code, duration, db_stats)
+            report_repeated_queries(db_stats, method, route or path, logger)
+            self._log_request(scope, method, path, status_code, duration, db_stats)
+            request_query_stats.reset(db_stats_token)
+            request_id_var.reset(token)
+
+    @staticmethod
+    def _log_request(scope, method, path, status_code, duration, db_stats):
+        duration_ms = duration * 1000
+        if (
+            status_code is not None and status_code < 400
+            and duration_ms < LOG_SLOW_REQUEST_MS
+            and LOG_SUCCESS_SAMPLE_RATE < 1.0
+            and random.random() >= LOG_SUCCESS_SAMPLE_RATE
+        ):
+            return
+        route = scope.get("route")
+        logger.info(
+            "Request: %s %s | Status: %s | Duration: %.4fs",
+            method, path, status_code, duration,
+            extra={
+                "method": method,
+                "path": path,
+                # Template ("/patients/{patient_id}/chart") groups requests regardless of ids
+                "route": getattr(route, "path", None),
+                "status": status_code,
+                "duration_ms": round(duration_ms, 2),
+                "db_queries": db_stats.queries,
+                "db_ms": round(db_stats.seconds * 1000, 2),
+            },
+        )
+
+
+class RequestBodyTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Request body too large")
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than `max_body_size` bytes.
+
+    A declared Content-Length over the limit is answered with 413 before the
+    app runs. Otherwise the body is counted as it is received, so chunked
+    uploads without a Content-Length are cut off at the limit too: reading
+    past it raises RequestBodyTooLarge, which FastAPI turns into a 413.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    too_large = int(value) > self.max_body_size
+                except ValueError:
+                    too_large = False
+                if too_large:
+                    return await self._reject(scope, receive, send)
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise RequestBodyTooLarge()
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, send_wrapper)
+        except RequestBodyTooLarge:
+            # Raised somewhere FastAPI's exception handling does not reach (e.g. another middleware)
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope, receive, send):
+        response = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": "Request body too large"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Rows are ordered by `(created_at DESC, id DESC)`; the cursor is an opaque,
+URL-safe token encoding the last row of the previous page. Each page is a
+single index range scan on the `(…, created_at)` indexes no matter how deep
+the client pages, and inserts between requests do not shift results.
+
+List endpoints return the page as a plain JSON list (unchanged for existing
+clients) and put the cursor for the following page in the `X-Next-Cursor`
+response header; it is absent on the last page.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Response
+from sqlalchemy import tuple_
+
+from .exceptions import BadRequestException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+class Page(list):
+    """A list of rows that also knows the cursor of the next page."""
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError):
+        raise BadRequestException("Invalid pagination cursor")
+
+
+def keyset(stmt, model, cursor: Optional[str], limit: int):
+    """
+    Apply keyset ordering/filtering to a `Query` or `Select` over `model`.
+
+    One extra row is requested so `to_page` can tell whether another page exists.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def to_page(rows, limit: int) -> Page:
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = list(rows)
+    if len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(last.created_at, last.id))
+
+
+def paginate(query, model, cursor: Optional[str] = None, limit: int = 100) -> Page:
+    """Run a sync ORM `Query` with keyset pagination."""
+    return to_page(keyset(query, model, cursor, limit).all(), limit)
+
+
+def set_next_cursor(response: Response, page) -> None:
+    next_cursor = getattr(page, "next_cursor", None)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,96 @@
+"""
+Dedicated, bounded thread pool for bcrypt work.
+
+bcrypt is deliberately slow (~250ms at cost 12). Running it on FastAPI's shared
+threadpool lets a burst of logins occupy every thread and stall unrelated sync
+routes; running it on the event loop stalls everything. Hashing and
+verification therefore go through `HASHING_POOL`, which has its own threads
+and admits at most PASSWORD_HASH_MAX_PENDING jobs (running + waiting). Beyond
+that callers get a 503 rather than an ever-growing queue.
+
+    PASSWORD_HASH_WORKERS      threads doing bcrypt (default: CPU count)
+    PASSWORD_HASH_MAX_PENDING  running + queued jobs allowed (default 16 x workers)
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import ServiceUnavailableException
+
+
+class HashingPool:
+    """ThreadPoolExecutor with admission control and queue-depth telemetry."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.max_queued_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.run_time_total = 0.0
+
+    def _admit(self):
+        with self._lock:
+            if self.running + self.queued >= self.max_pending:
+                self.rejected += 1
+                raise ServiceUnavailableException("Too many concurrent sign-ins, please retry shortly")
+            self.queued += 1
+            self.max_queued_seen = max(self.max_queued_seen, self.queued)
+
+    def _run(self, submitted_at, fn, args):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            waited = started - submitted_at
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_time_total += time.perf_counter() - started
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` on the hashing threads without blocking the event loop."""
+        self._admit()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, time.perf_counter(), fn, args)
+
+    def run_sync(self, fn, *args):
+        """Same as `run` for callers already on a worker thread (sync routes, scripts)."""
+        self._admit()
+        return self._executor.submit(self._run, time.perf_counter(), fn, args).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self.running,
+                "queued": self.queued,
+                "max_queued_seen": self.max_queued_seen,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_avg_ms": round(self.wait_time_total / done * 1000, 2),
+                "queue_wait_max_ms": round(self.wait_time_max * 1000, 2),
+                "hash_time_avg_ms": round(self.run_time_total / done * 1000, 2),
+            }
+
+
+_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or (os.cpu_count() or 2)
+HASHING_POOL = HashingPool(
+    workers=_WORKERS,
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0")) or _WORKERS * 16,
+)
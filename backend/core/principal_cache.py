@@ -0,0 +1,86 @@
+"""
+Cache of authenticated principals used by `routers.auth.get_current_user`.
+
+Entries are detached `User` rows with their doctor/researcher/patient profiles
+already loaded, keyed by user id. They are dropped automatically when a
+session commits a change to a user or one of its profiles, wherever that
+change is made (crud, services or routers).
+
+    PRINCIPAL_CACHE_TTL    seconds an entry may be reused (default 60)
+    PRINCIPAL_CACHE_SIZE   entries kept per worker (default 2048)
+
+An entry is stored with the user's generation read *before* it was loaded,
+and `get_cached_principal` ignores it once the generation has moved on, so a
+change that commits while the user is being loaded is never served from the
+cache. Other workers only notice a change once their entry expires, so the TTL is
+the upper bound on how stale a role or profile can be.
+"""
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+
+PRINCIPAL_CACHE = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+)
+
+_PENDING_KEY = "principal_invalidations"
+
+# Bumped on every invalidation, the same scheme as activity_cache
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def principal_generation(user_id):
+    return _generations.get(str(user_id), 0)
+
+
+def get_cached_principal(user_id):
+    entry = PRINCIPAL_CACHE.get(str(user_id))
+    if entry is None:
+        return None
+    generation, user = entry
+    if generation != principal_generation(user_id):
+        return None
+    return user
+
+
+def cache_principal(user_id, generation, user) -> None:
+    PRINCIPAL_CACHE.set(str(user_id), (generation, user))
+
+
+def invalidate_principal(user_id) -> None:
+    with _generations_lock:
+        _generations[str(user_id)] = principal_generation(user_id) + 1
+    PRINCIPAL_CACHE.pop(str(user_id))
+
+
+def _affected_user_id(instance):
+    from .. import models
+
+    if isinstance(instance, models.User):
+        return instance.id
+    if isinstance(instance, (models.Doctor, models.Researcher, models.PatientProfile)):
+        return instance.user_id
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        user_id = _affected_user_id(instance)
+        if user_id is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(str(user_id))
+
+
+# Also on rollback: a savepoint rollback may sit inside a transaction that later commits,
+# and an extra cache miss is cheaper than serving a stale principal.
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _apply_principal_invalidations(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(user_id)
@@ -0,0 +1,197 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when either:
+
+  * it asks for it with an `X-Profile: 1` header or `?profile=1`, and is
+    allowed to: it sends `X-Profile-Secret` equal to PROFILER_SECRET, or its
+    bearer token carries a role listed in PROFILER_ROLES. Unauthorized asks are
+    ignored silently. The response carries `X-Profile-Id` (the request id).
+  * it is picked by PROFILE_SAMPLE_RATE. Such a profile is kept only when the
+    request took at least PROFILE_SLOW_MS, so routine traffic leaves nothing
+    behind and slow routes accumulate profiles on their own.
+
+The profiler samples the Python stacks of the process every
+PROFILE_INTERVAL_MS while the request runs (event loop and threadpool threads
+alike, so sync routes are covered) and writes them in the collapsed-stack
+format used by flamegraph.pl and speedscope to
+`<LOG_DIR>/profiles/<timestamp>-<request_id>.folded`. Requests running
+concurrently on the same worker show up in the same samples.
+
+    PROFILER_SECRET       shared secret for X-Profile-Secret (unset: secret disabled)
+    PROFILER_ROLES        comma-separated token roles allowed to ask (default none)
+    PROFILE_SAMPLE_RATE   fraction of requests profiled automatically (default 0)
+    PROFILE_SLOW_MS       keep automatic profiles of requests at least this slow (default 1000)
+    PROFILE_INTERVAL_MS   sampling interval (default 5)
+    PROFILE_MAX_ACTIVE    profiles running at once per worker (default 2)
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+from .logger import LOG_DIR, logger
+
+PROFILER_SECRET = os.getenv("PROFILER_SECRET") or None
+PROFILER_ROLES = {role.strip() for role in os.getenv("PROFILER_ROLES", "").split(",") if role.strip()}
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_ACTIVE = int(os.getenv("PROFILE_MAX_ACTIVE", "2"))
+
+PROFILE_DIR = LOG_DIR / "profiles"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Leaf frames of threads that are parked waiting for work (idle threadpool workers, log writer)
+_IDLE_LEAVES = {("threading.py", "wait"), ("queue.py", "get")}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Collects collapsed stacks of every other thread until `stop()` is called."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                leaf = frame.f_code
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+
+    def write(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+def _header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _role_allowed(authorization) -> bool:
+    if not PROFILER_ROLES or not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    from jose import JWTError, jwt
+    from ..auth import ALGORITHM, SECRET_KEY
+
+    try:
+        claims = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return claims.get("role") in PROFILER_ROLES
+
+
+def profile_requested(scope) -> bool:
+    """True when the request asks to be profiled and is authorized to."""
+    asked = _header(scope, b"x-profile") in ("1", "true")
+    if not asked and b"profile" in scope.get("query_string", b""):
+        asked = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [""])[0] in ("1", "true")
+    if not asked:
+        return False
+    secret = _header(scope, b"x-profile-secret")
+    if PROFILER_SECRET and secret and hmac.compare_digest(secret, PROFILER_SECRET):
+        return True
+    return _role_allowed(_header(scope, b"authorization"))
+
+
+class ProfilerMiddleware:
+    """Runs a StackSampler around requests picked by `profile_requested` or PROFILE_SAMPLE_RATE."""
+
+    def __init__(self, app):
+        self.app = app
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self, explicit: bool) -> bool:
+        with self._lock:
+            # Explicit asks always run; automatic ones give way when the worker is already profiling
+            if not explicit and self._active >= PROFILE_MAX_ACTIVE:
+                return False
+            self._active += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        explicit = profile_requested(scope)
+        automatic = not explicit and PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+        if not (explicit or automatic) or not self._acquire(explicit):
+            return await self.app(scope, receive, send)
+
+        request_id = scope.get("state", {}).get("request_id") or f"{time.time_ns():x}"
+
+        async def send_wrapper(message):
+            if explicit and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), request_id.encode())
+                ]
+            await send(message)
+
+        sampler = StackSampler(PROFILE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self._release()
+            sampler.stop()
+            if explicit or duration_ms >= PROFILE_SLOW_MS:
+                # Joining the sampler and writing the file both block; keep them off the event loop
+                threading.Thread(
+                    target=self._write, args=(sampler, scope, request_id, duration_ms),
+                    name="request-profiler-writer", daemon=True,
+                ).start()
+
+    @staticmethod
+    def _write(sampler, scope, request_id, duration_ms):
+        sampler.join()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = PROFILE_DIR / f"{stamp}-{request_id}.folded"
+        try:
+            sampler.write(path)
+        except OSError as exc:
+            logger.warning("Could not write profile %s: %s", path, exc)
+            return
+        route = getattr(scope.get("route"), "path", None)
+        logger.info(
+            "Profile written: %s %s -> %s", scope["method"], route or scope["path"], path,
+            extra={"request_id": request_id, "route": route, "duration_ms": round(duration_ms, 2), "profile": str(path),
+                   "samples": sum(sampler.samples.values())},
+        )
@@ -0,0 +1,107 @@
+"""
+Per-request SQL accounting and N+1 detection.
+
+GlobalExceptionHandlerMiddleware puts a `RequestQueryStats` on the
+`request_query_stats` ContextVar for every HTTP request; the cursor listeners
+installed by `core.metrics.instrument_engine` add each statement to it. Sync
+routes run in a threadpool that copies the context, so their queries count too.
+
+Statements are grouped by shape: the SQL text SQLAlchemy sends, which already
+has bound parameters as placeholders, with expanded IN lists collapsed. When
+one shape runs N_PLUS_ONE_THRESHOLD times or more in a single request, the
+request is logged as a likely N+1 with its most repeated shapes.
+
+    N_PLUS_ONE_THRESHOLD       executions of one shape that trigger the warning (default 5)
+    QUERY_DEBUG_HEADERS        "true" adds X-DB-Query-Count / X-DB-Query-Time-Ms /
+                               X-DB-Repeated-Queries to every response (default false)
+"""
+import os
+import re
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "false").lower() in ("1", "true", "yes", "on")
+
+# Distinct shapes tracked per request; bulk ingestion must not grow this without bound
+MAX_SHAPES = 256
+# Shapes listed in the N+1 warning
+REPORTED_SHAPES = 3
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+REPEATED_QUERIES_HEADER = "X-DB-Repeated-Queries"
+DEBUG_HEADERS = [QUERY_COUNT_HEADER, QUERY_TIME_HEADER, REPEATED_QUERIES_HEADER]
+
+_WHITESPACE = re.compile(r"\s+")
+# "IN (%(id_1_1)s, %(id_1_2)s, ...)" / "IN ($1, $2, ...)" -> "IN (...)" so batch sizes share a shape
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%\(\w+\)s|\$\d+|\?|:\w+)\s*,?)+\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("IN (...)", shape)
+
+
+class RequestQueryStats:
+    """Statements executed while handling one request, totalled and grouped by shape."""
+
+    __slots__ = ("request_id", "queries", "seconds", "shapes")
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id
+        self.queries = 0
+        self.seconds = 0.0
+        # shape -> [executions, seconds]
+        self.shapes = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.seconds += elapsed
+        shape = statement_shape(statement)
+        entry = self.shapes.get(shape)
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += elapsed
+        elif len(self.shapes) < MAX_SHAPES:
+            self.shapes[shape] = [1, elapsed]
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int, float]]:
+        """Shapes executed at least `threshold` times, most executions first."""
+        found = [(shape, count, seconds) for shape, (count, seconds) in self.shapes.items() if count >= threshold]
+        found.sort(key=lambda item: (item[1], item[2]), reverse=True)
+        return found
+
+    def headers(self) -> List[Tuple[bytes, bytes]]:
+        return [
+            (QUERY_COUNT_HEADER.lower().encode(), str(self.queries).encode()),
+            (QUERY_TIME_HEADER.lower().encode(), f"{self.seconds * 1000:.2f}".encode()),
+            (REPEATED_QUERIES_HEADER.lower().encode(), str(len(self.repeated())).encode()),
+        ]
+
+
+request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def report_repeated_queries(stats: RequestQueryStats, method: str, route: Optional[str], logger) -> None:
+    """Log the most repeated statement shapes of a request that looks like an N+1."""
+    repeated = stats.repeated()
+    if not repeated:
+        return
+    worst = [
+        {"count": count, "total_ms": round(seconds * 1000, 2), "statement": shape[:300]}
+        for shape, count, seconds in repeated[:REPORTED_SHAPES]
+    ]
+    logger.warning(
+        "Possible N+1: %s %s ran %d statements, %d shape(s) repeated >= %d times",
+        method, route, stats.queries, len(repeated), N_PLUS_ONE_THRESHOLD,
+        extra={
+            "method": method,
+            "route": route,
+            "db_queries": stats.queries,
+            "db_ms": round(stats.seconds * 1000, 2),
+            "repeated_queries": worst,
+        },
+    )
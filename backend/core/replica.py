@@ -0,0 +1,179 @@
+"""
+Read-replica routing for read-only route dependencies.
+
+When DATABASE_REPLICA_URL is set, `get_read_db` / `get_async_read_db` in
+database.py hand out sessions bound to the replica instead of the primary.
+A read goes to the primary instead when:
+
+  * the replica's replay lag is above REPLICA_MAX_LAG_SECONDS, or the lag
+    check itself failed (replica down or unreachable);
+  * the same client made a successful write within the last
+    REPLICA_STICKY_SECONDS, so it can read its own writes.
+
+    DATABASE_REPLICA_URL        replica DSN; routing is off when unset
+    REPLICA_MAX_LAG_SECONDS     highest acceptable replay lag (default 5)
+    REPLICA_LAG_CHECK_INTERVAL  seconds a lag measurement is reused (default 2)
+    REPLICA_STICKY_SECONDS      read-your-writes window (default 10)
+
+Replica pool sizing uses the DB_REPLICA_* variants of the DB_* pool settings.
+Sessions from the read dependencies refuse to flush, so a route that writes
+fails loudly instead of silently writing through a read-only path.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+READ_ONLY_KEY = "read_only"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Zero when caught up (or not a standby); otherwise seconds since the last replayed transaction
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class ReplicaMonitor:
+    """Cached replica lag measurement plus routing counters."""
+
+    def __init__(self, max_lag: float = MAX_LAG_SECONDS, interval: float = LAG_CHECK_INTERVAL):
+        self.max_lag = max_lag
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at = 0.0
+        self.replica_reads = 0
+        self.lag_fallbacks = 0
+        self.sticky_fallbacks = 0
+
+    def needs_check(self) -> bool:
+        return time.monotonic() - self.checked_at >= self.interval
+
+    def record(self, lag: Optional[float], error: Optional[str] = None):
+        with self._lock:
+            self.lag_seconds = lag
+            self.last_error = error
+            self.checked_at = time.monotonic()
+
+    def check(self, engine):
+        """Measure lag with a sync engine, at most once per interval."""
+        if not self.needs_check():
+            return
+        try:
+            with engine.connect() as connection:
+                self.record(float(connection.execute(LAG_QUERY).scalar() or 0))
+        except Exception as exc:
+            self.record(None, str(exc))
+
+    async def check_async(self, engine):
+        """Measure lag with an async engine, at most once per interval."""
+        if not self.needs_check():
+            return
+        try:
+            async with engine.connect() as connection:
+                self.record(float((await connection.execute(LAG_QUERY)).scalar() or 0))
+        except Exception as exc:
+            self.record(None, str(exc))
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag
+
+    def choose_replica(self, client_key: Optional[str]) -> bool:
+        """Decide (and count) whether this read may be served by the replica."""
+        with self._lock:
+            if client_key and WRITES.wrote_recently(client_key):
+                self.sticky_fallbacks += 1
+                return False
+            if not self.healthy:
+                self.lag_fallbacks += 1
+                return False
+            self.replica_reads += 1
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+                "max_lag_seconds": self.max_lag,
+                "healthy": self.healthy,
+                "last_error": self.last_error,
+                "checked_seconds_ago": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+                "replica_reads": self.replica_reads,
+                "lag_fallbacks": self.lag_fallbacks,
+                "sticky_fallbacks": self.sticky_fallbacks,
+            }
+
+
+class RecentWrites:
+    """Clients (by hashed credentials) that wrote within the sticky window."""
+
+    def __init__(self, window: float = STICKY_SECONDS, max_entries: int = 10_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._written_at = {}
+
+    def mark(self, client_key: str):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._written_at) >= self.max_entries:
+                cutoff = now - self.window
+                self._written_at = {k: t for k, t in self._written_at.items() if t > cutoff}
+            self._written_at[client_key] = now
+
+    def wrote_recently(self, client_key: str) -> bool:
+        written_at = self._written_at.get(client_key)
+        return written_at is not None and time.monotonic() - written_at < self.window
+
+
+MONITOR = ReplicaMonitor()
+WRITES = RecentWrites()
+
+
+def client_key(headers) -> Optional[str]:
+    """Identify a client by its Authorization header without keeping the token itself."""
+    auth = headers.get("authorization")
+    if not auth:
+        return None
+    return hashlib.sha256(auth.encode()).hexdigest()[:32]
+
+
+class ReadYourWritesMiddleware:
+    """Remember clients whose unsafe requests succeeded, so their next reads use the primary."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            return await self.app(scope, receive, send)
+
+        key = client_key({k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]})
+
+        async def send_wrapper(message):
+            if key and message["type"] == "http.response.start" and message["status"] < 400:
+                WRITES.mark(key)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_read_only_flush(session, flush_context, instances):
+    if session.info.get(READ_ONLY_KEY) and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("Write attempted on a read-only (replica-routed) session")
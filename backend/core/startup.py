@@ -0,0 +1,57 @@
+"""
+Cold-start timings for this worker.
+
+`main.py` records how long importing the application took, and the lifespan
+handler wraps each start-up step in `STARTUP.phase(...)`. The result is
+served at GET /system/startup; `python -m backend.startup_report` measures
+the same numbers from a fresh interpreter, broken down by imported package.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class StartupReport:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.import_seconds: Optional[float] = None
+        self.phases = []
+        self.ready_at: Optional[float] = None
+
+    def record_import(self, seconds: float) -> None:
+        self.import_seconds = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            with self._lock:
+                self.phases.append({
+                    "phase": name,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    **({"error": error} if error else {}),
+                })
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            phases = list(self.phases)
+        startup_ms = sum(p["duration_ms"] for p in phases)
+        return {
+            "import_ms": round(self.import_seconds * 1000, 1) if self.import_seconds is not None else None,
+            "startup_ms": round(startup_ms, 1),
+            "phases": phases,
+            "ready": self.ready_at is not None,
+        }
+
+
+STARTUP = StartupReport()
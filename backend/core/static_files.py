@@ -0,0 +1,159 @@
+"""
+Cache-aware static files for the /uploads and /static mounts.
+
+`CachedStaticFiles` is Starlette's StaticFiles with HTTP caching filled in:
+
+  * content-addressed blobs (`blobs/<aa>/<sha256>.<ext>`, services/storage.py)
+    and their derivatives (`<sha256>.thumb.jpg`, services/derivatives.py) get
+    an ETag built from the SHA-256, the same on every node, and are cached for
+    a year as `immutable`: the bytes behind such a name never change
+  * every other file is cached but revalidated on each use (`no-cache`), which
+    costs a 304 without a body while the file is unchanged
+  * If-None-Match / If-Modified-Since answer 304, and Range / If-Range requests
+    get 206 partial content (Starlette's FileResponse), so video can be seeked
+  * a `<file>.br` or `<file>.gz` next to a file is served instead of it, with
+    Content-Encoding, to clients that accept that encoding. Create them with
+    `python -m backend.core.static_files <dir>`; a variant older than its
+    file is ignored
+  * names with a component starting with "." are never served, which keeps
+    the upload staging directory (backend/static/.staging) private
+
+    STATIC_CACHE_SCOPE    private (default) | public. Uploads are medical
+                          documents, so shared caches may not store them unless
+                          this is set to public
+"""
+import gzip
+import mimetypes
+import os
+import re
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+CACHE_SCOPE = "public" if os.getenv("STATIC_CACHE_SCOPE", "private").lower() == "public" else "private"
+IMMUTABLE_CACHE_CONTROL = f"{CACHE_SCOPE}, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = f"{CACHE_SCOPE}, no-cache"
+
+# Preferred first; `precompress` writes the same set
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_TYPES = {"application/json", "application/javascript", "application/xml", "image/svg+xml"}
+MIN_COMPRESS_BYTES = 1024
+
+_BLOB_PATH = re.compile(
+    r"(?:^|/)blobs/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?P<derivative>\.[a-z]+(?=\.[A-Za-z0-9]+$))?(?:\.[A-Za-z0-9]+)?$"
+)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope) -> Response:
+        if any(part.startswith(".") for part in Path(path).parts):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        blob = _BLOB_PATH.search(full_path.replace(os.sep, "/"))
+        headers = {"cache-control": IMMUTABLE_CACHE_CONTROL if blob else REVALIDATE_CACHE_CONTROL}
+        if blob:
+            headers["etag"] = f'"{blob["sha256"]}{blob["derivative"] or ""}"'
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+
+        variants = self._variants(full_path, stat_result) if status_code == 200 else []
+        if variants:
+            headers["vary"] = "Accept-Encoding"
+        # A byte range always refers to the file itself, never to a compressed copy
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", "")) if "range" not in request_headers else set()
+        variant = next((v for v in variants if v[0] in accepted), None)
+
+        if variant is None:
+            response = FileResponse(full_path, status_code=status_code, headers=headers,
+                                    media_type=media_type, stat_result=stat_result)
+        else:
+            encoding, variant_path, variant_stat = variant
+            headers["content-encoding"] = encoding
+            response = FileResponse(variant_path, status_code=status_code, headers=headers,
+                                    media_type=media_type, stat_result=variant_stat)
+            # Each representation needs its own strong validator
+            response.headers["etag"] = f'{response.headers["etag"][:-1]}-{encoding}"'
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _variants(full_path: str, stat_result: os.stat_result) -> list:
+        """(encoding, path, stat) for each precompressed copy at least as new as the file."""
+        found = []
+        for encoding, suffix in ENCODINGS:
+            try:
+                variant_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if variant_stat.st_mtime >= stat_result.st_mtime:
+                found.append((encoding, full_path + suffix, variant_stat))
+        return found
+
+
+def _compressible(path: Path) -> bool:
+    media_type = mimetypes.guess_type(path.name)[0] or ""
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def _write_atomic(destination: Path, data: bytes) -> None:
+    partial = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+    partial.write_bytes(data)
+    shutil.copystat(destination.with_suffix(""), partial)
+    os.replace(partial, destination)
+
+
+def precompress(root: Path) -> int:
+    """Write .gz (and .br, when the `brotli` package is installed) copies of text-like files under `root`."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    written = 0
+    for path in root.rglob("*"):
+        relative = path.relative_to(root)
+        if (not path.is_file() or path.suffix in (".gz", ".br") or not _compressible(path)
+                or any(part.startswith(".") for part in relative.parts)):
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_BYTES:
+            continue
+        compressors = [(".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compressors.append((".br", lambda raw: brotli.compress(raw, quality=11)))
+        for suffix, compress in compressors:
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            compressed = compress(data)
+            # Not worth a second representation unless it saves a tenth
+            if len(compressed) <= len(data) * 0.9:
+                _write_atomic(target, compressed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    target_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent / "static"
+    print(f"wrote {precompress(target_dir)} precompressed files under {target_dir}")
@@ -1,214 +1,439 @@
-import uuid
+"""
+Streaming, seeded mock data generator for load and index testing.
+
+Generates doctors and patients with their visits, lab results, prescriptions,
+allergies, insurance policies, claims and appointments, and writes one file
+per table as it goes. Each patient's rows are produced and written before the
+next patient starts, so memory stays flat whether you ask for a thousand
+patients or several million. The same --seed and --end-date always give the
+same data.
+
+    python -m backend.generate_mock_data --patients 1000000 --out mock_data
+    python -m backend.generate_mock_data --patients 50000 --format parquet --seed 7
+
+Output (in --out):
+
+    <table>.csv    COPY-ready CSV with a header row (--format copy, default)
+    <table>.parquet                                  (--format parquet, needs pyarrow)
+    load.sql       psql script that \\copy-loads the CSV files in foreign-key order
+    manifest.json  row counts and the arguments used
+
+    cd mock_data && psql "$DATABASE_URL" -f load.sql
+
+Distributions are chosen to look like production data to the planner:
+visits and appointments per patient are over-dispersed (gamma-Poisson,
+a few patients have many), doctors have skewed patient panels, chronic
+conditions become more likely with age and drive diagnoses, lab values and
+prescriptions, and each patient's lab values drift over time around a
+personal baseline. All accounts use the password "secret".
+"""
+import argparse
+import csv
+import json
+import math
 import random
-from datetime import datetime, timedelta
+import time
+import uuid
+from bisect import bisect_left
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+
+SCHEMA = "medical"
+PASSWORD_HASH = "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"  # "secret"
+PATIENTS_PER_DOCTOR = 200
+PARQUET_ROW_GROUP = 100_000
+
+# table -> [(column, type)], in load (foreign-key) order
+TABLES = {
+    "users": [
+        ("id", "uuid"), ("email", "str"), ("full_name", "str"), ("role", "str"), ("date_of_birth", "date"),
+        ("phone", "str"), ("blood_type", "str"), ("height_cm", "float"), ("weight_kg", "float"),
+        ("hashed_password", "str"), ("is_verified", "bool"), ("hospital_name", "str"), ("hospital_state", "str"),
+        ("hospital_city", "str"), ("created_at", "ts"),
+    ],
+    "doctors": [
+        ("id", "uuid"), ("user_id", "uuid"), ("specialty", "str"), ("license_number", "str"),
+        ("years_of_experience", "int"), ("hospital_name", "str"), ("hospital_state", "str"), ("hospital_city", "str"),
+    ],
+    "insurance_policies": [
+        ("id", "uuid"), ("user_id", "uuid"), ("policy_number", "str"), ("insurance_company", "str"),
+        ("policy_type", "str"), ("coverage_start", "date"), ("coverage_end", "date"), ("premium_amount", "float"),
+        ("deductible_amount", "float"), ("deductible_met", "float"), ("is_active", "bool"), ("created_at", "ts"),
+    ],
+    "hospital_visits": [
+        ("id", "uuid"), ("user_id", "uuid"), ("hospital_name", "str"), ("department", "str"),
+        ("admission_date", "ts"), ("discharge_date", "ts"), ("visit_type", "str"), ("primary_doctor", "str"),
+        ("diagnosis", "str"), ("cost", "float"), ("insurance_claim_status", "str"), ("created_at", "ts"),
+    ],
+    "lab_results": [
+        ("id", "uuid"), ("user_id", "uuid"), ("visit_id", "uuid"), ("test_name", "str"), ("test_category", "str"),
+        ("result_value", "str"), ("result_unit", "str"), ("reference_range", "str"), ("status", "str"),
+        ("test_date", "ts"), ("ordering_doctor", "str"), ("lab_facility", "str"), ("created_at", "ts"),
+    ],
+    "prescriptions": [
+        ("id", "uuid"), ("user_id", "uuid"), ("visit_id", "uuid"), ("drug_name", "str"), ("dosage", "str"),
+        ("frequency", "str"), ("start_date", "date"), ("end_date", "date"), ("refills_remaining", "int"),
+        ("prescribing_doctor", "str"), ("doctor_id", "uuid"), ("status", "str"), ("created_at", "ts"),
+    ],
+    "allergies": [
+        ("id", "uuid"), ("user_id", "uuid"), ("allergen_name", "str"), ("allergen_type", "str"), ("severity", "str"),
+        ("reaction_symptoms", "str"), ("first_observed", "date"), ("created_at", "ts"),
+    ],
+    "claims": [
+        ("id", "uuid"), ("user_id", "uuid"), ("policy_id", "uuid"), ("visit_id", "uuid"), ("claim_number", "str"),
+        ("claim_amount", "float"), ("approved_amount", "float"), ("status", "str"), ("submission_date", "date"),
+        ("processed_date", "date"), ("reason_for_claim", "str"), ("created_at", "ts"),
+    ],
+    "appointments": [
+        ("id", "uuid"), ("user_id", "uuid"), ("doctor_name", "str"), ("doctor_id", "uuid"), ("specialty", "str"),
+        ("hospital_clinic", "str"), ("consultation_mode", "str"), ("appointment_date", "ts"),
+        ("appointment_type", "str"), ("reason", "str"), ("status", "str"), ("created_at", "ts"),
+    ],
+}
+
+FIRST_NAMES = ["Aarav", "Kavya", "Rohan", "Meera", "Vivaan", "Ananya", "Ishaan", "Sanya", "Dhruv", "Nisha",
+               "Arjun", "Pooja", "Krish", "Tanya", "Laksh", "Riya", "Yash", "Sneha", "Aditya", "Simran"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Reddy", "Nair", "Gupta", "Singh", "Patel", "Das", "Menon"]
+CITIES = [("Mumbai", "Maharashtra"), ("Pune", "Maharashtra"), ("Delhi", "Delhi"), ("Bengaluru", "Karnataka"),
+          ("Chennai", "Tamil Nadu"), ("Hyderabad", "Telangana"), ("Kolkata", "West Bengal"), ("Jaipur", "Rajasthan"),
+          ("Kochi", "Kerala"), ("Ahmedabad", "Gujarat")]
+HOSPITALS = [(f"{city} {kind} Hospital", city, state)
+             for city, state in CITIES for kind in ("City", "General", "Care", "Apollo", "Medicare")]
+SPECIALTIES = ["General Medicine", "Cardiology", "Endocrinology", "Neurology", "Orthopedics", "Pediatrics", "Pulmonology"]
+BLOOD_TYPES = (["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-"], [37, 22, 32, 6, 1, 1, 1, 0.5])
+VISIT_TYPES = (["Outpatient", "Follow-up", "Emergency", "Inpatient"], [60, 20, 12, 8])
+INSURERS = ["Star Health", "HDFC Ergo", "ICICI Lombard", "Niva Bupa", "Care Health"]
+ACUTE = [("Viral Fever", "Paracetamol", "500 mg"), ("Upper Respiratory Infection", "Amoxicillin", "500 mg"),
+         ("Gastroenteritis", "Ondansetron", "4 mg"), ("Sprain", "Ibuprofen", "400 mg"), ("Allergic Rhinitis", "Cetirizine", "10 mg")]
+ALLERGENS = [("Penicillin", "Drug"), ("Sulfa Drugs", "Drug"), ("Peanuts", "Food"), ("Shellfish", "Food"),
+             ("Dust Mites", "Environmental"), ("Pollen", "Environmental"), ("Latex", "Other")]
 
-# Names provided
-names = [
-    "Aarav", "Kavya", "Rohan", "Meera", "Vivaan", "Ananya", "Ishaan", "Sanya", 
-    "Dhruv", "Nisha", "Arjun", "Pooja", "Krish", "Tanya", "Laksh", "Riya", 
-    "Yash", "Sneha", "Aditya", "Simran"
+# condition -> (diagnosis, drug, dosage, onset probability per year of age over 30)
+CONDITIONS = {
+    "diabetes": ("Type 2 Diabetes Mellitus", "Metformin", "500 mg", 0.004),
+    "hypertension": ("Essential Hypertension", "Amlodipine", "5 mg", 0.006),
+    "hyperlipidemia": ("Hyperlipidemia", "Atorvastatin", "20 mg", 0.005),
+    "hypothyroidism": ("Hypothyroidism", "Levothyroxine", "50 mcg", 0.002),
+}
+
+# name, category, unit, normal low/high, population mean/sd, yearly drift sd, visit noise sd, decimals,
+# and how a condition shifts the baseline
+LAB_TESTS = [
+    ("HbA1c", "Biochemistry", "%", 4.0, 5.6, 5.3, 0.4, 0.15, 0.2, 1, {"diabetes": 2.4}),
+    ("Fasting Glucose", "Biochemistry", "mg/dL", 70, 99, 92, 9, 2.0, 8, 0, {"diabetes": 55}),
+    ("LDL Cholesterol", "Lipid Panel", "mg/dL", 0, 129, 112, 28, 4.0, 10, 0, {"hyperlipidemia": 55}),
+    ("Hemoglobin", "Hematology", "g/dL", 12.0, 17.5, 14.2, 1.3, 0.1, 0.5, 1, {}),
+    ("TSH", "Endocrinology", "mIU/L", 0.4, 4.0, 2.0, 0.8, 0.1, 0.4, 2, {"hypothyroidism": 5.0}),
+    ("Creatinine", "Renal", "mg/dL", 0.6, 1.3, 0.95, 0.18, 0.02, 0.08, 2, {"hypertension": 0.2}),
 ]
 
-# Generate fixed UUIDs
-users = []
-for name in names:
-    users.append({
-        "id": str(uuid.uuid4()),
-        "name": name,
-        "email": f"{name.lower()}@example.com",
-        "role": "patient" # default
-    })
-
-# Assign Roles
-# Doctors: Aarav (0), Kavya (1)
-users[0]["role"] = "doctor"
-users[1]["role"] = "doctor"
-
-# Researchers: Rohan (2), Meera (3)
-users[2]["role"] = "researcher"
-users[3]["role"] = "researcher"
-
-# Rest are patients (4-19)
-patients = users[4:]
-doctors = users[:2]
-
-sql_statements = []
-
-# 1. USERS
-sql_statements.append("-- 1. INSERT USERS")
-password_hash = "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW" # "secret"
-for u in users:
-    sql_statements.append(
-        f"INSERT INTO medical.users (id, email, full_name, role, hashed_password, is_verified) "
-        f"VALUES ('{u['id']}', '{u['email']}', '{u['name']}', '{u['role']}', '{password_hash}', true);"
-    )
-
-# 2. DOCTORS
-sql_statements.append("\n-- 2. INSERT DOCTORS")
-specialties = ["Cardiology", "Neurology", "General Medicine"]
-for i, d in enumerate(doctors):
-    sql_statements.append(
-        f"INSERT INTO medical.doctors (id, user_id, specialty, years_of_experience, hospital_name) "
-        f"VALUES ('{str(uuid.uuid4())}', '{d['id']}', '{specialties[i]}', {10+i}, 'City Hospital');"
-    )
-
-# 3. RESEARCHERS
-sql_statements.append("\n-- 3. INSERT RESEARCHERS")
-for i, r in enumerate(users[2:4]):
-    sql_statements.append(
-        f"INSERT INTO medical.researchers (id, user_id, institution, field_of_study) "
-        f"VALUES ('{str(uuid.uuid4())}', '{r['id']}', 'Medical Research Inst', 'Epidemiology');"
-    )
-
-# 4. HOSPITAL VISITS (10 rows)
-sql_statements.append("\n-- 4. INSERT HOSPITAL VISITS")
-visit_ids = []
-for i in range(10):
-    p = random.choice(patients)
-    v_id = str(uuid.uuid4())
-    visit_ids.append(v_id)
-    doc = random.choice(doctors)
-    sql_statements.append(
-        f"INSERT INTO medical.hospital_visits (id, user_id, hospital_name, diagnosis, primary_doctor, admission_date, visit_type) "
-        f"VALUES ('{v_id}', '{p['id']}', 'City Hospital', 'Viral Fever', '{doc['name']}', NOW() - INTERVAL '{random.randint(1,30)} days', 'OPD');"
-    )
-
-# 5. APPOINTMENTS (10 rows)
-sql_statements.append("\n-- 5. INSERT APPOINTMENTS")
-for i in range(10):
-    p = random.choice(patients)
-    doc = random.choice(doctors)
-    sql_statements.append(
-        f"INSERT INTO medical.appointments (id, user_id, doctor_name, specialty, appointment_date, status, hospital_clinic) "
-        f"VALUES ('{str(uuid.uuid4())}', '{p['id']}', '{doc['name']}', 'General', NOW() + INTERVAL '{random.randint(1,7)} days', 'Scheduled', 'City Hospital');"
-    )
-
-# 6. ALLERGIES (10 rows)
-sql_statements.append("\n-- 6. INSERT ALLERGIES")
-allergens = ["Peanuts", "Dust", "Pollen", "Penicillin"]
-for i in range(10):
-    p = random.choice(patients)
-    sql_statements.append(
-        f"INSERT INTO medical.allergies (id, user_id, allergen_name, reaction_symptoms, severity, allergen_type, first_observed) "
-        f"VALUES ('{str(uuid.uuid4())}', '{p['id']}', '{random.choice(allergens)}', 'Rashes', 'Moderate', 'Food', '2020-01-01');"
-    )
-
-# 7. PRESCRIPTIONS (10 rows)
-sql_statements.append("\n-- 7. INSERT PRESCRIPTIONS")
-drugs = ["Paracetamol", "Amoxicillin", "Cetirizine"]
-for i in range(10):
-    v_id = visit_ids[i] # Link to visits created above
-    # Find patient for this visit? (Not strictly needed for SQL but good for consistency, 
-    # actually prescription table has user_id. We need to match valid user_id to visit_id)
-    # To keep it simple, I'll just pick a random patient again, distinct from visit might be inconsistent but OK for mock.
-    # WAIT: Foreign key constraint might not exist between visit.user_id and prescription.user_id but logic should hold.
-    # Let's just pick a random patient for now, assuming loose coupling in this mock script.
-    # BETTER: Retrieve user_id from visit... can't easily in this script without tracking.
-    # I'll update the visits loop to track (visit_id, patient_id)
-    pass 
-
-# RE-DO Visits Loop to track relationships
-visit_data = [] # (id, user_id)
-sql_statements_visits = ["\n-- 4. INSERT HOSPITAL VISITS"]
-for i in range(10):
-    p = random.choice(patients)
-    v_id = str(uuid.uuid4())
-    visit_data.append((v_id, p['id']))
-    doc = random.choice(doctors)
-    sql_statements_visits.append(
-        f"INSERT INTO medical.hospital_visits (id, user_id, hospital_name, diagnosis, primary_doctor, admission_date, visit_type) "
-        f"VALUES ('{v_id}', '{p['id']}', 'City Hospital', 'Viral Fever', '{doc['name']}', NOW() - INTERVAL '{random.randint(1,30)} days', 'OPD');"
-    )
-# Replace the placeholder list
-sql_statements[3] = "\n".join(sql_statements_visits) # Hacky replace of index logic, simpler to just rebuild list.
-
-# Let's just rebuild the full list cleanly.
-final_sql = []
-final_sql.append("-- GENERATED MOCK DATA")
-final_sql.extend(sql_statements[0:3]) # Users, Docs, Researchers already good strings list? No, they were appends.
-# My logic above was appending to `sql_statements`.
-# I will clear `sql_statements` and re-populate cleanly.
-
-final_sql = []
-
-# 1. USERS
-final_sql.append("-- 1. INSERT USERS")
-for u in users:
-    final_sql.append(
-        f"INSERT INTO medical.users (id, email, full_name, role, hashed_password, is_verified) "
-        f"VALUES ('{u['id']}', '{u['email']}', '{u['name']}', '{u['role']}', '{password_hash}', true);"
-    )
-
-# 2. DOCTORS
-final_sql.append("\n-- 2. INSERT DOCTORS")
-for i, d in enumerate(doctors):
-    final_sql.append(
-        f"INSERT INTO medical.doctors (id, user_id, specialty, years_of_experience, hospital_name) "
-        f"VALUES ('{str(uuid.uuid4())}', '{d['id']}', '{specialties[i]}', {10+i}, 'City Hospital');"
-    )
-
-# 3. RESEARCHERS
-final_sql.append("\n-- 3. INSERT RESEARCHERS")
-for i, r in enumerate(users[2:4]):
-    final_sql.append(
-        f"INSERT INTO medical.researchers (id, user_id, institution, field_of_study) "
-        f"VALUES ('{str(uuid.uuid4())}', '{r['id']}', 'Medical Research Inst', 'Epidemiology');"
-    )
-
-# 4. HOSPITAL VISITS
-final_sql.append("\n-- 4. INSERT HOSPITAL VISITS")
-visit_data = []
-for i in range(10):
-    p = random.choice(patients)
-    v_id = str(uuid.uuid4())
-    visit_data.append({'id': v_id, 'user_id': p['id']})
-    doc = random.choice(doctors)
-    final_sql.append(
-        f"INSERT INTO medical.hospital_visits (id, user_id, hospital_name, diagnosis, primary_doctor, admission_date, visit_type) "
-        f"VALUES ('{v_id}', '{p['id']}', 'City Hospital', 'Viral Fever', '{doc['name']}', NOW() - INTERVAL '{random.randint(1,30)} days', 'OPD');"
-    )
-
-# 5. APPOINTMENTS
-final_sql.append("\n-- 5. INSERT APPOINTMENTS")
-for i in range(10):
-    p = random.choice(patients)
-    doc = random.choice(doctors)
-    final_sql.append(
-        f"INSERT INTO medical.appointments (id, user_id, doctor_name, specialty, appointment_date, status, hospital_clinic) "
-        f"VALUES ('{str(uuid.uuid4())}', '{p['id']}', '{doc['name']}', 'General', NOW() + INTERVAL '{random.randint(1,7)} days', 'Scheduled', 'City Hospital');"
-    )
-
-# 6. ALLERGIES
-final_sql.append("\n-- 6. INSERT ALLERGIES")
-for i in range(10):
-    p = random.choice(patients)
-    final_sql.append(
-        f"INSERT INTO medical.allergies (id, user_id, allergen_name, reaction_symptoms, severity, allergen_type, first_observed) "
-        f"VALUES ('{str(uuid.uuid4())}', '{p['id']}', '{random.choice(allergens)}', 'Rashes', 'Moderate', 'Food', '2020-01-01');"
-    )
-
-# 7. PRESCRIPTIONS (Linked to Visits 1:1 for simplicity)
-final_sql.append("\n-- 7. INSERT PRESCRIPTIONS")
-for i in range(10):
-    v = visit_data[i]
-    final_sql.append(
-        f"INSERT INTO medical.prescriptions (id, user_id, visit_id, drug_name, dosage, frequency, start_date, refills_remaining, status, prescribing_doctor) "
-        f"VALUES ('{str(uuid.uuid4())}', '{v['user_id']}', '{v['id']}', '{random.choice(drugs)}', '500mg', 'Twice Daily', NOW()::date, 2, 'Active', 'Dr. {doctors[0]['name']}');"
-    )
-
-# 8. LAB RESULTS
-final_sql.append("\n-- 8. INSERT LAB RESULTS")
-tests = ["Blood Test", "X-Ray", "MRI"]
-for i in range(10):
-    v = visit_data[i]
-    final_sql.append(
-        f"INSERT INTO medical.lab_results (id, user_id, visit_id, test_name, test_category, result_value, status, test_date, ordering_doctor) "
-        f"VALUES ('{str(uuid.uuid4())}', '{v['user_id']}', '{v['id']}', '{random.choice(tests)}', 'Pathology', 'Normal', 'Completed', NOW(), 'Dr. {doctors[0]['name']}');"
-    )
-
-# Output
-file_path = "backend/mock_data.sql"
-with open(file_path, "w") as f:
-    f.write("\n".join(final_sql))
-
-print(f"Generated {file_path}")
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _poisson(rng, lam):
+    if lam <= 0:
+        return 0
+    if lam > 30:
+        return max(0, round(rng.gauss(lam, math.sqrt(lam))))
+    limit, k, product = math.exp(-lam), 0, rng.random()
+    while product > limit:
+        k += 1
+        product *= rng.random()
+    return k
+
+
+def _overdispersed(rng, mean, shape=1.2):
+    """Gamma-Poisson (negative binomial) count: most patients near `mean`, a long tail far above it."""
+    return _poisson(rng, rng.gammavariate(shape, mean / shape))
+
+
+def _between(rng, start, end):
+    return start + timedelta(seconds=rng.uniform(0, max(0.0, (end - start).total_seconds())))
+
+
+class MockDataGenerator:
+    """Yields (table, row) pairs; parents always come before the rows that reference them."""
+
+    def __init__(self, patients, seed=42, start=None, end=None, doctors=None):
+        self.rng = random.Random(seed)
+        self.patients = patients
+        self.end = end or datetime.combine(date.today(), dt_time.min, tzinfo=timezone.utc)
+        self.start = start or self.end - timedelta(days=5 * 365)
+        self.doctor_count = doctors or max(1, patients // PATIENTS_PER_DOCTOR)
+        self.doctors = []
+        # Skewed panel sizes: doctor k gets a share proportional to 1 / (k + 1) ** 0.8
+        self._doctor_weights = list(accumulate(1 / (k + 1) ** 0.8 for k in range(self.doctor_count)))
+
+    def rows(self):
+        yield from self._doctor_rows()
+        for n in range(self.patients):
+            yield from self._patient_rows(n)
+
+    def _name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def _doctor_rows(self):
+        rng = self.rng
+        for n in range(self.doctor_count):
+            hospital, city, state = rng.choice(HOSPITALS)
+            doctor = {"id": _uuid(rng), "name": f"Dr. {self._name()}", "specialty": rng.choice(SPECIALTIES),
+                      "hospital": hospital}
+            self.doctors.append(doctor)
+            yield "users", {
+                "id": doctor["id"], "email": f"doctor{n}@mock.local", "full_name": doctor["name"], "role": "doctor",
+                "hashed_password": PASSWORD_HASH, "is_verified": True, "hospital_name": hospital,
+                "hospital_state": state, "hospital_city": city, "created_at": _between(rng, self.start - timedelta(days=365), self.start),
+            }
+            yield "doctors", {
+                "id": _uuid(rng), "user_id": doctor["id"], "specialty": doctor["specialty"],
+                "license_number": f"MCI-{n:07d}", "years_of_experience": max(1, int(rng.gauss(14, 8))),
+                "hospital_name": hospital, "hospital_state": state, "hospital_city": city,
+            }
+
+    def _patient_rows(self, n):
+        rng = self.rng
+        doctor = self.doctors[bisect_left(self._doctor_weights, rng.random() * self._doctor_weights[-1])]
+        patient_id = _uuid(rng)
+        joined = _between(rng, self.start, self.end)
+        age = min(95, max(0, int(rng.gauss(38, 19))))
+        height = round(min(200, max(50, rng.gauss(165, 10) if age >= 18 else 60 + age * 5.5)), 1)
+        bmi = max(14, rng.gauss(24.5, 4.5))
+        conditions = [c for c, (_, _, _, per_year) in CONDITIONS.items() if rng.random() < max(0, age - 30) * per_year]
+
+        yield "users", {
+            "id": patient_id, "email": f"patient{n}@mock.local", "full_name": self._name(), "role": "patient",
+            "date_of_birth": (self.end - timedelta(days=age * 365 + rng.randint(0, 364))).date(),
+            "phone": f"9{rng.randint(100000000, 999999999)}", "blood_type": rng.choices(*BLOOD_TYPES)[0],
+            "height_cm": height, "weight_kg": round(bmi * (height / 100) ** 2, 1),
+            "hashed_password": PASSWORD_HASH, "is_verified": True, "hospital_name": doctor["hospital"],
+            "created_at": joined,
+        }
+
+        policy = None
+        if rng.random() < 0.7:
+            coverage_start = _between(rng, joined - timedelta(days=365), joined).date()
+            policy = {"id": _uuid(rng)}
+            yield "insurance_policies", {
+                "id": policy["id"], "user_id": patient_id, "policy_number": f"POL{rng.randint(10**9, 10**10 - 1)}",
+                "insurance_company": rng.choice(INSURERS), "policy_type": rng.choice(["Individual", "Family Floater"]),
+                "coverage_start": coverage_start, "coverage_end": coverage_start + timedelta(days=5 * 365),
+                "premium_amount": round(rng.uniform(6000, 40000), 2), "deductible_amount": 10000.0,
+                "deductible_met": round(rng.uniform(0, 10000), 2), "is_active": True, "created_at": joined,
+            }
+
+        for _ in range(_poisson(rng, 0.4)):
+            allergen, kind = rng.choice(ALLERGENS)
+            yield "allergies", {
+                "id": _uuid(rng), "user_id": patient_id, "allergen_name": allergen, "allergen_type": kind,
+                "severity": rng.choices(["Mild", "Moderate", "Severe"], [60, 30, 10])[0], "reaction_symptoms": "Rash, itching",
+                "first_observed": (joined - timedelta(days=rng.randint(0, 3650))).date(), "created_at": joined,
+            }
+
+        # Personal lab baselines and trends, so repeated tests of one patient form a plausible series
+        labs = []
+        for test in LAB_TESTS:
+            name, category, unit, low, high, mean, sd, drift_sd, noise_sd, decimals, shifts = test
+            baseline = rng.gauss(mean, sd) + sum(shifts.get(c, 0) for c in conditions)
+            labs.append((test, baseline, rng.gauss(0, drift_sd)))
+
+        visit_count = _overdispersed(rng, 2.0 + 1.5 * len(conditions))
+        visit_times = sorted(_between(rng, joined, self.end) for _ in range(visit_count))
+        for admitted in visit_times:
+            yield from self._visit_rows(patient_id, doctor, admitted, joined, conditions, labs, policy)
+
+        for _ in range(_overdispersed(rng, 2.0)):
+            booked = _between(rng, joined, self.end)
+            when = booked + timedelta(days=rng.randint(1, 60), hours=rng.randint(9, 17))
+            if when > self.end:
+                status = "Scheduled"
+            else:
+                status = rng.choices(["Completed", "Cancelled", "No-show"], [80, 12, 8])[0]
+            yield "appointments", {
+                "id": _uuid(rng), "user_id": patient_id, "doctor_name": doctor["name"], "doctor_id": doctor["id"],
+                "specialty": doctor["specialty"], "hospital_clinic": doctor["hospital"],
+                "consultation_mode": rng.choices(["Offline", "Online"], [75, 25])[0], "appointment_date": when,
+                "appointment_type": rng.choice(["Consultation", "Follow-up", "Check-up"]),
+                "reason": rng.choice(conditions and [CONDITIONS[c][0] for c in conditions] or [a[0] for a in ACUTE]),
+                "status": status, "created_at": booked,
+            }
+
+    def _visit_rows(self, patient_id, doctor, admitted, joined, conditions, labs, policy):
+        rng = self.rng
+        visit_type = rng.choices(*VISIT_TYPES)[0]
+        stay = timedelta(days=max(1, round(rng.lognormvariate(1.2, 0.6)))) if visit_type == "Inpatient" else timedelta(hours=rng.uniform(0.5, 6))
+        chronic = conditions and rng.random() < 0.6
+        if chronic:
+            diagnosis, drug, dosage, _ = CONDITIONS[rng.choice(conditions)]
+        else:
+            diagnosis, drug, dosage = rng.choice(ACUTE)
+        base_cost = {"Outpatient": 800, "Follow-up": 500, "Emergency": 6000, "Inpatient": 45000}[visit_type]
+        cost = round(base_cost * rng.lognormvariate(0, 0.5), 2)
+
+        claim = None
+        if policy and cost > 1000 and rng.random() < 0.85:
+            status = rng.choices(["Approved", "Pending", "Rejected"], [70, 15, 15])[0]
+            submitted = (admitted + stay + timedelta(days=rng.randint(1, 20))).date()
+            claim = {
+                "id": _uuid(rng), "user_id": patient_id, "policy_id": policy["id"], "claim_number": f"CLM{rng.randint(10**9, 10**10 - 1)}",
+                "claim_amount": cost, "approved_amount": round(cost * rng.uniform(0.6, 1.0), 2) if status == "Approved" else None,
+                "status": status, "submission_date": submitted,
+                "processed_date": submitted + timedelta(days=rng.randint(3, 45)) if status != "Pending" else None,
+                "reason_for_claim": diagnosis, "created_at": admitted + stay,
+            }
+
+        visit_id = _uuid(rng)
+        yield "hospital_visits", {
+            "id": visit_id, "user_id": patient_id, "hospital_name": doctor["hospital"],
+            "department": doctor["specialty"] if chronic else "General Medicine", "admission_date": admitted,
+            "discharge_date": admitted + stay, "visit_type": visit_type, "primary_doctor": doctor["name"],
+            "diagnosis": diagnosis, "cost": cost, "insurance_claim_status": claim["status"] if claim else "Not Filed",
+            "created_at": admitted,
+        }
+        if claim:
+            claim["visit_id"] = visit_id
+            yield "claims", claim
+
+        years = (admitted - joined).days / 365
+        for test, baseline, drift in rng.sample(labs, k=rng.randint(1 if chronic else 0, 4)):
+            name, category, unit, low, high, _, _, _, noise_sd, decimals, _ = test
+            tested = admitted + timedelta(hours=rng.uniform(0, 4))
+            pending = tested > self.end - timedelta(days=3) and rng.random() < 0.5
+            value = max(0.01, baseline + drift * years + rng.gauss(0, noise_sd))
+            if pending:
+                status = "Pending"
+            elif low <= value <= high:
+                status = "Normal"
+            else:
+                status = "Critical" if value > high * 1.5 or value < low * 0.5 else "Abnormal"
+            yield "lab_results", {
+                "id": _uuid(rng), "user_id": patient_id, "visit_id": visit_id, "test_name": name, "test_category": category,
+                "result_value": None if pending else f"{value:.{decimals}f}", "result_unit": unit,
+                "reference_range": f"{low}-{high}", "status": status, "test_date": tested,
+                "ordering_doctor": doctor["name"], "lab_facility": f"{doctor['hospital']} Lab", "created_at": tested,
+            }
+
+        if rng.random() < 0.65:
+            start = admitted.date()
+            long_term = chronic and rng.random() < 0.8
+            yield "prescriptions", {
+                "id": _uuid(rng), "user_id": patient_id, "visit_id": visit_id, "drug_name": drug, "dosage": dosage,
+                "frequency": "Once daily" if long_term else rng.choice(["Twice daily", "Thrice daily"]),
+                "start_date": start, "end_date": None if long_term else start + timedelta(days=rng.randint(3, 14)),
+                "refills_remaining": rng.randint(1, 5) if long_term else 0, "prescribing_doctor": doctor["name"],
+                "doctor_id": doctor["id"], "status": "Active" if long_term or start > (self.end - timedelta(days=14)).date() else "Completed",
+                "created_at": admitted,
+            }
+
+
+class CopyWriter:
+    """One COPY-format CSV per table; NULL is an unquoted empty field."""
+
+    extension = "csv"
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = out_dir
+        self._files = {}
+        self._writers = {}
+        for table, columns in TABLES.items():
+            fh = open(out_dir / f"{table}.csv", "w", newline="", encoding="utf-8")
+            writer = csv.writer(fh)
+            writer.writerow(name for name, _ in columns)
+            self._files[table] = fh
+            self._writers[table] = writer
+
+    def write(self, table, row):
+        self._writers[table].writerow([row.get(name) for name, _ in TABLES[table]])
+
+    def close(self):
+        for fh in self._files.values():
+            fh.close()
+        with open(self.out_dir / "load.sql", "w", encoding="utf-8") as fh:
+            fh.write("-- Generated by backend/generate_mock_data.py; run from this directory\n")
+            fh.write("BEGIN;\n")
+            for table, columns in TABLES.items():
+                names = ", ".join(name for name, _ in columns)
+                fh.write(f"\\copy {SCHEMA}.{table} ({names}) FROM '{table}.csv' WITH (FORMAT csv, HEADER true)\n")
+            fh.write("COMMIT;\nANALYZE;\n")
+
+
+class ParquetWriter:
+    """One Parquet file per table, written in row groups of PARQUET_ROW_GROUP rows."""
+
+    extension = "parquet"
+
+    def __init__(self, out_dir: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("--format parquet needs pyarrow (pip install pyarrow)")
+        self._pa = pa
+        types = {"uuid": pa.string(), "str": pa.string(), "int": pa.int64(), "float": pa.float64(),
+                 "bool": pa.bool_(), "date": pa.date32(), "ts": pa.timestamp("us", tz="UTC")}
+        self._schemas = {table: pa.schema([(name, types[kind]) for name, kind in columns]) for table, columns in TABLES.items()}
+        self._writers = {table: pq.ParquetWriter(out_dir / f"{table}.parquet", schema) for table, schema in self._schemas.items()}
+        self._buffers = {table: [] for table in TABLES}
+
+    def write(self, table, row):
+        buffer = self._buffers[table]
+        buffer.append(row)
+        if len(buffer) >= PARQUET_ROW_GROUP:
+            self._flush(table)
+
+    def _flush(self, table):
+        buffer = self._buffers[table]
+        if not buffer:
+            return
+        columns = {
+            name: [str(r[name]) if kind == "uuid" and r.get(name) is not None else r.get(name) for r in buffer]
+            for name, kind in TABLES[table]
+        }
+        self._writers[table].write_table(self._pa.table(columns, schema=self._schemas[table]))
+        buffer.clear()
+
+    def close(self):
+        for table, writer in self._writers.items():
+            self._flush(table)
+            writer.close()
+
+
+def generate(out_dir: Path, patients: int, seed: int = 42, fmt: str = "copy", doctors: int = None, end_date: date = None) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    writer = ParquetWriter(out_dir) if fmt == "parquet" else CopyWriter(out_dir)
+    end = datetime.combine(end_date, dt_time.min, tzinfo=timezone.utc) if end_date else None
+    generator = MockDataGenerator(patients, seed=seed, end=end, doctors=doctors)
+    counts = {table: 0 for table in TABLES}
+    started = time.perf_counter()
+    try:
+        for table, row in generator.rows():
+            writer.write(table, row)
+            counts[table] += 1
+    finally:
+        writer.close()
+    manifest = {
+        "patients": patients, "doctors": generator.doctor_count, "seed": seed, "format": fmt,
+        "end_date": generator.end.date().isoformat(), "rows": counts,
+        "duration_s": round(time.perf_counter() - started, 1),
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--doctors", type=int, help=f"default: one per {PATIENTS_PER_DOCTOR} patients")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=date.fromisoformat,
+                        help="last day covered by the data (default: today); pass it with --seed to reproduce a run")
+    parser.add_argument("--format", choices=["copy", "parquet"], default="copy")
+    parser.add_argument("--out", type=Path, default=Path("mock_data"))
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(json.dumps(generate(args.out, args.patients, args.seed, args.format, args.doctors, args.end_date), indent=2))
@@ -1,8 +1,15 @@
 # main.py
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -12,31 +19,84 @@ import logging
 import os
 
 from . import crud, models, schemas
-from .database import SessionLocal, engine, get_db
-from .routers import auth, doctors, researchers, patient_data, agents, users, patients, appointments, video, notifications
+from .database import SessionLocal, engine, get_db, describe_database
+from .routers import auth, doctors, researchers, patient_data, agents, users, patients, appointments, video, notifications, system, bulk, files, resumable_uploads
 from .routers.auth import get_current_user
-from .core.middleware import GlobalExceptionHandlerMiddleware
+from .core.middleware import GlobalExceptionHandlerMiddleware, RequestSizeLimitMiddleware
+from .core.replica import REPLICA_URL, ReadYourWritesMiddleware
+from .core.query_stats import QUERY_DEBUG_HEADERS, DEBUG_HEADERS
+from .core.profiler import PROFILE_ID_HEADER, ProfilerMiddleware
+from .core.startup import STARTUP
+from .core.static_files import CachedStaticFiles
+from .migrate import upgrade_database
+from .services import dashboard_stats, derivatives, resumable_uploads as resumable_upload_service
 
 # --- Logging ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("medical_backend")
 
-# --- Ensure DB schema + tables exist ---
-try:
-    with engine.connect() as conn:
-        conn.execute(text("CREATE SCHEMA IF NOT EXISTS medical"))
-        conn.commit()
-    models.Base.metadata.create_all(bind=engine)
-    logger.info("Database schema and tables verified.")
-except Exception as e:
-    logger.error(f"DB init error: {e}")
+# Set DB_AUTO_MIGRATE=false when migrations are run as a separate deploy step.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+# Build the agents orchestrator in the background at startup instead of on the first /agents/query
+AGENTS_PRELOAD = os.getenv("AGENTS_PRELOAD", "false").lower() in ("1", "true", "yes")
 
-app = FastAPI(title="Medical Project Backend")
+
+# --- Startup / shutdown ---
+# Importing this module must stay cheap (no DB connections, no agent stack):
+# everything that touches the network or loads heavy libraries happens here.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info(f"Uploads are being served from: {UPLOAD_DIR}")
+    logger.info(f"Database: {describe_database()}")
+    if DB_AUTO_MIGRATE:
+        try:
+            with STARTUP.phase("database migrations"):
+                await run_in_threadpool(upgrade_database)
+            logger.info("Database schema migrated to latest revision.")
+        except Exception as e:
+            logger.error(f"DB migration error: {e}")
+
+    if AGENTS_PRELOAD:
+        with STARTUP.phase("agents preload scheduled"):
+            agents.preload_orchestrator()
+
+    # Dashboard counters are pre-aggregated; see services/dashboard_stats.py
+    background_tasks = []
+    if dashboard_stats.REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(dashboard_stats.refresh_periodically()))
+    # Deletes resumable uploads that were never finalized
+    background_tasks.append(asyncio.create_task(resumable_upload_service.purge_periodically()))
+    # Thumbnails and previews of uploaded images and PDFs; see services/derivatives.py
+    if derivatives.POLL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(derivatives.generate_periodically()))
+
+    STARTUP.mark_ready()
+    report = STARTUP.snapshot()
+    logger.info(f"Startup complete: import {report['import_ms']} ms, startup {report['startup_ms']} ms")
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+
+
+app = FastAPI(title="Medical Project Backend", lifespan=lifespan)
 
 # --- Middleware order matters: Starlette is LIFO (last added = outermost = runs first) ---
+# Opt-in profiling (core/profiler.py) sits inside the exception handler so it sees the request id
+app.add_middleware(ProfilerMiddleware)
+
 # GlobalExceptionHandlerMiddleware must be INNER so CORS headers are always attached
 app.add_middleware(GlobalExceptionHandlerMiddleware)
 
+# Pins a client's reads to the primary for a short window after it writes
+if REPLICA_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# --- Reject huge request bodies, including chunked ones without Content-Length ---
+MAX_CONTENT_LENGTH = 25 * 1024 * 1024  # 25 MB, tune as needed
+app.add_middleware(RequestSizeLimitMiddleware, max_body_size=MAX_CONTENT_LENGTH)
+
 # CORSMiddleware MUST be outermost so ALL responses (including errors) get CORS headers
 app.add_middleware(
     CORSMiddleware,
@@ -48,6 +108,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", PROFILE_ID_HEADER, "Location", "Upload-Offset"] + (DEBUG_HEADERS if QUERY_DEBUG_HEADERS else []),
 )
 
 # --- Directories & static mount ---
@@ -57,31 +118,12 @@ UPLOAD_DIR = BACKEND_DIR / "static" / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Expose uploads at /uploads so frontend can GET http://<host>/uploads/<file>
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.mount("/uploads", CachedStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 # Optional: keep older static mount if you have other assets under /static
 STATIC_DIR = BACKEND_DIR / "static"
 if STATIC_DIR.exists():
-    app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-
-# --- Simple middleware to reject huge requests early (prevents accidental 413) ---
-MAX_CONTENT_LENGTH = 25 * 1024 * 1024  # 25 MB, tune as needed
-
-@app.middleware("http")
-async def reject_large_requests(request: Request, call_next):
-    # Only check when header is present. Some clients don't send Content-Length for streaming.
-    cl = request.headers.get("content-length")
-    if cl:
-        try:
-            if int(cl) > MAX_CONTENT_LENGTH:
-                return JSONResponse(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    content={"detail": "Request body too large"},
-                )
-        except ValueError:
-            pass
-    return await call_next(request)
-
+    app.mount("/static", CachedStaticFiles(directory=str(STATIC_DIR)), name="static")
 
 # --- Routers ---
 app.include_router(auth.router)
@@ -94,6 +136,10 @@ app.include_router(patients.router)
 app.include_router(appointments.router)
 app.include_router(video.router)
 app.include_router(notifications.router)
+app.include_router(system.router)
+app.include_router(bulk.router)
+app.include_router(files.router)
+app.include_router(resumable_uploads.router)
 
 
 # --- Root ---
@@ -108,16 +154,10 @@ async def options_handler(path: str):
     return {}
 
 
-# --- Startup hook for extra checks (optional) ---
-@app.on_event("startup")
-def on_startup():
-    # ensure upload dir exists and log startup state
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Uploads are being served from: {UPLOAD_DIR}")
-
-
 # --- Helpful notes for production (do not remove) ---
 # 1. Remove "*" from CORS allow_origins before deploying.
-# 2. Use migrations (Alembic) rather than create_all in production.
+# 2. Schema changes go through Alembic migrations in backend/migrations (python -m backend.migrate).
 # 3. Let a reverse-proxy (nginx) handle large uploads & SSL; tune client_max_body_size there.
-# 4. Consider moving uploads to S3 or other storage for scalability.
+# 4. Set STORAGE_BACKEND=s3 so several API nodes share uploads (services/storage.py).
+
+STARTUP.record_import(time.perf_counter() - _import_started)
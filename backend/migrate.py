@@ -0,0 +1,69 @@
+"""
+Bring the database schema up to date using the Alembic migrations in
+backend/migrations.
+
+    python -m backend.migrate            # upgrade to the latest revision
+    python -m backend.migrate 0002       # upgrade to a specific revision
+
+Databases created by the old `Base.metadata.create_all` bootstrap have the
+tables but no version table; they are stamped at the baseline revision first
+so only the newer migrations run against them.
+"""
+import logging
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, pool, text
+
+logger = logging.getLogger("medical_backend")
+
+SCHEMA = "medical"
+BASELINE_REVISION = "0001"
+ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+# Arbitrary constant shared by every worker so only one of them migrates at a time
+MIGRATION_LOCK_ID = 7_231_904
+
+
+@contextmanager
+def migration_lock(connection):
+    """Hold a Postgres session advisory lock for the duration of a migration run."""
+    connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+    connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+    connection.commit()
+    try:
+        yield connection
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+        connection.commit()
+
+
+def upgrade_database(revision: str = "head"):
+    from .database import SQLALCHEMY_DATABASE_URL
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["skip_logging_config"] = True
+
+    migration_engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=pool.NullPool)
+    try:
+        with migration_engine.connect() as connection, migration_lock(connection):
+            config.attributes["connection"] = connection
+            inspector = inspect(connection)
+            adopt_existing = (inspector.has_table("users", schema=SCHEMA)
+                              and not inspector.has_table("alembic_version", schema=SCHEMA))
+            # Leave the connection idle: Alembic must own the transaction for
+            # migrations that use autocommit blocks (CREATE INDEX CONCURRENTLY).
+            connection.commit()
+            if adopt_existing:
+                logger.info("Existing schema without migration history; stamping baseline %s", BASELINE_REVISION)
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+    finally:
+        migration_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade_database(sys.argv[1] if len(sys.argv) > 1 else "head")
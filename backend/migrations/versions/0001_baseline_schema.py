@@ -0,0 +1,368 @@
+"""baseline schema
+
+Tables exactly as the old `Base.metadata.create_all` bootstrap created them.
+Databases that were built that way are stamped at this revision by
+`backend.migrate` instead of running it.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-16 20:47:52.920878
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('otps',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('otp_code', sa.String(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_index(op.f('ix_medical_otps_email'), 'otps', ['email'], unique=False, schema='medical')
+    op.create_table('users',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('role', sa.String(), nullable=True),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('emergency_contact_name', sa.String(), nullable=True),
+    sa.Column('emergency_contact_phone', sa.String(), nullable=True),
+    sa.Column('blood_type', sa.String(), nullable=True),
+    sa.Column('height_cm', sa.Float(), nullable=True),
+    sa.Column('weight_kg', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('hashed_password', sa.String(), nullable=True),
+    sa.Column('aadhar_card_number', sa.String(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('hospital_name', sa.String(), nullable=True),
+    sa.Column('hospital_state', sa.String(), nullable=True),
+    sa.Column('hospital_city', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('aadhar_card_number'),
+    schema='medical'
+    )
+    op.create_index(op.f('ix_medical_users_email'), 'users', ['email'], unique=True, schema='medical')
+    op.create_index(op.f('ix_medical_users_id'), 'users', ['id'], unique=False, schema='medical')
+    op.create_table('allergies',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('allergen_name', sa.String(), nullable=True),
+    sa.Column('allergen_type', sa.String(), nullable=True),
+    sa.Column('severity', sa.String(), nullable=True),
+    sa.Column('reaction_symptoms', sa.Text(), nullable=True),
+    sa.Column('treatment_protocol', sa.Text(), nullable=True),
+    sa.Column('first_observed', sa.Date(), nullable=True),
+    sa.Column('last_reaction', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('appointments',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('doctor_name', sa.String(), nullable=True),
+    sa.Column('specialty', sa.String(), nullable=True),
+    sa.Column('hospital_clinic', sa.String(), nullable=True),
+    sa.Column('location', sa.String(), nullable=True),
+    sa.Column('consultation_mode', sa.String(), nullable=True),
+    sa.Column('appointment_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('appointment_type', sa.String(), nullable=True),
+    sa.Column('reason', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('doctors',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('specialty', sa.String(), nullable=True),
+    sa.Column('license_number', sa.String(), nullable=True),
+    sa.Column('years_of_experience', sa.Integer(), nullable=True),
+    sa.Column('hospital_affiliation', sa.String(), nullable=True),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('medical_degree_proof', sa.String(), nullable=True),
+    sa.Column('registration_cert', sa.String(), nullable=True),
+    sa.Column('identity_proof', sa.String(), nullable=True),
+    sa.Column('professional_photo', sa.String(), nullable=True),
+    sa.Column('other_certificates', sa.String(), nullable=True),
+    sa.Column('hospital_name', sa.String(), nullable=True),
+    sa.Column('hospital_state', sa.String(), nullable=True),
+    sa.Column('hospital_city', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('hospital_visits',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('hospital_name', sa.String(), nullable=True),
+    sa.Column('hospital_address', sa.String(), nullable=True),
+    sa.Column('department', sa.String(), nullable=True),
+    sa.Column('admission_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('discharge_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('visit_type', sa.String(), nullable=True),
+    sa.Column('primary_doctor', sa.String(), nullable=True),
+    sa.Column('diagnosis', sa.Text(), nullable=True),
+    sa.Column('treatment_summary', sa.Text(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.Column('insurance_claim_status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('insurance_policies',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('policy_number', sa.String(), nullable=True),
+    sa.Column('insurance_company', sa.String(), nullable=True),
+    sa.Column('policy_type', sa.String(), nullable=True),
+    sa.Column('coverage_start', sa.Date(), nullable=True),
+    sa.Column('coverage_end', sa.Date(), nullable=True),
+    sa.Column('premium_amount', sa.Float(), nullable=True),
+    sa.Column('deductible_amount', sa.Float(), nullable=True),
+    sa.Column('deductible_met', sa.Float(), nullable=True),
+    sa.Column('coverage_details', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('type', sa.String(), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('link', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('patient_profiles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('gender', sa.String(length=20), nullable=True),
+    sa.Column('marital_status', sa.String(length=30), nullable=True),
+    sa.Column('occupation', sa.String(length=100), nullable=True),
+    sa.Column('nationality', sa.String(length=80), nullable=True),
+    sa.Column('languages', sa.Text(), nullable=True),
+    sa.Column('profile_photo', sa.Text(), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('alternate_phone', sa.String(length=20), nullable=True),
+    sa.Column('address_line1', sa.Text(), nullable=True),
+    sa.Column('address_line2', sa.Text(), nullable=True),
+    sa.Column('city', sa.String(length=100), nullable=True),
+    sa.Column('state', sa.String(length=100), nullable=True),
+    sa.Column('pincode', sa.String(length=10), nullable=True),
+    sa.Column('country', sa.String(length=80), nullable=True),
+    sa.Column('guardian_name', sa.String(length=150), nullable=True),
+    sa.Column('guardian_relationship', sa.String(length=60), nullable=True),
+    sa.Column('guardian_phone', sa.String(length=20), nullable=True),
+    sa.Column('guardian_email', sa.String(length=150), nullable=True),
+    sa.Column('guardian_address', sa.Text(), nullable=True),
+    sa.Column('emergency_contact_name', sa.String(length=150), nullable=True),
+    sa.Column('emergency_contact_phone', sa.String(length=20), nullable=True),
+    sa.Column('emergency_relationship', sa.String(length=60), nullable=True),
+    sa.Column('blood_type', sa.String(length=5), nullable=True),
+    sa.Column('height_cm', sa.Float(), nullable=True),
+    sa.Column('weight_kg', sa.Float(), nullable=True),
+    sa.Column('known_conditions', sa.Text(), nullable=True),
+    sa.Column('known_allergies', sa.Text(), nullable=True),
+    sa.Column('current_medications', sa.Text(), nullable=True),
+    sa.Column('smoking_status', sa.String(length=30), nullable=True),
+    sa.Column('alcohol_use', sa.String(length=30), nullable=True),
+    sa.Column('exercise_frequency', sa.String(length=30), nullable=True),
+    sa.Column('aadhar_card_number', sa.String(length=12), nullable=True),
+    sa.Column('pan_number', sa.String(length=10), nullable=True),
+    sa.Column('insurance_provider', sa.String(length=150), nullable=True),
+    sa.Column('insurance_policy_no', sa.String(length=80), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id'),
+    schema='medical'
+    )
+    op.create_table('researchers',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('institution', sa.String(), nullable=True),
+    sa.Column('field_of_study', sa.String(), nullable=True),
+    sa.Column('publications_count', sa.Integer(), nullable=True),
+    sa.Column('current_projects', sa.Text(), nullable=True),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('professional_title', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('country', sa.String(), nullable=True),
+    sa.Column('highest_qualification', sa.String(), nullable=True),
+    sa.Column('specialization', sa.String(), nullable=True),
+    sa.Column('university', sa.String(), nullable=True),
+    sa.Column('completion_year', sa.Integer(), nullable=True),
+    sa.Column('research_areas', sa.Text(), nullable=True),
+    sa.Column('techniques', sa.Text(), nullable=True),
+    sa.Column('therapeutic_domains', sa.Text(), nullable=True),
+    sa.Column('total_experience_years', sa.Integer(), nullable=True),
+    sa.Column('research_type', sa.String(), nullable=True),
+    sa.Column('orcid_id', sa.String(), nullable=True),
+    sa.Column('linkedin_url', sa.String(), nullable=True),
+    sa.Column('google_scholar_url', sa.String(), nullable=True),
+    sa.Column('collaboration_interests', sa.Text(), nullable=True),
+    sa.Column('is_mentorship_available', sa.Boolean(), nullable=True),
+    sa.Column('thesis_url', sa.String(), nullable=True),
+    sa.Column('cv_url', sa.String(), nullable=True),
+    sa.Column('other_docs_url', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('calls',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('appointment_id', sa.UUID(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('ended_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('ended_by', sa.String(), nullable=True),
+    sa.Column('call_status', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['medical.appointments.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('claims',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('policy_id', sa.UUID(), nullable=True),
+    sa.Column('visit_id', sa.UUID(), nullable=True),
+    sa.Column('claim_number', sa.String(), nullable=True),
+    sa.Column('claim_amount', sa.Float(), nullable=True),
+    sa.Column('approved_amount', sa.Float(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('submission_date', sa.Date(), nullable=True),
+    sa.Column('processed_date', sa.Date(), nullable=True),
+    sa.Column('reason_for_claim', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['policy_id'], ['medical.insurance_policies.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.ForeignKeyConstraint(['visit_id'], ['medical.hospital_visits.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('clinical_trials',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('researcher_id', sa.UUID(), nullable=True),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('phase', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['researcher_id'], ['medical.researchers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('lab_results',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('visit_id', sa.UUID(), nullable=True),
+    sa.Column('test_name', sa.String(), nullable=True),
+    sa.Column('test_category', sa.String(), nullable=True),
+    sa.Column('result_value', sa.String(), nullable=True),
+    sa.Column('result_unit', sa.String(), nullable=True),
+    sa.Column('reference_range', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('test_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('ordering_doctor', sa.String(), nullable=True),
+    sa.Column('lab_facility', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('document_url', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.ForeignKeyConstraint(['visit_id'], ['medical.hospital_visits.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('prescriptions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('visit_id', sa.UUID(), nullable=True),
+    sa.Column('drug_name', sa.String(), nullable=True),
+    sa.Column('dosage', sa.String(), nullable=True),
+    sa.Column('frequency', sa.String(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('refills_remaining', sa.Integer(), nullable=True),
+    sa.Column('side_effects', sa.Text(), nullable=True),
+    sa.Column('special_instructions', sa.Text(), nullable=True),
+    sa.Column('prescribing_doctor', sa.String(), nullable=True),
+    sa.Column('pharmacy', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('document_url', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['medical.users.id'], ),
+    sa.ForeignKeyConstraint(['visit_id'], ['medical.hospital_visits.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+    op.create_table('research_projects',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('researcher_id', sa.UUID(), nullable=True),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('area', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['researcher_id'], ['medical.researchers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='medical'
+    )
+
+
+def downgrade():
+    op.drop_table('research_projects', schema='medical')
+    op.drop_table('prescriptions', schema='medical')
+    op.drop_table('lab_results', schema='medical')
+    op.drop_table('clinical_trials', schema='medical')
+    op.drop_table('claims', schema='medical')
+    op.drop_table('calls', schema='medical')
+    op.drop_table('researchers', schema='medical')
+    op.drop_table('patient_profiles', schema='medical')
+    op.drop_table('notifications', schema='medical')
+    op.drop_table('insurance_policies', schema='medical')
+    op.drop_table('hospital_visits', schema='medical')
+    op.drop_table('doctors', schema='medical')
+    op.drop_table('appointments', schema='medical')
+    op.drop_table('allergies', schema='medical')
+    op.drop_index(op.f('ix_medical_users_id'), table_name='users', schema='medical')
+    op.drop_index(op.f('ix_medical_users_email'), table_name='users', schema='medical')
+    op.drop_table('users', schema='medical')
+    op.drop_index(op.f('ix_medical_otps_email'), table_name='otps', schema='medical')
+    op.drop_table('otps', schema='medical')
@@ -0,0 +1,64 @@
+"""patient data indexes
+
+Indexes matching the real access paths in crud.py: per-user lists ordered by
+created_at, unread-notification lookups, appointment date ranges and the
+doctor/researcher profile joins.
+
+Built with CREATE INDEX CONCURRENTLY so existing tables stay writable while
+the indexes are created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 21:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_users_role_created_at", "users", ["role", "created_at"]),
+    ("ix_users_hospital_name_role", "users", ["hospital_name", "role"]),
+    ("ix_doctors_user_id", "doctors", ["user_id"]),
+    ("ix_doctors_hospital_name", "doctors", ["hospital_name"]),
+    ("ix_researchers_user_id", "researchers", ["user_id"]),
+    ("ix_clinical_trials_researcher_id_status", "clinical_trials", ["researcher_id", "status"]),
+    ("ix_research_projects_researcher_id", "research_projects", ["researcher_id"]),
+    ("ix_hospital_visits_user_id_created_at", "hospital_visits", ["user_id", "created_at"]),
+    ("ix_hospital_visits_visit_type", "hospital_visits", ["visit_type"]),
+    ("ix_prescriptions_user_id_created_at", "prescriptions", ["user_id", "created_at"]),
+    ("ix_allergies_user_id_created_at", "allergies", ["user_id", "created_at"]),
+    ("ix_lab_results_user_id_created_at", "lab_results", ["user_id", "created_at"]),
+    ("ix_lab_results_status", "lab_results", ["status"]),
+    ("ix_insurance_policies_user_id_created_at", "insurance_policies", ["user_id", "created_at"]),
+    ("ix_claims_user_id_created_at", "claims", ["user_id", "created_at"]),
+    ("ix_appointments_user_id_created_at", "appointments", ["user_id", "created_at"]),
+    ("ix_appointments_appointment_date", "appointments", ["appointment_date"]),
+    ("ix_calls_appointment_id", "calls", ["appointment_id"]),
+    ("ix_notifications_user_id_created_at", "notifications", ["user_id", "created_at"]),
+    ("ix_notifications_user_id_is_read", "notifications", ["user_id", "is_read"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, schema='medical',
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, schema='medical',
+                postgresql_concurrently=True, if_exists=True,
+            )
@@ -0,0 +1,67 @@
+"""doctor_id foreign keys on appointments and prescriptions
+
+Appointments and prescriptions referenced their doctor only through the
+free-text `doctor_name` / `prescribing_doctor` columns. This adds nullable
+`doctor_id` columns pointing at the doctor's user row, plus the indexes the
+doctor dashboard queries use.
+
+The foreign keys are added NOT VALID and validated separately so the tables
+are not locked against writes while existing rows are checked. Existing rows
+are linked by `python -m backend.backfill_doctor_ids`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+FOREIGN_KEYS = [
+    ("fk_appointments_doctor_id_users", "appointments"),
+    ("fk_prescriptions_doctor_id_users", "prescriptions"),
+]
+
+INDEXES = [
+    ("ix_appointments_doctor_id_created_at", "appointments", ["doctor_id", "created_at"]),
+    ("ix_appointments_doctor_id_appointment_date", "appointments", ["doctor_id", "appointment_date"]),
+    ("ix_prescriptions_doctor_id_created_at", "prescriptions", ["doctor_id", "created_at"]),
+]
+
+
+def upgrade():
+    for name, table in FOREIGN_KEYS:
+        op.add_column(table, sa.Column('doctor_id', postgresql.UUID(as_uuid=True), nullable=True), schema='medical')
+        op.create_foreign_key(
+            name, table, 'users', ['doctor_id'], ['id'],
+            source_schema='medical', referent_schema='medical', postgresql_not_valid=True,
+        )
+    with op.get_context().autocommit_block():
+        for name, table in FOREIGN_KEYS:
+            op.execute(f'ALTER TABLE medical.{table} VALIDATE CONSTRAINT {name}')
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, schema='medical',
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, schema='medical',
+                postgresql_concurrently=True, if_exists=True,
+            )
+    for name, table in reversed(FOREIGN_KEYS):
+        op.drop_constraint(name, table, schema='medical', type_='foreignkey')
+        op.drop_column(table, 'doctor_id', schema='medical')
@@ -0,0 +1,35 @@
+"""dashboard stats table
+
+Holds the doctor and researcher dashboard counters, one row per scope
+(hospital, unaffiliated doctor, researcher). Rows are rebuilt periodically by
+`backend.services.dashboard_stats` so dashboard reads are a primary-key lookup.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_stats',
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('counters', sa.JSON(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('scope'),
+        schema='medical',
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_stats', schema='medical')
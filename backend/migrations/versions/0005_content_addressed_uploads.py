@@ -0,0 +1,58 @@
+"""content-addressed uploads
+
+`stored_blobs` holds one row per distinct uploaded file, keyed by its
+SHA-256, with the storage backend and object key it lives under.
+`upload_references` records every upload of a blob (uploader, purpose,
+original file name) so duplicates share storage but stay attributable.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stored_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=False),
+        sa.Column('backend', sa.String(), nullable=False),
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+        schema='medical',
+    )
+    op.create_table(
+        'upload_references',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('purpose', sa.String(), nullable=False),
+        sa.Column('original_filename', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['sha256'], ['medical.stored_blobs.sha256']),
+        sa.ForeignKeyConstraint(['user_id'], ['medical.users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        schema='medical',
+    )
+    op.create_index('ix_upload_references_sha256', 'upload_references', ['sha256'], schema='medical')
+    op.create_index('ix_upload_references_user_id_created_at', 'upload_references', ['user_id', 'created_at'], schema='medical')
+
+
+def downgrade():
+    op.drop_index('ix_upload_references_user_id_created_at', table_name='upload_references', schema='medical')
+    op.drop_index('ix_upload_references_sha256', table_name='upload_references', schema='medical')
+    op.drop_table('upload_references', schema='medical')
+    op.drop_table('stored_blobs', schema='medical')
@@ -0,0 +1,35 @@
+"""blob derivatives
+
+Adds `derivatives_status` and `derivatives` to `stored_blobs` for the
+thumbnail/preview worker, with a partial index over the blobs it has not
+processed yet. Existing blobs start out pending, so they are backfilled.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 01:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stored_blobs', sa.Column('derivatives_status', sa.String(), nullable=True), schema='medical')
+    op.add_column('stored_blobs', sa.Column('derivatives', sa.JSON(), nullable=True), schema='medical')
+    op.create_index(
+        'ix_stored_blobs_derivatives_pending', 'stored_blobs', ['created_at'],
+        schema='medical', postgresql_where=sa.text('derivatives_status IS NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_stored_blobs_derivatives_pending', table_name='stored_blobs', schema='medical')
+    op.drop_column('stored_blobs', 'derivatives', schema='medical')
+    op.drop_column('stored_blobs', 'derivatives_status', schema='medical')
@@ -0,0 +1,76 @@
+"""created_at not null on paginated tables
+
+Keyset pagination (core/pagination.py) orders by `(created_at DESC, id DESC)`
+and encodes the last row's `created_at` in the cursor. A NULL there sorted
+first, never matched the `(created_at, id) < cursor` filter and could not be
+encoded at all, so every table paged that way now requires it. Rows without
+one are dated to the Unix epoch, i.e. they page last, as the oldest rows.
+
+Done without holding an ACCESS EXCLUSIVE lock while a table is scanned. Per
+table: a `CHECK (created_at IS NOT NULL) NOT VALID` constraint stops new
+NULLs, existing ones are updated BATCH_SIZE rows at a time in primary-key
+order, the check is validated (which allows writes), and SET NOT NULL then
+relies on the valid check instead of scanning (Postgres 12+) before the
+check is dropped again.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+TABLES = [
+    'users', 'appointments', 'hospital_visits', 'prescriptions', 'allergies', 'lab_results',
+    'insurance_policies', 'claims', 'clinical_trials', 'research_projects', 'notifications',
+]
+
+
+BATCH_SIZE = 5000
+
+
+def _backfill(connection, table):
+    """Date NULL rows to the epoch, one primary-key range of BATCH_SIZE rows per statement."""
+    last_id = None
+    while True:
+        after = ["id > :last_id"] if last_id is not None else []
+        # The last id of the next batch; None once fewer than BATCH_SIZE rows are left
+        batch_end = connection.execute(
+            sa.text(f"SELECT id FROM medical.{table} {'WHERE ' + after[0] if after else ''} "
+                    f"ORDER BY id LIMIT 1 OFFSET :skip"),
+            {"last_id": last_id, "skip": BATCH_SIZE - 1},
+        ).scalar()
+        batch = after + (["id <= :batch_end"] if batch_end is not None else []) + ["created_at IS NULL"]
+        connection.execute(
+            sa.text(f"UPDATE medical.{table} SET created_at = 'epoch' WHERE {' AND '.join(batch)}"),
+            {"last_id": last_id, "batch_end": None if batch_end is None else str(batch_end)},
+        )
+        if batch_end is None:
+            return
+        last_id = str(batch_end)
+
+
+def upgrade():
+    # Each statement commits on its own, so no lock outlives its batch or step
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        for table in TABLES:
+            check = f"ck_{table}_created_at_not_null"
+            op.execute(f"ALTER TABLE medical.{table} ADD CONSTRAINT {check} CHECK (created_at IS NOT NULL) NOT VALID")
+            _backfill(connection, table)
+            op.execute(f"ALTER TABLE medical.{table} VALIDATE CONSTRAINT {check}")
+            op.alter_column(table, 'created_at', existing_type=sa.DateTime(timezone=True), nullable=False, schema='medical')
+            op.execute(f"ALTER TABLE medical.{table} DROP CONSTRAINT {check}")
+
+
+def downgrade():
+    for table in TABLES:
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(timezone=True), nullable=True, schema='medical')
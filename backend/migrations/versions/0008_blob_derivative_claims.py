@@ -0,0 +1,36 @@
+"""blob derivative claims
+
+The derivative worker now marks a blob "processing" and commits before it
+renders, instead of holding a row lock for the whole render.
+`derivatives_claimed_at` records when, so a claim left behind by a worker
+that died is picked up again; the partial index keeps that lookup off the
+rest of the table.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 02:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stored_blobs', sa.Column('derivatives_claimed_at', sa.DateTime(timezone=True), nullable=True), schema='medical')
+    op.create_index(
+        'ix_stored_blobs_derivatives_processing', 'stored_blobs', ['derivatives_claimed_at'],
+        schema='medical', postgresql_where=sa.text("derivatives_status = 'processing'"),
+    )
+
+
+def downgrade():
+    op.execute("UPDATE medical.stored_blobs SET derivatives_status = NULL WHERE derivatives_status = 'processing'")
+    op.drop_index('ix_stored_blobs_derivatives_processing', table_name='stored_blobs', schema='medical')
+    op.drop_column('stored_blobs', 'derivatives_claimed_at', schema='medical')
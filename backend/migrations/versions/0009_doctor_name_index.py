@@ -0,0 +1,39 @@
+"""doctor name index
+
+crud.resolve_doctor_id links appointments and prescriptions to a doctor with
+one exact lookup on the normalised name, lower(trim(full_name)), among
+doctors. This partial expression index serves it.
+
+Built with CREATE INDEX CONCURRENTLY so users stays writable.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 04:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_doctor_full_name', 'users', [sa.text('lower(trim(full_name))')], schema='medical',
+            postgresql_where=sa.text("role = 'doctor'"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_doctor_full_name', table_name='users', schema='medical',
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -1,14 +1,18 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, DateTime, Float, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, DateTime, Float, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 from .database import Base
 
 
 class User(Base):
     __tablename__ = "users"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_users_role_created_at", "role", "created_at"),
+        Index("ix_users_hospital_name_role", "hospital_name", "role"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     email = Column(String, unique=True, index=True)
@@ -21,29 +25,36 @@ class User(Base):
     blood_type = Column(String, nullable=True)
     height_cm = Column(Float, nullable=True)
     weight_kg = Column(Float, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     hashed_password = Column(String)
 
     # New Fields
     aadhar_card_number = Column(String, unique=True, nullable=True)
     is_verified = Column(Boolean, default=False)
-    hospital_name = Column(String, nullable=True)
+    # active_history: the activity cache invalidates the previous hospital's feeds as well
+    hospital_name = column_property(Column(String, nullable=True), active_history=True)
     hospital_state = Column(String, nullable=True)
     hospital_city = Column(String, nullable=True)
 
     visits = relationship("HospitalVisit", back_populates="patient")
-    prescriptions = relationship("Prescription", back_populates="patient")
+    prescriptions = relationship("Prescription", back_populates="patient", foreign_keys="Prescription.user_id")
     allergies = relationship("Allergy", back_populates="patient")
     lab_results = relationship("LabResult", back_populates="patient")
     insurance_policies = relationship("InsurancePolicy", back_populates="patient")
     claims = relationship("Claim", back_populates="patient")
-    appointments = relationship("Appointment", back_populates="patient")
+    appointments = relationship("Appointment", back_populates="patient", foreign_keys="Appointment.user_id")
     doctor_profile = relationship("Doctor", back_populates="user", uselist=False)
     researcher_profile = relationship("Researcher", back_populates="user", uselist=False)
     patient_profile = relationship("PatientProfile", back_populates="user", uselist=False)
 
 
+# Exact doctor-name lookups in crud.resolve_doctor_id
+Index(
+    "ix_users_doctor_full_name", func.lower(func.trim(User.full_name)),
+    postgresql_where=text("role = 'doctor'"),
+)
+
 
 class PatientProfile(Base):
     __tablename__ = "patient_profiles"
@@ -107,7 +118,11 @@ class PatientProfile(Base):
 
 class Doctor(Base):
     __tablename__ = "doctors"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_doctors_user_id", "user_id"),
+        Index("ix_doctors_hospital_name", "hospital_name"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -138,7 +153,10 @@ class Doctor(Base):
 
 class Researcher(Base):
     __tablename__ = "researchers"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_researchers_user_id", "user_id"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -189,7 +207,10 @@ class Researcher(Base):
 
 class ClinicalTrial(Base):
     __tablename__ = "clinical_trials"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_clinical_trials_researcher_id_status", "researcher_id", "status"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     researcher_id = Column(UUID(as_uuid=True), ForeignKey("medical.researchers.id"))
@@ -198,14 +219,17 @@ class ClinicalTrial(Base):
     status = Column(String)  # Recruitment, Active, Completed, Terminated
     start_date = Column(Date)
     end_date = Column(Date, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     researcher = relationship("Researcher", back_populates="trials")
 
 
 class ResearchProject(Base):
     __tablename__ = "research_projects"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_research_projects_researcher_id", "researcher_id"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     researcher_id = Column(UUID(as_uuid=True), ForeignKey("medical.researchers.id"))
@@ -213,14 +237,18 @@ class ResearchProject(Base):
     description = Column(Text)
     status = Column(String)
     area = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     researcher = relationship("Researcher", back_populates="projects")
 
 
 class HospitalVisit(Base):
     __tablename__ = "hospital_visits"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_hospital_visits_user_id_created_at", "user_id", "created_at"),
+        Index("ix_hospital_visits_visit_type", "visit_type"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -235,7 +263,7 @@ class HospitalVisit(Base):
     treatment_summary = Column(Text, nullable=True)
     cost = Column(Float, nullable=True)
     insurance_claim_status = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     patient = relationship("User", back_populates="visits")
@@ -243,7 +271,11 @@ class HospitalVisit(Base):
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_prescriptions_user_id_created_at", "user_id", "created_at"),
+        Index("ix_prescriptions_doctor_id_created_at", "doctor_id", "created_at"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -257,18 +289,24 @@ class Prescription(Base):
     side_effects = Column(Text, nullable=True)
     special_instructions = Column(Text, nullable=True)
     prescribing_doctor = Column(String)
+    # The prescribing doctor's user account; prescribing_doctor stays as the display name
+    # active_history: the activity cache invalidates the previous doctor's feed as well
+    doctor_id = column_property(Column(UUID(as_uuid=True), ForeignKey("medical.users.id"), nullable=True), active_history=True)
     pharmacy = Column(String, nullable=True)
     status = Column(String)
     document_url = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    patient = relationship("User", back_populates="prescriptions")
+    patient = relationship("User", back_populates="prescriptions", foreign_keys=[user_id])
 
 
 class Allergy(Base):
     __tablename__ = "allergies"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_allergies_user_id_created_at", "user_id", "created_at"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -279,7 +317,7 @@ class Allergy(Base):
     treatment_protocol = Column(Text, nullable=True)
     first_observed = Column(Date)
     last_reaction = Column(Date, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     patient = relationship("User", back_populates="allergies")
@@ -287,7 +325,11 @@ class Allergy(Base):
 
 class LabResult(Base):
     __tablename__ = "lab_results"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_lab_results_user_id_created_at", "user_id", "created_at"),
+        Index("ix_lab_results_status", "status"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -303,7 +345,7 @@ class LabResult(Base):
     lab_facility = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
     document_url = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     patient = relationship("User", back_populates="lab_results")
@@ -311,7 +353,10 @@ class LabResult(Base):
 
 class InsurancePolicy(Base):
     __tablename__ = "insurance_policies"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_insurance_policies_user_id_created_at", "user_id", "created_at"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -325,7 +370,7 @@ class InsurancePolicy(Base):
     deductible_met = Column(Float)
     coverage_details = Column(JSON, nullable=True)
     is_active = Column(Boolean)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     patient = relationship("User", back_populates="insurance_policies")
@@ -333,7 +378,10 @@ class InsurancePolicy(Base):
 
 class Claim(Base):
     __tablename__ = "claims"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_claims_user_id_created_at", "user_id", "created_at"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -347,7 +395,7 @@ class Claim(Base):
     processed_date = Column(Date, nullable=True)
     reason_for_claim = Column(Text)
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     patient = relationship("User", back_populates="claims")
@@ -355,11 +403,20 @@ class Claim(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_appointments_user_id_created_at", "user_id", "created_at"),
+        Index("ix_appointments_appointment_date", "appointment_date"),
+        Index("ix_appointments_doctor_id_created_at", "doctor_id", "created_at"),
+        Index("ix_appointments_doctor_id_appointment_date", "doctor_id", "appointment_date"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
     doctor_name = Column(String)
+    # The doctor's user account; doctor_name stays as the display name
+    # active_history: the activity cache invalidates the previous doctor's feed as well
+    doctor_id = column_property(Column(UUID(as_uuid=True), ForeignKey("medical.users.id"), nullable=True), active_history=True)
     specialty = Column(String, nullable=True)
     hospital_clinic = Column(String)
     location = Column(String, nullable=True)
@@ -369,16 +426,19 @@ class Appointment(Base):
     reason = Column(Text)
     status = Column(String)
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    patient = relationship("User", back_populates="appointments")
+    patient = relationship("User", back_populates="appointments", foreign_keys=[user_id])
     calls = relationship("Call", back_populates="appointment")
 
 
 class Call(Base):
     __tablename__ = "calls"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_calls_appointment_id", "appointment_id"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     appointment_id = Column(UUID(as_uuid=True), ForeignKey("medical.appointments.id"))
@@ -402,7 +462,11 @@ class OTP(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
-    __table_args__ = {"schema": "medical"}
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+        Index("ix_notifications_user_id_is_read", "user_id", "is_read"),
+        {"schema": "medical"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"))
@@ -411,6 +475,56 @@ class Notification(Base):
     type = Column(String) # 'appointment', 'prescription', 'general'
     is_read = Column(Boolean, default=False)
     link = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("User")
+
+class DashboardStat(Base):
+    """Pre-aggregated dashboard counters, rebuilt periodically by services/dashboard_stats.py."""
+    __tablename__ = "dashboard_stats"
+    __table_args__ = {"schema": "medical"}
+
+    # "hospital:<name>", "doctor:<user id>", "researcher:<researcher id>" or "all"
+    scope = Column(String, primary_key=True)
+    counters = Column(JSON, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+class StoredBlob(Base):
+    """One stored file, keyed by the SHA-256 of its content (see services/storage.py)."""
+    __tablename__ = "stored_blobs"
+    __table_args__ = (
+        # The derivative worker's queue (services/derivatives.py)
+        Index("ix_stored_blobs_derivatives_pending", "created_at", postgresql_where=text("derivatives_status IS NULL")),
+        Index("ix_stored_blobs_derivatives_processing", "derivatives_claimed_at",
+              postgresql_where=text("derivatives_status = 'processing'")),
+        {"schema": "medical"},
+    )
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=False)
+    backend = Column(String, nullable=False)  # "local" or "s3"
+    storage_key = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # NULL until the derivative worker claims it, "processing" while it renders, then "ready", "skipped" or "failed"
+    derivatives_status = Column(String, nullable=True)
+    derivatives_claimed_at = Column(DateTime(timezone=True), nullable=True)
+    derivatives = Column(JSON, nullable=True)  # {"thumb": storage key, "preview": storage key}
+
+class UploadReference(Base):
+    """Who uploaded a blob and what for; many references may share one blob."""
+    __tablename__ = "upload_references"
+    __table_args__ = (
+        Index("ix_upload_references_sha256", "sha256"),
+        Index("ix_upload_references_user_id_created_at", "user_id", "created_at"),
+        {"schema": "medical"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sha256 = Column(String(64), ForeignKey("medical.stored_blobs.sha256"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("medical.users.id"), nullable=True)
+    purpose = Column(String, nullable=False)  # e.g. "patient.document", "doctor.professional_photo"
+    original_filename = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    blob = relationship("StoredBlob")
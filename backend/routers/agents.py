@@ -1,22 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+import logging
 import sys
 import os
+import threading
 from pathlib import Path
 
-# Add agents_ai to sys.path if not already there
+from ..core.metrics import timed_agent_call
+from ..core.startup import STARTUP
+
+logger = logging.getLogger("medical_backend")
+
 # We assume agents_ai is at the same level as backend
 # c:\Users\ROHAN\Medical\agents_ai
 AGENTS_DIR = Path(__file__).resolve().parent.parent.parent / "agents_ai"
-if str(AGENTS_DIR) not in sys.path:
-    sys.path.append(str(AGENTS_DIR))
-
-try:
-    from orchestrator import DrugRepurposingOrchestrator
-except ImportError as e:
-    # Handle case where imports fail (e.g. missing dependencies in env)
-    print(f"Failed to import Orchestrator: {e}")
-    DrugRepurposingOrchestrator = None
 
 router = APIRouter(
     prefix="/agents",
@@ -27,22 +25,79 @@ router = APIRouter(
 class QueryRequest(BaseModel):
     query: str
 
-# Global instance (lazy loading could be better but this is simple)
+# The agent stack (LangChain, LLM clients, search wrappers) takes seconds to import,
+# so it is loaded on the first /agents/query, or in the background when AGENTS_PRELOAD is set.
 orchestrator_instance = None
+_orchestrator_lock = threading.Lock()
+
+# Orchestrator attribute -> agent label used in agent_call_duration_seconds
+AGENT_ATTRIBUTES = {"hap": "anatomy", "haa": "compliance", "maa": "market", "cta": "trials"}
+
+def _instrument_agents(orchestrator):
+    """Wrap each specialist's `run` so its latency is recorded under its own label."""
+    for attr, label in AGENT_ATTRIBUTES.items():
+        agent = getattr(orchestrator, attr, None)
+        if agent is None or not hasattr(agent, "run"):
+            continue
+        run = agent.run
+        agent.run = lambda query, _run=run, _label=label: timed_agent_call(_label, _run, query)
+    chain = getattr(orchestrator, "router_chain", None)
+    if chain is not None:
+        orchestrator.router_chain = _TimedChain(chain)
+
+class _TimedChain:
+    """Proxy for the routing LLM chain that records its `invoke` latency as the "router" agent."""
+
+    def __init__(self, chain):
+        self._chain = chain
+
+    def invoke(self, *args, **kwargs):
+        return timed_agent_call("router", self._chain.invoke, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._chain, name)
+
+def _load_orchestrator_class():
+    # Add agents_ai to sys.path if not already there
+    if str(AGENTS_DIR) not in sys.path:
+        sys.path.append(str(AGENTS_DIR))
+    from orchestrator import DrugRepurposingOrchestrator
+    return DrugRepurposingOrchestrator
 
 def get_orchestrator():
+    """Build the orchestrator once; blocking, so call it from a worker thread."""
     global orchestrator_instance
-    if orchestrator_instance is None:
-        if DrugRepurposingOrchestrator is None:
-             raise HTTPException(status_code=500, detail="Agents system could not be loaded. Check server logs.")
-        try:
-            orchestrator_instance = DrugRepurposingOrchestrator()
-        except Exception as e:
-             import traceback
-             traceback.print_exc()
-             raise HTTPException(status_code=500, detail=f"Failed to initialize agents: {str(e)}")
+    if orchestrator_instance is not None:
+        return orchestrator_instance
+    with _orchestrator_lock:
+        if orchestrator_instance is None:
+            try:
+                with STARTUP.phase("agents import"):
+                    orchestrator_class = _load_orchestrator_class()
+            except (ImportError, SystemExit) as e:
+                # Handle case where imports fail (e.g. missing dependencies in env)
+                logger.error(f"Failed to import Orchestrator: {e!r}")
+                raise HTTPException(status_code=500, detail="Agents system could not be loaded. Check server logs.")
+            try:
+                with STARTUP.phase("agents init"):
+                    instance = orchestrator_class()
+                    _instrument_agents(instance)
+            except (Exception, SystemExit) as e:
+                logger.exception("Failed to initialize agents")
+                raise HTTPException(status_code=500, detail=f"Failed to initialize agents: {str(e)}")
+            orchestrator_instance = instance
     return orchestrator_instance
 
+def preload_orchestrator():
+    """Start building the orchestrator on a background thread so the first query does not pay for it."""
+    def load():
+        try:
+            get_orchestrator()
+        except HTTPException:
+            pass  # already logged; /agents/query retries and reports the error
+
+    threading.Thread(target=load, name="agents-preload", daemon=True).start()
+
 # Mock responses for sample questions to bypass LLM
 SAMPLE_RESPONSES = {
     "what are the current treatments for alzheimer's?": "Current treatments for Alzheimer's disease include cholinesterase inhibitors (Donepezil, Rivastigmine, Galantamine) and NMDA receptor antagonists (Memantine). Recently, anti-amyloid antibodies like Lecanemab and Donanemab have shown promise in slowing cognitive decline in early stages. Non-drug approaches include cognitive stimulation therapy and lifestyle modifications.",
@@ -80,9 +135,9 @@ async def query_agents(request: QueryRequest):
     if normalized_query in SAMPLE_RESPONSES:
         return {"response": SAMPLE_RESPONSES[normalized_query]}
 
-    orchestrator = get_orchestrator()
+    orchestrator = await run_in_threadpool(get_orchestrator)
     try:
-        response = orchestrator.route_and_execute(request.query)
+        response = await run_in_threadpool(timed_agent_call, "orchestrator", orchestrator.route_and_execute, request.query)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
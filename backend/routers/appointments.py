@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 import logging
 
-from .. import crud, models, schemas
-from ..database import get_db
+from .. import crud, async_crud, models, schemas
+from ..database import get_db, get_async_db, get_read_db
+from ..core.pagination import set_next_cursor
 
 logger = logging.getLogger("medical_backend")
 import json
@@ -17,8 +19,8 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.Appointment, status_code=status.HTTP_201_CREATED)
-async def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Depends(get_db)):
-    db_appointment = crud.create_appointment(db=db, appointment=appointment)
+async def create_appointment(appointment: schemas.AppointmentCreate, db: AsyncSession = Depends(get_async_db)):
+    db_appointment = await async_crud.create_appointment(db=db, appointment=appointment)
     
     # Notify patient (if created by someone else) or just log it
     notif_data = schemas.NotificationCreate(
@@ -28,7 +30,7 @@ async def create_appointment(appointment: schemas.AppointmentCreate, db: Session
         type="appointment",
         link="/appointments"
     )
-    db_notif = crud.create_notification(db, notif_data)
+    db_notif = await async_crud.create_notification(db, notif_data)
     
     # Real-time signaling
     await manager.notify_user(str(db_appointment.user_id), json.dumps({
@@ -48,9 +50,10 @@ async def create_appointment(appointment: schemas.AppointmentCreate, db: Session
 
 
 @router.get("/", response_model=List[schemas.Appointment])
-def read_appointments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_appointments(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db)):
     limit = min(limit, 500)
-    appointments = crud.get_appointments(db, skip=skip, limit=limit)
+    appointments = crud.get_appointments(db, cursor=cursor, limit=limit)
+    set_next_cursor(response, appointments)
     return appointments
 @router.post("/calls", response_model=schemas.Call)
 def create_call(call: schemas.CallCreate, db: Session = Depends(get_db)):
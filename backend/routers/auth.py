@@ -1,9 +1,13 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from .. import schemas, auth, models
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from .. import schemas, auth, models, async_crud
+from ..database import get_db, get_async_db
+from ..core.exceptions import UnauthorizedException
+from ..core.principal_cache import cache_principal, get_cached_principal, principal_generation
 from ..services.auth_service import UserService
 
 router = APIRouter(
@@ -12,9 +16,13 @@ router = APIRouter(
 )
 
 @router.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     service = UserService(db)
-    return service.register_user(user)
+    # Reject a taken email before spending a slot of the bounded hashing pool on it
+    await run_in_threadpool(service.ensure_email_available, user.email)
+    # Hash on the bounded hashing pool, then run the sync DB work on the regular threadpool
+    hashed_password = await auth.hash_password_async(user.password)
+    return await run_in_threadpool(service.register_user, user, hashed_password)
 
 @router.post("/verify-otp")
 def verify_otp(verification: schemas.OTPVerify, db: Session = Depends(get_db)):
@@ -22,13 +30,21 @@ def verify_otp(verification: schemas.OTPVerify, db: Session = Depends(get_db)):
     return service.verify_otp(verification.email, verification.otp)
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    service = UserService(db)
-    user = service.authenticate_user(form_data.username, form_data.password)
-    
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_email(db, email=form_data.username)
+    valid, new_hash = await auth.verify_and_update_password_async(form_data.password, user.hashed_password if user else None)
+    if not user or not valid:
+        raise UnauthorizedException("Incorrect username or password")
+    if new_hash:
+        # Stored hash used an older cost factor; upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
+
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        subject=user.email, expires_delta=access_token_expires
+        subject=user.email,
+        data={"uid": str(user.id), "role": user.role},
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -46,14 +62,42 @@ def get_current_user(token: str = Depends(auth.oauth2_scheme), db: Session = Dep
         token_data = schemas.TokenData(email=email)
     except auth.JWTError:
         raise credentials_exception
-    
-    # We can keep direct DB access here for performance or move to service
-    # For consistency, let's keep it direct or basic repo get
-    from ..crud import get_user_by_email # Or use repo
-    user = get_user_by_email(db, email=token_data.email)
-    
-    if user is None:
-        raise credentials_exception
+
+    # Tokens issued before the uid/role claims existed are looked up by email
+    user_id = payload.get("uid")
+    cached = get_cached_principal(user_id) if user_id else None
+    if cached is None or cached.role != payload.get("role", cached.role):
+        # Read before loading: an invalidation committed meanwhile makes the new entry stale
+        generation = principal_generation(user_id) if user_id else None
+        cached = load_principal(db, user_id=user_id, email=token_data.email)
+        if cached is None:
+            raise credentials_exception
+        # End the read transaction so its pooled connection goes back before the handler runs;
+        # handlers on get_read_db would otherwise hold two connections for the whole request
+        db.commit()
+        if user_id:
+            cache_principal(user_id, generation, cached)
+
+    # Attach a per-request copy without a SELECT so lazy loads and edits work as before
+    return db.merge(cached, load=False)
+
+def load_principal(db: Session, user_id: str = None, email: str = None):
+    """Load a user and all of its profiles in one query and detach it for caching."""
+    query = db.query(models.User).options(
+        joinedload(models.User.doctor_profile),
+        joinedload(models.User.researcher_profile),
+        joinedload(models.User.patient_profile),
+    )
+    if user_id:
+        query = query.filter(models.User.id == user_id)
+    else:
+        query = query.filter(models.User.email == email)
+    user = query.first()
+    if user is not None:
+        db.expunge(user)
+        for profile in (user.doctor_profile, user.researcher_profile, user.patient_profile):
+            if profile is not None:
+                db.expunge(profile)
     return user
 
 @router.get("/me", response_model=schemas.User)
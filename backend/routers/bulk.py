@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import tempfile
+
+from .. import models
+from ..database import get_db
+from ..core.exceptions import ForbiddenException
+from ..services.bulk_ingest import BulkIngestService, detect_format
+from .auth import get_current_user
+
+router = APIRouter(
+    prefix="/bulk",
+    tags=["bulk"],
+)
+
+# Request bodies larger than this are spooled to a temporary file instead of memory
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+@router.post("/{kind}")
+async def bulk_upload(
+    kind: str,
+    request: Request,
+    format: Optional[str] = None,
+    all_or_nothing: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Load many lab results, visits or prescriptions in one request.
+
+    `kind` is `lab-results`, `visits` or `prescriptions`. The body is NDJSON
+    (default) or CSV (`Content-Type: text/csv` or `?format=csv`); every row must
+    carry the patient's `user_id`.
+    """
+    if current_user.role != "doctor":
+        raise ForbiddenException("Only doctors can upload bulk records")
+    fmt = detect_format(request.headers.get("content-type"), format)
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        report = await run_in_threadpool(BulkIngestService(db).ingest, kind, body, fmt, all_or_nothing)
+
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY if report["rolled_back"] else status.HTTP_200_OK
+    return JSONResponse(status_code=status_code, content=report)
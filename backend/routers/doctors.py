@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from .. import crud, schemas, models
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .auth import get_current_user
-import shutil
-import os
+from ..core.activity_cache import cache_feed, feed_generation, get_cached_feed
+from ..services.derivatives import derivative_urls
+from ..services.uploads import save_upload
 import uuid
 
 router = APIRouter(
@@ -12,15 +13,10 @@ router = APIRouter(
     tags=["doctors"],
 )
 
-# Construct absolute path to backend/static/uploads/doctors
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-UPLOAD_DIR = os.path.join(BASE_DIR, "backend", "static", "uploads", "doctors")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 @router.get("/", response_model=list[schemas.Doctor])
-def read_doctors(skip: int = 0, limit: int = 100, hospital_name: str = None, db: Session = Depends(get_db)):
+def read_doctors(skip: int = 0, limit: int = 100, hospital_name: str = None, db: Session = Depends(get_read_db)):
     doctors = crud.get_doctors(db, skip=skip, limit=limit, hospital_name=hospital_name)
-    return doctors
+    return with_derivatives(db, doctors)
 
 @router.put("/me", response_model=schemas.Doctor)
 def update_doctor_profile(
@@ -58,24 +54,29 @@ def update_doctor_profile(
         doctor_profile.license_number = "PENDING"
         db.commit() # Save the fix immediately
         
-    return crud.update_doctor(db, doctor_profile.id, doctor_update)
+    return with_derivatives(db, [crud.update_doctor(db, doctor_profile.id, doctor_update)])[0]
 
-@router.put("/me/documents", response_model=schemas.Doctor)
-async def update_doctor_documents(
-    medical_degree_proof: UploadFile = File(None),
-    registration_cert: UploadFile = File(None),
-    identity_proof: UploadFile = File(None),
-    professional_photo: UploadFile = File(None),
-    other_certificates: UploadFile = File(None),
-    hospital_name: str = Form(None),
-    hospital_state: str = Form(None),
-    hospital_city: str = Form(None),
-    current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != "doctor":
-        raise HTTPException(status_code=403, detail="Only doctors can update documents")
-    
+# Document fields a doctor can upload (PUT /me/documents or resumable uploads "doctor.<field>")
+DOCUMENT_FIELDS = ("medical_degree_proof", "registration_cert", "identity_proof", "professional_photo", "other_certificates")
+
+def with_derivatives(db: Session, doctors) -> list:
+    """schemas.Doctor for each profile, with thumbnail/preview URLs of its documents looked up in one query."""
+    urls = {getattr(doctor, field) for doctor in doctors for field in DOCUMENT_FIELDS}
+    found = derivative_urls(db, urls - {None})
+    responses = []
+    for doctor in doctors:
+        previews = {}
+        for field in DOCUMENT_FIELDS:
+            preview = found.get(getattr(doctor, field), {}).get("preview")
+            if preview:
+                previews[field] = preview
+        responses.append(schemas.Doctor.model_validate(doctor).model_copy(update={
+            "professional_photo_thumbnail": found.get(doctor.professional_photo, {}).get("thumb"),
+            "document_previews": previews,
+        }))
+    return responses
+
+def get_or_create_doctor_profile(db: Session, current_user, hospital_name=None, hospital_state=None, hospital_city=None):
     doctor_profile = current_user.doctor_profile
     if not doctor_profile:
         # Create profile if missing (Lazy creation)
@@ -92,40 +93,9 @@ async def update_doctor_documents(
         db.add(doctor_profile)
         db.commit()
         db.refresh(doctor_profile)
-        
-    documents = {}
-    
-    async def save_file(file: UploadFile, prefix: str):
-        if file:
-            file_extension = file.filename.split(".")[-1]
-            file_name = f"{prefix}_{doctor_profile.id}_{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(UPLOAD_DIR, file_name)
-            
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            return f"/uploads/doctors/{file_name}"
-        return None
+    return doctor_profile
 
-    if medical_degree_proof:
-        documents["medical_degree_proof"] = await save_file(medical_degree_proof, "degree")
-    if registration_cert:
-        documents["registration_cert"] = await save_file(registration_cert, "reg_cert")
-    if identity_proof:
-        documents["identity_proof"] = await save_file(identity_proof, "id_proof")
-    if professional_photo:
-        documents["professional_photo"] = await save_file(professional_photo, "photo")
-    if other_certificates:
-        documents["other_certificates"] = await save_file(other_certificates, "other")
-        
-    hospital_details = {}
-    if hospital_name:
-        hospital_details["hospital_name"] = hospital_name
-    if hospital_state:
-        hospital_details["hospital_state"] = hospital_state
-    if hospital_city:
-        hospital_details["hospital_city"] = hospital_city
-        
+def attach_doctor_documents(db: Session, doctor_profile, documents: dict, hospital_details: dict = None):
     updated_doctor = crud.update_doctor_documents(db, doctor_profile.id, documents, hospital_details)
     
     # Check if all required documents are present to auto-verify
@@ -146,103 +116,80 @@ async def update_doctor_documents(
         
     return updated_doctor
 
-@router.get("/me/recent-activity")
-def get_doctor_recent_activity(
+@router.put("/me/documents", response_model=schemas.Doctor)
+async def update_doctor_documents(
+    medical_degree_proof: UploadFile = File(None),
+    registration_cert: UploadFile = File(None),
+    identity_proof: UploadFile = File(None),
+    professional_photo: UploadFile = File(None),
+    other_certificates: UploadFile = File(None),
+    hospital_name: str = Form(None),
+    hospital_state: str = Form(None),
+    hospital_city: str = Form(None),
     current_user: schemas.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role != "doctor":
-        raise HTTPException(status_code=403, detail="Only doctors have activity feeds")
-    
-    doctor_name = current_user.full_name
-    
-    # 1. Get Recent Appointments
-    appointments = crud.get_doctor_appointments(db, doctor_name=doctor_name, limit=10)
+        raise HTTPException(status_code=403, detail="Only doctors can update documents")
     
-    # 2. Get Recent Prescriptions
-    prescriptions = crud.get_doctor_prescriptions(db, doctor_name=doctor_name, limit=10)
+    doctor_profile = get_or_create_doctor_profile(db, current_user, hospital_name, hospital_state, hospital_city)
+    documents = {}
     
-    # 3. Get Recent Patients (Same Hospital)
-    # We use crud.get_patients but need to sort by created_at. 
-    # Current crud.get_patients doesn't support sorting by created_at easily without mod.
-    # Let's do a direct query here or add a helper. Direct query is fine for this specific composite view.
-    hospital_name = current_user.hospital_name
-    new_patients = []
-    if hospital_name:
-        new_patients = db.query(models.User).filter(
-            models.User.role == "patient",
-            models.User.hospital_name == hospital_name
-        ).order_by(models.User.created_at.desc()).limit(5).all()
-    else:
-        # If no hospital affiliation, maybe just show globally recent? Or none?
-        # Let's show globally recent for now to be safe, or maybe skip.
-        # Skipping is safer to avoid data leak, but for this demo user probably wants to see *something*.
-        # Let's limit to patients they have seen? No, "New Patient Added" implies registration.
-        # Let's fallback to global but small limit.
-        new_patients = db.query(models.User).filter(models.User.role == "patient").order_by(models.User.created_at.desc()).limit(5).all()
+    async def save_file(file: UploadFile, field: str):
+        if file:
+            stored = await save_upload(db, file, user_id=current_user.id, purpose=f"doctor.{field}")
+            return stored.url
+        return None
 
-    # 4. Normalize and Merge
-    activity = []
-    
-    for pat in new_patients:
-        # Only show if created recently (e.g. last 7 days? or just take top 5)
-        # We take top 5 regardless of time for the feed.
-        activity.append({
-            "type": "alert", # Use alert or user-plus icon
-            "patient": pat.full_name,
-            "desc": "New patient registered",
-            "time": pat.created_at,
-            "timestamp": pat.created_at.timestamp() if pat.created_at else 0
-        })
-    
-    for appt in appointments:
-        pat = crud.get_user(db, appt.user_id)
-        patient_name = pat.full_name if pat else "Unknown"
-        activity.append({
-            "type": "appointment",
-            "patient": patient_name,
-            "desc": f"{appt.appointment_type} appointment ({appt.status})",
-            "time": appt.appointment_date, # This is a datetime object
-            "timestamp": appt.appointment_date.timestamp()
-        })
-        
-    for pres in prescriptions:
-        pat = crud.get_user(db, pres.user_id)
-        patient_name = pat.full_name if pat else "Unknown"
-        # Prescription dates are Dates, not Datetimes, so we convert for sorting
-        ts = 0.0
-        # Combine start_date with current time or midnight for rough sorting if specific time unavailable
-        # But 'created_at' would be better if available. Let's check model.
-        # Prescription model has 'created_at'. Use that!
-        
-        created_at = pres.created_at
+    if medical_degree_proof:
+        documents["medical_degree_proof"] = await save_file(medical_degree_proof, "medical_degree_proof")
+    if registration_cert:
+        documents["registration_cert"] = await save_file(registration_cert, "registration_cert")
+    if identity_proof:
+        documents["identity_proof"] = await save_file(identity_proof, "identity_proof")
+    if professional_photo:
+        documents["professional_photo"] = await save_file(professional_photo, "professional_photo")
+    if other_certificates:
+        documents["other_certificates"] = await save_file(other_certificates, "other_certificates")
         
-        activity.append({
-            "type": "report", # Using 'report' icon/style for prescription for now, or could map 'prescription' in frontend
-            "patient": patient_name,
-            "desc": f"Prescribed: {pres.drug_name} ({pres.dosage})",
-            "time": created_at,
-            "timestamp": created_at.timestamp() if created_at else 0
-        })
+    hospital_details = {}
+    if hospital_name:
+        hospital_details["hospital_name"] = hospital_name
+    if hospital_state:
+        hospital_details["hospital_state"] = hospital_state
+    if hospital_city:
+        hospital_details["hospital_city"] = hospital_city
         
-    # 4. Sort by timestamp descending
-    activity.sort(key=lambda x: x["timestamp"], reverse=True)
-    
-    # 5. Take top 10
-    recent_activity = activity[:10]
+    return with_derivatives(db, [attach_doctor_documents(db, doctor_profile, documents, hospital_details)])[0]
+
+@router.get("/me/recent-activity")
+def get_doctor_recent_activity(
+    current_user: schemas.User = Depends(get_current_user),
+    # The primary, not a replica: a lagging replica read would be cached under the new generation
+    db: Session = Depends(get_db)
+):
+    if current_user.role != "doctor":
+        raise HTTPException(status_code=403, detail="Only doctors have activity feeds")
     
-    return recent_activity
+    hospital_name = current_user.hospital_name
+    feed = get_cached_feed(current_user.id, hospital_name)
+    if feed is None:
+        # Read the generation first so a write committed while the query runs is not masked
+        generation = feed_generation(current_user.id, hospital_name)
+        feed = crud.get_doctor_activity_feed(db, doctor_id=current_user.id, hospital_name=hospital_name)
+        cache_feed(current_user.id, hospital_name, generation, feed)
+    return feed
 
 @router.get("/me/dashboard-stats")
 def get_doctor_dashboard_stats(
     current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if current_user.role != "doctor":
         raise HTTPException(status_code=403, detail="Only doctors have dashboard stats")
     
     return crud.get_doctor_dashboard_stats(
         db, 
-        doctor_name=current_user.full_name,
+        doctor_id=current_user.id,
         hospital_name=current_user.hospital_name
     )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import get_read_db
+from ..services.storage import get_storage
+
+router = APIRouter(
+    prefix="/files",
+    tags=["files"],
+)
+
+@router.get("/{sha256}")
+def read_file(sha256: str, db: Session = Depends(get_read_db)):
+    """Redirect to a stored blob: a short-lived presigned URL on S3, the /uploads path on local storage."""
+    blob = db.get(models.StoredBlob, sha256.lower())
+    if blob is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return RedirectResponse(get_storage().download_url(blob.storage_key), status_code=307)
+
+@router.get("/{sha256}/{derivative}")
+def read_derivative(sha256: str, derivative: str, db: Session = Depends(get_read_db)):
+    """Redirect to a thumbnail or preview of a stored blob (services/derivatives.py)."""
+    blob = db.get(models.StoredBlob, sha256.lower())
+    key = (blob.derivatives or {}).get(derivative) if blob is not None else None
+    if key is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return RedirectResponse(get_storage().download_url(key), status_code=307)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
 
-from .. import crud, schemas
-from ..database import get_db
+from .. import crud, async_crud, schemas
+from ..database import get_db, get_async_db, get_async_read_db
+from ..core.pagination import set_next_cursor
 
 router = APIRouter(
     prefix="/notifications",
@@ -12,8 +14,10 @@ router = APIRouter(
 )
 
 @router.get("/{user_id}", response_model=List[schemas.Notification])
-def get_notifications(user_id: UUID, skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
-    return crud.get_user_notifications(db, user_id=user_id, skip=skip, limit=limit)
+async def get_notifications(response: Response, user_id: UUID, cursor: Optional[str] = None, limit: int = 20, db: AsyncSession = Depends(get_async_read_db)):
+    page = await async_crud.get_user_notifications(db, user_id=user_id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.patch("/{notification_id}/read", response_model=schemas.Notification)
 def mark_read(notification_id: UUID, db: Session = Depends(get_db)):
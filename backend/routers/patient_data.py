@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from .. import crud, schemas, models
-from ..database import get_db
+from .. import crud, async_crud, schemas, models
+from ..database import get_db, get_async_db, get_read_db
 from ..routers.auth import get_current_user
-import shutil
-import os
-import uuid
+from ..core.pagination import set_next_cursor
 import json
 from .video import manager
+from ..services.uploads import save_upload
 
 router = APIRouter(
     prefix="/patient-data",
@@ -16,18 +16,18 @@ router = APIRouter(
 )
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...), current_user: models.User = Depends(get_current_user)):
+async def upload_file(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     try:
-        # Create a unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = f"backend/static/uploads/{unique_filename}"
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
+        # Stored by content hash, so re-uploading the same report reuses the stored copy
+        stored = await save_upload(db, file, user_id=current_user.id, purpose="patient.document")
         # Return the URL (relative to the server root)
-        return {"url": f"/static/uploads/{unique_filename}"}
+        return {"url": stored.url}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
 
@@ -36,8 +36,10 @@ async def upload_file(file: UploadFile = File(...), current_user: models.User =
 # -------------------------
 
 @router.get("/visits", response_model=List[schemas.HospitalVisit])
-def read_visits(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_hospital_visits(db, user_id=current_user.id, skip=skip, limit=limit)
+def read_visits(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
+    page = crud.get_hospital_visits(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/visits", response_model=schemas.HospitalVisit)
 def create_visit(visit: schemas.HospitalVisitCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -52,18 +54,21 @@ def create_visit(visit: schemas.HospitalVisitCreate, db: Session = Depends(get_d
 # -------------------------
 
 @router.get("/prescriptions", response_model=List[schemas.Prescription])
-def read_prescriptions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_prescriptions(db, user_id=current_user.id, skip=skip, limit=limit)
+def read_prescriptions(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
+    page = crud.get_prescriptions(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/prescriptions", response_model=schemas.Prescription)
-async def create_prescription(prescription: schemas.PrescriptionCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def create_prescription(prescription: schemas.PrescriptionCreate, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(get_current_user)):
     if not prescription.user_id:
         prescription.user_id = current_user.id
     # Auto-fill prescribing doctor if user is a doctor
     if current_user.role == 'doctor':
         prescription.prescribing_doctor = current_user.full_name
+        prescription.doctor_id = current_user.id
         
-    db_prescription = crud.create_prescription(db=db, prescription=prescription)
+    db_prescription = await async_crud.create_prescription(db=db, prescription=prescription)
     
     # Notify patient
     notif_data = schemas.NotificationCreate(
@@ -73,7 +78,7 @@ async def create_prescription(prescription: schemas.PrescriptionCreate, db: Sess
         type="prescription",
         link="/prescriptions"
     )
-    db_notif = crud.create_notification(db, notif_data)
+    db_notif = await async_crud.create_notification(db, notif_data)
     
     # Real-time signaling
     await manager.notify_user(str(db_prescription.user_id), json.dumps({
@@ -96,8 +101,10 @@ async def create_prescription(prescription: schemas.PrescriptionCreate, db: Sess
 # -------------------------
 
 @router.get("/allergies", response_model=List[schemas.Allergy])
-def read_allergies(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_allergies(db, user_id=current_user.id, skip=skip, limit=limit)
+def read_allergies(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
+    page = crud.get_allergies(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/allergies", response_model=schemas.Allergy)
 def create_allergy(allergy: schemas.AllergyCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -110,8 +117,10 @@ def create_allergy(allergy: schemas.AllergyCreate, db: Session = Depends(get_db)
 # -------------------------
 
 @router.get("/lab-results", response_model=List[schemas.LabResult])
-def read_lab_results(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_lab_results(db, user_id=current_user.id, skip=skip, limit=limit)
+def read_lab_results(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
+    page = crud.get_lab_results(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/lab-results", response_model=schemas.LabResult)
 def create_lab_result(result: schemas.LabResultCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -124,8 +133,10 @@ def create_lab_result(result: schemas.LabResultCreate, db: Session = Depends(get
 # -------------------------
 
 @router.get("/insurance", response_model=List[schemas.InsurancePolicy])
-def read_insurance(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_insurance_policies(db, user_id=current_user.id, skip=skip, limit=limit)
+def read_insurance(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
+    page = crud.get_insurance_policies(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/insurance", response_model=schemas.InsurancePolicy)
 def create_insurance(policy: schemas.InsurancePolicyCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -134,8 +145,10 @@ def create_insurance(policy: schemas.InsurancePolicyCreate, db: Session = Depend
     return crud.create_insurance_policy(db=db, policy=policy)
 
 @router.get("/claims", response_model=List[schemas.Claim])
-def read_claims(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_claims(db, user_id=current_user.id, skip=skip, limit=limit)
+def read_claims(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
+    page = crud.get_claims(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/claims", response_model=schemas.Claim)
 def create_claim(claim: schemas.ClaimCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -148,19 +161,23 @@ def create_claim(claim: schemas.ClaimCreate, db: Session = Depends(get_db), curr
 # -------------------------
 
 @router.get("/appointments", response_model=List[schemas.Appointment])
-def read_appointments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_appointments(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
     if current_user.role == 'doctor':
         hospital_name = None
         if current_user.doctor_profile:
             hospital_name = current_user.doctor_profile.hospital_name
-        return crud.get_doctor_appointments(db, doctor_name=current_user.full_name, hospital_name=hospital_name, skip=skip, limit=limit)
-    return crud.get_user_appointments(db, user_id=current_user.id, skip=skip, limit=limit)
+        page = crud.get_doctor_appointments(db, doctor_id=current_user.id, hospital_name=hospital_name, cursor=cursor, limit=limit)
+        set_next_cursor(response, page)
+        return page
+    page = crud.get_user_appointments(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.post("/appointments", response_model=schemas.Appointment)
-async def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def create_appointment(appointment: schemas.AppointmentCreate, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(get_current_user)):
     if not appointment.user_id:
         appointment.user_id = current_user.id
-    db_appointment = crud.create_appointment(db=db, appointment=appointment)
+    db_appointment = await async_crud.create_appointment(db=db, appointment=appointment)
     
     # Notify patient
     notif_data = schemas.NotificationCreate(
@@ -170,7 +187,7 @@ async def create_appointment(appointment: schemas.AppointmentCreate, db: Session
         type="appointment",
         link="/appointments"
     )
-    db_notif = crud.create_notification(db, notif_data)
+    db_notif = await async_crud.create_notification(db, notif_data)
     
     # Real-time signaling
     await manager.notify_user(str(db_appointment.user_id), json.dumps({
@@ -210,7 +227,7 @@ async def update_appointment_status(
     id: str,
     status: Optional[str] = None,
     status_update: Optional[AppointmentStatusUpdate] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
     # Accept status from query param OR request body
@@ -218,7 +235,7 @@ async def update_appointment_status(
     if not final_status:
         raise HTTPException(status_code=422, detail="status is required")
     
-    appointment = crud.update_appointment_status(db, appointment_id=id, status=final_status)
+    appointment = await async_crud.update_appointment_status(db, appointment_id=id, status=final_status)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
@@ -234,7 +251,7 @@ async def update_appointment_status(
             treatment_summary=appointment.notes,
             insurance_claim_status="Pending"
         )
-        crud.create_hospital_visit(db=db, visit=visit_data)
+        await async_crud.create_hospital_visit(db=db, visit=visit_data)
         
         notif_data = schemas.NotificationCreate(
             user_id=appointment.user_id,
@@ -243,7 +260,7 @@ async def update_appointment_status(
             type="appointment",
             link="/history"
         )
-        db_notif = crud.create_notification(db, notif_data)
+        db_notif = await async_crud.create_notification(db, notif_data)
         await manager.notify_user(str(appointment.user_id), json.dumps({
             "type": "GENERAL_NOTIFICATION",
             "notification": {
@@ -267,26 +284,34 @@ async def update_appointment_status(
 # -------------------------
 
 @router.get("/{patient_id}/lab-results", response_model=List[schemas.LabResult])
-def read_patient_lab_results(patient_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_patient_lab_results(response: Response, patient_id: str, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
     if current_user.role != 'doctor':
         raise HTTPException(status_code=403, detail="Not authorized to view patient data")
-    return crud.get_lab_results(db, user_id=patient_id, skip=skip, limit=limit)
+    page = crud.get_lab_results(db, user_id=patient_id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.get("/{patient_id}/prescriptions", response_model=List[schemas.Prescription])
-def read_patient_prescriptions(patient_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_patient_prescriptions(response: Response, patient_id: str, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
     if current_user.role != 'doctor':
         raise HTTPException(status_code=403, detail="Not authorized to view patient data")
-    return crud.get_prescriptions(db, user_id=patient_id, skip=skip, limit=limit)
+    page = crud.get_prescriptions(db, user_id=patient_id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.get("/{patient_id}/visits", response_model=List[schemas.HospitalVisit])
-def read_patient_visits(patient_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_patient_visits(response: Response, patient_id: str, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
     if current_user.role != 'doctor':
         raise HTTPException(status_code=403, detail="Not authorized to view patient data")
-    return crud.get_hospital_visits(db, user_id=patient_id, skip=skip, limit=limit)
+    page = crud.get_hospital_visits(db, user_id=patient_id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
 @router.get("/{patient_id}/allergies", response_model=List[schemas.Allergy])
-def read_patient_allergies(patient_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_patient_allergies(response: Response, patient_id: str, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
     if current_user.role != 'doctor':
         raise HTTPException(status_code=403, detail="Not authorized to view patient data")
-    return crud.get_allergies(db, user_id=patient_id, skip=skip, limit=limit)
+    page = crud.get_allergies(db, user_id=patient_id, cursor=cursor, limit=limit)
+    set_next_cursor(response, page)
+    return page
 
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 import logging
 
 from .. import crud, models, schemas
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .auth import get_current_user
+from ..core.pagination import set_next_cursor
 
 logger = logging.getLogger("medical_backend")
 
@@ -17,16 +18,17 @@ router = APIRouter(
 
 @router.get("/", response_model=List[schemas.User])
 def read_patients(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: schemas.User = Depends(get_current_user),
 ):
-    doctor_name_filter: Optional[str] = None
+    doctor_id_filter: Optional[UUID] = None
     hospital_filter: Optional[str] = None  # ← fix: always initialized
     
     if current_user.role == "doctor":
-        doctor_name_filter = current_user.full_name
+        doctor_id_filter = current_user.id
         try:
              dp = getattr(current_user, "doctor_profile", None)
              if dp and getattr(dp, "hospital_name", None):
@@ -35,7 +37,8 @@ def read_patients(
              pass
 
     limit = min(limit, 500)
-    patients = crud.get_patients(db, skip=skip, limit=limit, hospital_name=hospital_filter, doctor_name=doctor_name_filter)
+    patients = crud.get_patients(db, cursor=cursor, limit=limit, hospital_name=hospital_filter, doctor_id=doctor_id_filter)
+    set_next_cursor(response, patients)
     return patients
 
 
@@ -101,6 +104,32 @@ def update_my_patient_profile(
     return profile
 
 
+@router.get("/{patient_id}/chart", response_model=schemas.PatientChart)
+def get_patient_chart(
+    patient_id: UUID,
+    # Same as the per-section endpoints, so refreshing one section after an edit shows the same rows
+    lab_results_limit: int = 100,
+    prescriptions_limit: int = 100,
+    visits_limit: int = 20,
+    allergies_limit: int = 50,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    """Everything the patient details view needs in one response; each section is newest first."""
+    if current_user.role not in ("doctor", "admin") and current_user.id != patient_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+    chart = crud.get_patient_chart(db, patient_id, limits={
+        "lab_results": lab_results_limit,
+        "prescriptions": prescriptions_limit,
+        "visits": visits_limit,
+        "allergies": allergies_limit,
+    })
+    if chart is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
+    return chart
+
+
 @router.get("/{patient_id}/profile", response_model=schemas.PatientProfileResponse)
 def get_patient_profile_by_id(
     patient_id: UUID,
@@ -1,24 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import os
-import shutil
 from .. import crud, schemas, models
-from ..database import get_db
+from ..database import get_db, get_read_db
 
 from .auth import get_current_user
+from ..services.uploads import save_upload
 import uuid
 
-UPLOAD_DIR = "static/uploads/researchers"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 router = APIRouter(
     prefix="/researchers",
     tags=["researchers"],
 )
 
 @router.get("/", response_model=List[schemas.Researcher])
-def read_researchers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_researchers(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     researchers = crud.get_researchers(db, skip=skip, limit=limit)
     return researchers
 
@@ -50,6 +46,9 @@ def update_researcher_profile(
         
     return crud.update_researcher(db, researcher_profile.id, researcher_update)
 
+# Document fields a researcher can upload (PUT /me/documents or resumable uploads "researcher.<field>")
+DOCUMENT_FIELDS = ("thesis_url", "cv_url", "other_docs_url")
+
 @router.put("/me/documents", response_model=schemas.Researcher)
 async def upload_documents(
     thesis: Optional[UploadFile] = File(None),
@@ -66,21 +65,15 @@ async def upload_documents(
     
     for file_obj, field_name in [(thesis, "thesis_url"), (cv, "cv_url"), (other_docs, "other_docs_url")]:
         if file_obj:
-            file_ext = os.path.splitext(file_obj.filename)[1]
-            file_name = f"{researcher_id}_{field_name}{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, file_name)
-            
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file_obj.file, buffer)
-            
-            docs_to_update[field_name] = f"/static/uploads/researchers/{file_name}"
+            stored = await save_upload(db, file_obj, user_id=current_user.id, purpose=f"researcher.{field_name}")
+            docs_to_update[field_name] = stored.url
 
     return crud.update_researcher_documents(db, researcher_id, docs_to_update)
 
 @router.get("/me/dashboard-stats", response_model=schemas.ResearcherDashboardStats)
 def get_researcher_stats(
     current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if current_user.role != "researcher":
         raise HTTPException(status_code=403, detail="Only researchers can access dashboard stats")
@@ -120,7 +113,7 @@ def add_project(
 @router.get("/me/trials", response_model=List[schemas.ClinicalTrial])
 def get_my_trials(
     current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if current_user.role != "researcher" or not current_user.researcher_profile:
          raise HTTPException(status_code=403, detail="Not authorized")
@@ -129,7 +122,7 @@ def get_my_trials(
 @router.get("/me/projects", response_model=List[schemas.ResearchProject])
 def get_my_projects(
     current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if current_user.role != "researcher" or not current_user.researcher_profile:
          raise HTTPException(status_code=403, detail="Not authorized")
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from .. import crud, schemas
+from ..database import get_db
+from ..services import resumable_uploads
+from . import doctors, researchers
+from .auth import get_current_user
+
+# Not under /uploads: that prefix is the static files mount
+router = APIRouter(
+    prefix="/resumable-uploads",
+    tags=["uploads"],
+)
+
+OFFSET_HEADER = "Upload-Offset"
+
+
+def _check_purpose(purpose: str, current_user):
+    """Same rules as the multipart endpoints: anyone may upload a patient document, profiles need their role."""
+    if purpose == "patient.document":
+        return
+    kind, _, field = purpose.partition(".")
+    if kind == "doctor" and field in doctors.DOCUMENT_FIELDS:
+        if current_user.role != "doctor":
+            raise HTTPException(status_code=403, detail="Only doctors can update documents")
+        return
+    if kind == "researcher" and field in researchers.DOCUMENT_FIELDS:
+        if current_user.role != "researcher" or not current_user.researcher_profile:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        return
+    raise HTTPException(status_code=400, detail=f"Unknown upload purpose: {purpose}")
+
+
+@router.post("/", response_model=schemas.ResumableUpload, status_code=status.HTTP_201_CREATED)
+def create_upload(
+    upload: schemas.ResumableUploadCreate,
+    response: Response,
+    current_user: schemas.User = Depends(get_current_user),
+):
+    """Start an upload; send the bytes with PATCH, then POST .../finalize."""
+    _check_purpose(upload.purpose, current_user)
+    created = resumable_uploads.create_upload(
+        current_user.id, upload.purpose, upload.filename, upload.size, upload.content_type,
+    )
+    response.headers["Location"] = f"{router.prefix}/{created['id']}"
+    response.headers[OFFSET_HEADER] = "0"
+    return created
+
+
+@router.get("/{upload_id}", response_model=schemas.ResumableUpload)
+def read_upload(upload_id: str, response: Response, current_user: schemas.User = Depends(get_current_user)):
+    """How many bytes have been received; resume from `offset` after an interrupted PATCH."""
+    current = resumable_uploads.upload_status(upload_id, current_user.id)
+    response.headers[OFFSET_HEADER] = str(current["offset"])
+    return current
+
+
+@router.patch("/{upload_id}", response_model=schemas.ResumableUpload)
+async def append_to_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias=OFFSET_HEADER),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    """Append the raw request body at `Upload-Offset`, which must match the bytes received so far (409 otherwise)."""
+    current = await resumable_uploads.append_chunk(request, upload_id, current_user.id, upload_offset)
+    response.headers[OFFSET_HEADER] = str(current["offset"])
+    return current
+
+
+@router.post("/{upload_id}/finalize", response_model=schemas.ResumableUploadResult)
+def finalize_upload(
+    upload_id: str,
+    current_user: schemas.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Store a complete upload and, for profile documents, attach it to the profile."""
+    # The role or profile may have changed since the upload was created; checked before storing
+    # so a 403 leaves the upload in place
+    meta = resumable_uploads.load_upload(upload_id, current_user.id)
+    _check_purpose(meta["purpose"], current_user)
+    meta, stored = resumable_uploads.finalize_upload(db, upload_id, current_user.id)
+    kind, _, field = meta["purpose"].partition(".")
+    if kind == "doctor":
+        doctor_profile = doctors.get_or_create_doctor_profile(db, current_user)
+        doctors.attach_doctor_documents(db, doctor_profile, {field: stored.url})
+    elif kind == "researcher":
+        crud.update_researcher_documents(db, current_user.researcher_profile.id, {field: stored.url})
+    return {"url": stored.url, "sha256": stored.sha256, "size": stored.size, "deduplicated": stored.deduplicated}
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_upload(upload_id: str, current_user: schemas.User = Depends(get_current_user)):
+    resumable_uploads.load_upload(upload_id, current_user.id)
+    resumable_uploads.delete_upload(upload_id)
@@ -0,0 +1,62 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from .. import auth
+from ..database import get_db, get_pool_status, get_replica_status
+from ..core.logger import logging_stats
+from ..core.metrics import CONTENT_TYPE, render_metrics
+from ..core.password_hashing import HASHING_POOL
+from ..core.startup import STARTUP
+from .auth import get_current_user
+
+# Lets a metrics scraper in without a user account: send it as `Authorization: Bearer <token>`
+SYSTEM_API_TOKEN = os.getenv("SYSTEM_API_TOKEN")
+
+
+def require_system_access(token: str = Depends(auth.oauth2_scheme), db: Session = Depends(get_db)):
+    """Worker internals are for admins, or whoever holds SYSTEM_API_TOKEN."""
+    if SYSTEM_API_TOKEN and hmac.compare_digest(token.encode(), SYSTEM_API_TOKEN.encode()):
+        return
+    if get_current_user(token, db).role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+
+router = APIRouter(
+    prefix="/system",
+    tags=["system"],
+    dependencies=[Depends(require_system_access)],
+)
+
+@router.get("/db-pool")
+def read_db_pool_status():
+    """Pool occupancy and checkout telemetry for this worker process."""
+    return get_pool_status()
+
+@router.get("/db-replica")
+def read_db_replica_status():
+    """Replica lag and how many reads were routed to it or fell back to the primary."""
+    return get_replica_status()
+
+@router.get("/password-hashing")
+def read_password_hashing_status():
+    """Queue depth and timings of the bcrypt worker pool."""
+    return HASHING_POOL.stats()
+
+@router.get("/logging")
+def read_logging_status():
+    """Log records waiting for the writer thread and how many were dropped because it fell behind."""
+    return logging_stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Prometheus text exposition: request latency, DB usage, pool, websocket and agent metrics for this worker."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+@router.get("/startup")
+def read_startup_report():
+    """How long this worker took to import the app and run each start-up step."""
+    return STARTUP.snapshot()
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
 from .. import crud, models, schemas
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .auth import get_current_user
+from ..core.pagination import set_next_cursor
 import logging
 
 logger = logging.getLogger("medical_backend")
@@ -24,15 +25,16 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_users(response: Response, cursor: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db)):
     # clamp limit to prevent abuse
     limit = min(limit, 500)
-    users = crud.get_users(db, skip=skip, limit=limit)
+    users = crud.get_users(db, cursor=cursor, limit=limit)
+    set_next_cursor(response, users)
     return users
 
 
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: UUID, db: Session = Depends(get_db)):
+def read_user(user_id: UUID, db: Session = Depends(get_read_db)):
     # typed user_id prevents accidental string IDs
     db_user = crud.get_user(db, user_id=str(user_id))
     if db_user is None:
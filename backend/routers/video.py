@@ -2,6 +2,8 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import List, Dict
 import json
 
+from ..core.metrics import REGISTRY
+
 router = APIRouter(
     prefix="/ws",
     tags=["video-call"]
@@ -46,7 +48,16 @@ class ConnectionManager:
         if user_id in self.notifications:
             await self.notifications[user_id].send_text(message)
 
+    def metric_families(self):
+        room_sockets = sum(len(conns) for conns in list(self.active_connections.values()))
+        return [
+            ("ws_active_rooms", "gauge", "Video call rooms with at least one open socket.", [({}, len(self.active_connections))]),
+            ("ws_room_connections", "gauge", "Open video call sockets across all rooms.", [({}, room_sockets)]),
+            ("ws_notification_connections", "gauge", "Open personal notification sockets.", [({}, len(self.notifications))]),
+        ]
+
 manager = ConnectionManager()
+REGISTRY.register_collector(manager.metric_families)
 
 @router.websocket("/call/{room_id}/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, room_id: str, user_id: str):
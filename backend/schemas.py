@@ -1,6 +1,6 @@
 # schemas.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from uuid import UUID
 
@@ -74,6 +74,9 @@ class Doctor(DoctorBase):
     hospital_state: Optional[str] = None
     hospital_city: Optional[str] = None
     full_name: Optional[str] = None
+    # Small renditions of the uploads above, null until generated (services/derivatives.py)
+    professional_photo_thumbnail: Optional[str] = None
+    document_previews: Dict[str, str] = {}
 
     class Config:
         from_attributes = True
@@ -313,10 +316,12 @@ class AppointmentBase(BaseModel):
 
 class AppointmentCreate(AppointmentBase):
     user_id: Optional[UUID] = None
+    doctor_id: Optional[UUID] = None
 
 class Appointment(AppointmentBase):
     id: UUID
     user_id: UUID
+    doctor_id: Optional[UUID] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -364,11 +369,13 @@ class PrescriptionBase(BaseModel):
 class PrescriptionCreate(PrescriptionBase):
     user_id: Optional[UUID] = None
     visit_id: Optional[UUID] = None
+    doctor_id: Optional[UUID] = None
 
 class Prescription(PrescriptionBase):
     id: UUID
     user_id: UUID
     visit_id: Optional[UUID] = None
+    doctor_id: Optional[UUID] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -518,3 +525,43 @@ class Notification(NotificationBase):
 
     class Config:
         from_attributes = True
+
+# -------------------------
+# PATIENT CHART SCHEMAS
+# -------------------------
+
+class PatientChart(BaseModel):
+    patient: User
+    profile: Optional[PatientProfileResponse] = None
+    lab_results: List[LabResult] = []
+    prescriptions: List[Prescription] = []
+    visits: List[HospitalVisit] = []
+    allergies: List[Allergy] = []
+    # Section name -> cursor for the matching /patient-data/{id}/<section> endpoint (None when complete)
+    next_cursors: Dict[str, Optional[str]] = {}
+
+# -------------------------
+# RESUMABLE UPLOAD SCHEMAS
+# -------------------------
+
+class ResumableUploadCreate(BaseModel):
+    filename: str
+    size: int
+    # "patient.document", "doctor.<document field>" or "researcher.<document field>"
+    purpose: str = "patient.document"
+    content_type: Optional[str] = None
+
+class ResumableUpload(BaseModel):
+    id: str
+    filename: str
+    purpose: str
+    size: int
+    offset: int
+    chunk_size: int
+    expires_at: datetime
+
+class ResumableUploadResult(BaseModel):
+    url: str
+    sha256: str
+    size: int
+    deduplicated: bool
@@ -14,14 +14,18 @@ class UserService:
         self.repo = BaseRepository(models.User, db)
         self.otp_repo = BaseRepository(models.OTP, db)
 
-    def register_user(self, user_in: schemas.UserCreate) -> models.User:
-        # Check if email exists
-        existing_user = self.db.query(models.User).filter(models.User.email == user_in.email).first()
+    def ensure_email_available(self, email: str) -> None:
+        existing_user = self.db.query(models.User).filter(models.User.email == email).first()
         if existing_user:
             raise exceptions.BadRequestException("Email already registered")
 
-        # Hash Password
-        hashed_password = auth_utils.get_password_hash(user_in.password)
+    def register_user(self, user_in: schemas.UserCreate, hashed_password: Optional[str] = None) -> models.User:
+        # Check if email exists
+        self.ensure_email_available(user_in.email)
+
+        # Hash Password (async callers hash up front on the hashing pool)
+        if hashed_password is None:
+            hashed_password = auth_utils.get_password_hash(user_in.password)
 
         # Prepare data
         user_data = user_in.dict(exclude={"password"})
@@ -92,10 +96,13 @@ class UserService:
 
     def authenticate_user(self, email: str, password: str) -> models.User:
         user = self.db.query(models.User).filter(models.User.email == email).first()
-        if not user:
-            raise exceptions.UnauthorizedException("Incorrect username or password")
-        if not auth_utils.verify_password(password, user.hashed_password):
+        valid, new_hash = auth_utils.verify_and_update_password(password, user.hashed_password if user else None)
+        if not user or not valid:
             raise exceptions.UnauthorizedException("Incorrect username or password")
+        if new_hash:
+            # Stored hash used an older cost factor; upgrade it transparently
+            user.hashed_password = new_hash
+            self.db.commit()
         return user
 
     def verify_otp(self, email: str, otp: str):
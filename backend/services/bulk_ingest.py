@@ -0,0 +1,209 @@
+"""
+Bulk loading of lab results, hospital visits and prescriptions.
+
+Uploads are NDJSON (one JSON object per line) or CSV with a header row. Rows
+are read and validated one at a time against the regular `*Create` schemas
+and written in chunks inside a single transaction. On Postgres each chunk is
+loaded with `COPY ... FROM STDIN`; other databases use a multi-row INSERT.
+
+Invalid rows (schema errors, unknown patients or visits) are skipped and
+reported with their 1-based row number. With `all_or_nothing` any invalid
+row rolls the whole upload back instead.
+"""
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from backend import crud, models, schemas
+from backend.core import exceptions
+
+CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", "5000"))
+MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))
+MAX_REPORTED_ERRORS = 1000
+
+# upload kind -> (model, schema used to validate each row)
+KINDS = {
+    "lab-results": (models.LabResult, schemas.LabResultCreate),
+    "visits": (models.HospitalVisit, schemas.HospitalVisitCreate),
+    "prescriptions": (models.Prescription, schemas.PrescriptionCreate),
+}
+
+FORMATS = {"ndjson", "csv"}
+
+
+def detect_format(content_type: str = None, requested: str = None) -> str:
+    if requested:
+        if requested not in FORMATS:
+            raise exceptions.BadRequestException(f"Unsupported format '{requested}', expected one of: ndjson, csv")
+        return requested
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+def iter_rows(fileobj: IO[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield (row_number, dict) pairs; unparsable rows yield the parse error message instead of a dict."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            # Empty cells mean "not provided" so schema defaults apply
+            yield number, {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, f"Invalid JSON: {exc}"
+            continue
+        yield number, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+def _copy_value(value) -> str:
+    # Unquoted empty field is NULL in COPY's CSV format; everything else is quoted
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class BulkIngestService:
+    def __init__(self, db: Session):
+        self.db = db
+        self._doctor_ids: Dict[str, Optional[uuid.UUID]] = {}
+        self._known_doctors: Dict[uuid.UUID, bool] = {}
+
+    def ingest(self, kind: str, fileobj: IO[bytes], fmt: str, all_or_nothing: bool = False) -> dict:
+        if kind not in KINDS:
+            raise exceptions.EntityNotFoundException(f"Unknown bulk upload type '{kind}'")
+        model, schema = KINDS[kind]
+        columns = [c.name for c in model.__table__.columns if c.name not in ("created_at", "updated_at")]
+
+        started = time.perf_counter()
+        received = inserted = failed = 0
+        errors: List[dict] = []
+
+        def fail(number, problems):
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": number, "errors": problems})
+
+        chunk: List[Tuple[int, dict]] = []
+        try:
+            for number, raw in iter_rows(fileobj, fmt):
+                received += 1
+                if received > MAX_ROWS:
+                    raise exceptions.BadRequestException(f"Bulk uploads are limited to {MAX_ROWS} rows")
+                row = self._validate(raw, schema)
+                if isinstance(row, list):
+                    fail(number, row)
+                    continue
+                chunk.append((number, row))
+                if len(chunk) >= CHUNK_ROWS:
+                    inserted += self._load_chunk(model, columns, chunk, fail)
+                    chunk = []
+            if chunk:
+                inserted += self._load_chunk(model, columns, chunk, fail)
+
+            if all_or_nothing and failed:
+                self.db.rollback()
+                inserted = 0
+            else:
+                self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {
+            "received": received,
+            "inserted": inserted,
+            "failed": failed,
+            "rolled_back": bool(all_or_nothing and failed),
+            "errors": sorted(errors, key=lambda e: e["row"]),
+            "errors_truncated": failed > len(errors),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _validate(self, raw, schema):
+        """Return the row as column values, or a list of error dicts."""
+        if isinstance(raw, str):
+            return [{"field": None, "message": raw}]
+        try:
+            item = schema(**raw)
+        except ValidationError as exc:
+            return [{"field": ".".join(str(p) for p in e["loc"]) or None, "message": e["msg"]} for e in exc.errors()]
+        if not item.user_id:
+            return [{"field": "user_id", "message": "Field required for bulk uploads"}]
+
+        values = item.dict()
+        if isinstance(item, schemas.PrescriptionCreate):
+            if values.get("doctor_id"):
+                if not self._is_doctor(values["doctor_id"]):
+                    return [{"field": "doctor_id", "message": "Does not belong to a doctor"}]
+            else:
+                values["doctor_id"] = self._doctor_id(values.get("prescribing_doctor"))
+        values["id"] = uuid.uuid4()
+        return values
+
+    def _doctor_id(self, name):
+        # Same exact lookup as single writes, once per distinct name in the upload
+        key = crud.normalize_doctor_name(name)
+        if key not in self._doctor_ids:
+            self._doctor_ids[key] = crud.resolve_doctor_id(self.db, name)
+        return self._doctor_ids[key]
+
+    def _is_doctor(self, doctor_id) -> bool:
+        if doctor_id not in self._known_doctors:
+            found = self.db.query(models.User.id).filter(models.User.id == doctor_id, models.User.role == "doctor").first()
+            self._known_doctors[doctor_id] = found is not None
+        return self._known_doctors[doctor_id]
+
+    def _load_chunk(self, model, columns, chunk, fail) -> int:
+        """Drop rows pointing at missing patients/visits, then load the rest."""
+        user_ids = {row["user_id"] for _, row in chunk}
+        known_users = {r[0] for r in self.db.query(models.User.id).filter(models.User.id.in_(user_ids))}
+        visit_ids = {row["visit_id"] for _, row in chunk if row.get("visit_id")}
+        known_visits = set()
+        if visit_ids:
+            known_visits = {r[0] for r in self.db.query(models.HospitalVisit.id).filter(models.HospitalVisit.id.in_(visit_ids))}
+
+        rows = []
+        for number, row in chunk:
+            if row["user_id"] not in known_users:
+                fail(number, [{"field": "user_id", "message": "Unknown patient"}])
+            elif row.get("visit_id") and row["visit_id"] not in known_visits:
+                fail(number, [{"field": "visit_id", "message": "Unknown hospital visit"}])
+            else:
+                rows.append({column: row.get(column) for column in columns})
+        if not rows:
+            return 0
+
+        connection = self.db.connection()
+        if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+            self._copy(connection, model, columns, rows)
+        else:
+            connection.execute(insert(model.__table__), rows)
+        return len(rows)
+
+    @staticmethod
+    def _copy(connection, model, columns, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_copy_value(row[column]) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        table = f"{model.__table__.schema}.{model.__table__.name}"
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
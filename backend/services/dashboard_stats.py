@@ -0,0 +1,171 @@
+"""
+Pre-aggregated doctor and researcher dashboard counters.
+
+The dashboards used to run six COUNT queries per load, two of them over whole
+tables. Instead, `refresh_dashboard_stats` rebuilds `medical.dashboard_stats`
+with a handful of GROUP BY queries, one row per scope, and the dashboard
+endpoints read their row(s) by primary key (see crud.get_*_dashboard_stats).
+
+Scopes:
+
+  * hospital:<name>        patients registered at the hospital, their emergency
+                           visits and pending lab results
+  * doctor:<user id>       upcoming appointments with the doctor; for doctors
+                           without a hospital also the same patient counters,
+                           over the patients they have appointments with
+  * researcher:<id>        active clinical trials and research projects
+
+Counters are updated in the background rather than on write, because bulk
+ingest (COPY) and the backfill scripts bypass the ORM. Every worker runs the
+refresh loop; a Postgres advisory lock and the age of the last refresh keep it
+to about one rebuild per interval across the whole deployment.
+
+    DASHBOARD_STATS_REFRESH_SECONDS   rebuild interval (default 300, 0 disables the background refresh)
+
+    python -m backend.services.dashboard_stats     # rebuild now
+"""
+import asyncio
+import datetime
+import logging
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from backend import models
+
+logger = logging.getLogger("medical_backend")
+
+REFRESH_SECONDS = float(os.getenv("DASHBOARD_STATS_REFRESH_SECONDS", "300"))
+# Arbitrary constant shared by every worker so only one of them rebuilds at a time
+REFRESH_LOCK_ID = 7_231_905
+
+def hospital_scope(hospital_name: str) -> str:
+    return f"hospital:{hospital_name}"
+
+
+def doctor_scope(doctor_id) -> str:
+    return f"doctor:{doctor_id}"
+
+
+def researcher_scope(researcher_id) -> str:
+    return f"researcher:{researcher_id}"
+
+
+def _add(counters, rows, scope_for, name):
+    for key, value in rows:
+        if key is not None:
+            counters.setdefault(scope_for(key), {})[name] = value
+
+
+def compute_counters(db: Session, today: datetime.date) -> Dict[str, dict]:
+    """Every scope's counters, computed with one GROUP BY per counter."""
+    counters: Dict[str, dict] = {}
+    User, Visit, Lab, Appt = models.User, models.HospitalVisit, models.LabResult, models.Appointment
+    patient = aliased(User)
+
+    # Per hospital, by the patient's registered hospital
+    _add(counters, db.execute(
+        select(User.hospital_name, func.count()).where(User.role == "patient").group_by(User.hospital_name)
+    ), hospital_scope, "total_patients")
+    _add(counters, db.execute(
+        select(patient.hospital_name, func.count()).select_from(Visit).join(patient, patient.id == Visit.user_id)
+        .where(Visit.visit_type == "Emergency").group_by(patient.hospital_name)
+    ), hospital_scope, "critical_alerts")
+    _add(counters, db.execute(
+        select(patient.hospital_name, func.count()).select_from(Lab).join(patient, patient.id == Lab.user_id)
+        .where(Lab.status == "Pending").group_by(patient.hospital_name)
+    ), hospital_scope, "pending_reports")
+
+    # Per doctor
+    _add(counters, db.execute(
+        select(Appt.doctor_id, func.count())
+        .where(Appt.doctor_id.isnot(None), Appt.appointment_date >= today).group_by(Appt.doctor_id)
+    ), doctor_scope, "appointments")
+
+    # Doctors without a hospital: the patients they have appointments with
+    doctor = aliased(User)
+    care = (
+        select(Appt.doctor_id, Appt.user_id).distinct()
+        .join(doctor, doctor.id == Appt.doctor_id)
+        .where(or_(doctor.hospital_name.is_(None), doctor.hospital_name == ""))
+        .subquery()
+    )
+    _add(counters, db.execute(
+        select(care.c.doctor_id, func.count()).group_by(care.c.doctor_id)
+    ), doctor_scope, "total_patients")
+    _add(counters, db.execute(
+        select(care.c.doctor_id, func.count()).join(Visit, Visit.user_id == care.c.user_id)
+        .where(Visit.visit_type == "Emergency").group_by(care.c.doctor_id)
+    ), doctor_scope, "critical_alerts")
+    _add(counters, db.execute(
+        select(care.c.doctor_id, func.count()).join(Lab, Lab.user_id == care.c.user_id)
+        .where(Lab.status == "Pending").group_by(care.c.doctor_id)
+    ), doctor_scope, "pending_reports")
+
+    # Per researcher
+    _add(counters, db.execute(
+        select(models.ClinicalTrial.researcher_id, func.count())
+        .where(models.ClinicalTrial.status == "Active").group_by(models.ClinicalTrial.researcher_id)
+    ), researcher_scope, "active_trials")
+    _add(counters, db.execute(
+        select(models.ResearchProject.researcher_id, func.count()).group_by(models.ResearchProject.researcher_id)
+    ), researcher_scope, "pipeline_assets")
+
+    return counters
+
+
+def refresh_dashboard_stats(db: Session, force: bool = False) -> Optional[int]:
+    """Rebuild the table in one transaction; returns the number of scopes, or None when skipped."""
+    if not db.execute(select(func.pg_try_advisory_xact_lock(REFRESH_LOCK_ID))).scalar():
+        db.rollback()
+        return None  # another worker is rebuilding right now
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if not force:
+        last = db.execute(select(func.max(models.DashboardStat.refreshed_at))).scalar()
+        if last is not None and (now - last).total_seconds() < REFRESH_SECONDS / 2:
+            db.rollback()
+            return None
+
+    counters = compute_counters(db, datetime.date.today())
+    db.query(models.DashboardStat).delete(synchronize_session=False)
+    if counters:
+        db.execute(insert(models.DashboardStat), [
+            {"scope": scope, "counters": values, "refreshed_at": now} for scope, values in counters.items()
+        ])
+    db.commit()
+    return len(counters)
+
+
+def read_counters(db: Session, *scopes: str) -> Dict[str, dict]:
+    rows = db.query(models.DashboardStat).filter(models.DashboardStat.scope.in_(scopes)).all()
+    return {row.scope: row.counters for row in rows}
+
+
+def _refresh_once():
+    from backend.database import SessionLocal
+
+    with SessionLocal() as db:
+        scopes = refresh_dashboard_stats(db)
+    if scopes is not None:
+        logger.info(f"Dashboard stats refreshed: {scopes} scopes")
+
+
+async def refresh_periodically():
+    """Background task started from the app lifespan."""
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_once)
+        except Exception:
+            logger.exception("Dashboard stats refresh failed")
+        await asyncio.sleep(REFRESH_SECONDS)
+
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        count = refresh_dashboard_stats(session, force=True)
+    print("another refresh is running" if count is None else f"refreshed {count} scopes")
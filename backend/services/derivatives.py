@@ -0,0 +1,287 @@
+"""
+Thumbnails and first-page previews of uploaded images and PDFs.
+
+List views show doctor photos as small avatars and documents as previews, so
+serving the original (several MB) for them is wasted bandwidth. After a file is
+stored (services/uploads.py) a background worker renders two JPEG derivatives
+and stores them next to the original blob:
+
+    blobs/<aa>/<sha256>.thumb.jpg      fits in THUMB_SIZE px (avatars, lists)
+    blobs/<aa>/<sha256>.preview.jpg    fits in PREVIEW_SIZE px (document previews)
+
+`stored_blobs.derivatives_status` is the queue: NULL means not processed yet,
+"processing" while a worker renders it, then "ready", "skipped" (not an image
+or PDF, or too large) or "failed". Every API worker runs `generate_periodically`
+from the app lifespan. A blob is claimed with FOR UPDATE SKIP LOCKED, marked
+"processing" and committed, so each is rendered once however many workers there
+are, and no transaction or pooled connection is held while it renders. A claim
+older than CLAIM_TIMEOUT_SECONDS belonged to a worker that died and is retried.
+Blobs stored before this existed are picked up the same way.
+
+Uploads are untrusted and decoded inside the API worker, so images above
+DERIVATIVES_MAX_PIXELS are skipped before their pixels are decoded.
+
+Pillow and PyMuPDF (PDF previews) are in requirements.txt. Without Pillow the
+worker does not run; without PyMuPDF PDFs stay pending until it is installed.
+Either way the API keeps serving originals and the derivative URLs are null.
+
+    DERIVATIVES_POLL_SECONDS        how often each worker looks for new blobs (default 10, 0 disables)
+    DERIVATIVES_MAX_SOURCE_BYTES    larger files are skipped (default 50 MB)
+    DERIVATIVES_MAX_PIXELS          larger images are skipped (default 40 megapixels)
+
+    python -m backend.services.derivatives     # process everything pending now
+"""
+import asyncio
+import datetime
+import io
+import logging
+import os
+import re
+import uuid
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import and_, func, not_, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.storage import blob_key, get_storage
+from backend.services.uploads import IMAGE_EXTENSIONS, STAGING_DIR
+
+logger = logging.getLogger("medical_backend")
+
+POLL_SECONDS = float(os.getenv("DERIVATIVES_POLL_SECONDS", "10"))
+MAX_SOURCE_BYTES = int(os.getenv("DERIVATIVES_MAX_SOURCE_BYTES", str(50 * 1024 * 1024)))
+MAX_PIXELS = int(os.getenv("DERIVATIVES_MAX_PIXELS", str(40_000_000)))
+CLAIM_TIMEOUT_SECONDS = 600
+THUMB_SIZE = 160  # 2x an 80px avatar
+PREVIEW_SIZE = 1024
+SIZES = {"thumb": THUMB_SIZE, "preview": PREVIEW_SIZE}
+JPEG_QUALITY = 80
+
+# Any URL the upload code has produced for a blob contains its SHA-256
+_BLOB_SHA256 = re.compile(r"(?:^|/)(?:blobs/[0-9a-f]{2}/|files/)([0-9a-f]{64})(?:[./]|$)")
+
+
+class SourceTooLarge(Exception):
+    """The file is within the byte limit but would decode to too many pixels."""
+
+
+def derivative_key(sha256: str, kind: str) -> str:
+    return blob_key(sha256, f"{kind}.jpg")
+
+
+def _pillow():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    # Pillow's own decompression-bomb guard, as a backstop to the size check in `render`
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    return Image, ImageOps
+
+
+def _pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        return None
+    return pymupdf
+
+
+def _is_image():
+    blob = models.StoredBlob
+    return or_(blob.content_type.like("image/%"), *[blob.storage_key.like(f"%.{ext}") for ext in IMAGE_EXTENSIONS])
+
+
+def _is_pdf():
+    blob = models.StoredBlob
+    return or_(blob.content_type == "application/pdf", blob.storage_key.like("%.pdf"))
+
+
+def _first_page(data: bytes, pymupdf):
+    """Render page one of a PDF at roughly PREVIEW_SIZE px on its long side, as a Pillow image."""
+    Image, _ = _pillow()
+    with pymupdf.open(stream=data, filetype="pdf") as document:
+        page = document[0]
+        zoom = PREVIEW_SIZE / max(page.rect.width, page.rect.height, 1)
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def render(data: bytes, is_pdf: bool) -> Dict[str, bytes]:
+    """JPEG bytes for each derivative kind. Blocking and CPU-bound."""
+    Image, ImageOps = _pillow()
+    if is_pdf:
+        image = _first_page(data, _pymupdf())
+    else:
+        try:
+            image = Image.open(io.BytesIO(data))
+        except Image.DecompressionBombError as exc:
+            raise SourceTooLarge(str(exc)) from exc
+        # Only the header has been read so far; refuse before decoding any pixels
+        width, height = image.size
+        if width * height > MAX_PIXELS:
+            raise SourceTooLarge(f"{width}x{height} image")
+        # JPEGs can be decoded at 1/2..1/8 scale, far cheaper than decoding full size and shrinking
+        image.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))
+        # Phone photos are stored sideways with an EXIF rotation; multi-page TIFFs open on page one
+        image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    rendered = {}
+    # Largest first so each step shrinks the previous result instead of the original
+    for kind, size in sorted(SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        rendered[kind] = out.getvalue()
+    return rendered
+
+
+def _store(sha256: str, rendered: Dict[str, bytes]) -> Dict[str, str]:
+    storage = get_storage()
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    keys = {}
+    for kind, data in rendered.items():
+        temp_path = STAGING_DIR / f"{uuid.uuid4().hex}.part"
+        try:
+            temp_path.write_bytes(data)
+            keys[kind] = derivative_key(sha256, kind)
+            storage.put(keys[kind], temp_path, "image/jpeg")
+        finally:
+            temp_path.unlink(missing_ok=True)
+    return keys
+
+
+def _claim(db: Session):
+    """
+    Mark the oldest pending blob "processing" and commit; returns (sha256, storage key,
+    content type, status), or None when there is nothing to do. The row lock only
+    lasts for this short transaction.
+    """
+    blob_model = models.StoredBlob
+    pending = blob_model.derivatives_status.is_(None)
+    # Claims abandoned by a worker that died go back to the queue
+    db.execute(
+        update(blob_model)
+        .where(blob_model.derivatives_status == "processing",
+               blob_model.derivatives_claimed_at < func.now() - datetime.timedelta(seconds=CLAIM_TIMEOUT_SECONDS))
+        .values(derivatives_status=None, derivatives_claimed_at=None)
+    )
+    # Not an image or a PDF: nothing to render, take it out of the queue
+    db.execute(
+        update(blob_model).where(pending, not_(or_(_is_image(), _is_pdf()))).values(derivatives_status="skipped")
+    )
+    renderable = or_(_is_image(), _is_pdf()) if _pymupdf() else and_(_is_image(), not_(_is_pdf()))
+    blob = db.execute(
+        select(blob_model).where(pending, renderable).order_by(blob_model.created_at)
+        .limit(1).with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+    claim = None
+    if blob is not None:
+        blob.derivatives_status = "skipped" if blob.size > MAX_SOURCE_BYTES else "processing"
+        blob.derivatives_claimed_at = func.now()
+        # Read before commit expires the instance; touching it afterwards would start a new transaction
+        claim = (blob.sha256, blob.storage_key, blob.content_type, blob.derivatives_status)
+    db.commit()
+    return claim
+
+
+def process_next(db: Session) -> bool:
+    """Render derivatives for one pending blob; False when there is nothing left to do."""
+    claim = _claim(db)
+    if claim is None:
+        return False
+    sha256, storage_key, content_type, claimed_status = claim
+    if claimed_status == "skipped":
+        return True
+
+    # Outside any transaction: the session holds no connection while the file is fetched and rendered
+    keys = None
+    try:
+        data = get_storage().read(storage_key)
+        is_pdf = content_type == "application/pdf" or storage_key.endswith(".pdf")
+        keys = _store(sha256, render(data, is_pdf))
+        status = "ready"
+    except SourceTooLarge as exc:
+        logger.info(f"Not rendering derivatives of blob {sha256}: {exc}")
+        status = "skipped"
+    except Exception:
+        logger.exception(f"Could not render derivatives of blob {sha256}")
+        status = "failed"
+
+    db.execute(
+        update(models.StoredBlob)
+        .where(models.StoredBlob.sha256 == sha256, models.StoredBlob.derivatives_status == "processing")
+        .values(derivatives_status=status, derivatives=keys, derivatives_claimed_at=None)
+    )
+    db.commit()
+    return True
+
+
+def process_pending(db: Session, limit: Optional[int] = None) -> int:
+    processed = 0
+    while (limit is None or processed < limit) and process_next(db):
+        processed += 1
+    return processed
+
+
+def _process_once():
+    from backend.database import SessionLocal
+
+    with SessionLocal() as db:
+        processed = process_pending(db)
+    if processed:
+        logger.info(f"Rendered derivatives for {processed} blobs")
+
+
+async def generate_periodically():
+    """Background task started from the app lifespan."""
+    if _pillow() is None:
+        logger.info("Pillow is not installed; thumbnails and previews are disabled")
+        return
+    while True:
+        try:
+            await asyncio.to_thread(_process_once)
+        except Exception:
+            logger.exception("Derivative generation failed")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def derivative_urls(db: Session, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """{original URL: {"thumb": url, "preview": url}} for those of `urls` whose derivatives are ready, in one query."""
+    by_sha256 = {}
+    for url in urls:
+        match = _BLOB_SHA256.search(url or "")
+        if match:
+            by_sha256.setdefault(match.group(1), []).append(url)
+    if not by_sha256:
+        return {}
+    storage = get_storage()
+    rows = db.execute(
+        select(models.StoredBlob.sha256, models.StoredBlob.derivatives)
+        .where(models.StoredBlob.sha256.in_(by_sha256), models.StoredBlob.derivatives_status == "ready")
+    ).all()
+    found = {}
+    for sha256, keys in rows:
+        links = {kind: storage.url(key, sha256, kind) for kind, key in (keys or {}).items()}
+        for url in by_sha256[sha256]:
+            found[url] = links
+    return found
+
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    if _pillow() is None:
+        raise SystemExit("Pillow is not installed (pip install Pillow)")
+    with SessionLocal() as session:
+        count = process_pending(session)
+    print(f"rendered derivatives for {count} blobs")
@@ -0,0 +1,263 @@
+"""
+Resumable uploads for large documents.
+
+A client creates an upload with its final size, sends the bytes in any
+number of PATCH requests, each starting at the current offset, and finalizes
+it once complete. A dropped connection costs only the chunk in flight: the
+client asks for the offset and carries on from there. Finalizing hashes the
+file and stores it like any other upload (services/uploads.py).
+
+Partial uploads live in `<UPLOAD_STAGING_DIR>/resumable/` as `<id>.part`
+(the data received so far) and `<id>.json` (owner, purpose, size, expiry).
+Uploads not finalized within RESUMABLE_UPLOAD_TTL_HOURS are deleted by
+`purge_periodically`, which the app lifespan runs. With several API nodes the
+staging directory has to be shared, or requests routed by upload id.
+
+    UPLOAD_MAX_RESUMABLE_BYTES    largest document accepted this way (default 200 MB);
+                                  images keep the multipart limit, UPLOAD_MAX_IMAGE_BYTES
+    RESUMABLE_UPLOAD_TTL_HOURS    how long an unfinished upload is kept (default 24)
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from backend.core import exceptions
+from backend.services.uploads import (
+    CHUNK_SIZE, SIZE_LIMITS, STAGING_DIR, StoredUpload, file_extension, store_staged, upload_kind,
+)
+
+logger = logging.getLogger("medical_backend")
+
+RESUMABLE_DIR = STAGING_DIR / "resumable"
+MAX_BYTES = int(os.getenv("UPLOAD_MAX_RESUMABLE_BYTES", str(200 * 1024 * 1024)))
+TTL_HOURS = float(os.getenv("RESUMABLE_UPLOAD_TTL_HOURS", "24"))
+# Suggested PATCH size; well under the request body limit in main.py
+RECOMMENDED_CHUNK_BYTES = 5 * 1024 * 1024
+# A chunk lock older than this belongs to a request that died without releasing it
+LOCK_STALE_SECONDS = 300
+PURGE_INTERVAL_SECONDS = 900
+
+
+def _paths(upload_id: str):
+    if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+        raise exceptions.EntityNotFoundException("Upload not found")
+    base = RESUMABLE_DIR / upload_id
+    return base.with_suffix(".json"), base.with_suffix(".part"), base.with_suffix(".lock")
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _status(meta: dict, offset: int) -> dict:
+    return {
+        "id": meta["id"],
+        "filename": meta["filename"],
+        "purpose": meta["purpose"],
+        "size": meta["size"],
+        "offset": offset,
+        "chunk_size": RECOMMENDED_CHUNK_BYTES,
+        "expires_at": meta["expires_at"],
+    }
+
+
+# Purposes that are always pictures, whatever the file claims to be
+IMAGE_PURPOSES = {"doctor.professional_photo"}
+
+
+def size_limit(purpose: str, filename: str, content_type: str = None) -> int:
+    """Resumable uploads only raise the limit for documents; images stay at the multipart limit."""
+    kind = "image" if purpose in IMAGE_PURPOSES else upload_kind(filename, content_type)
+    return SIZE_LIMITS[kind] if kind == "image" else max(MAX_BYTES, SIZE_LIMITS[kind])
+
+
+def _check_size(size: int, purpose: str, filename: str, content_type: str = None) -> None:
+    limit = size_limit(purpose, filename, content_type)
+    if size > limit:
+        raise exceptions.PayloadTooLargeException(f"File exceeds the {limit // (1024 * 1024)} MB limit for this type")
+
+
+def create_upload(user_id, purpose: str, filename: str, size: int, content_type: str = None) -> dict:
+    if size <= 0:
+        raise exceptions.BadRequestException("size must be positive")
+    _check_size(size, purpose, filename, content_type)
+    RESUMABLE_DIR.mkdir(parents=True, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path, _ = _paths(upload_id)
+    meta = {
+        "id": upload_id,
+        "user_id": str(user_id),
+        "purpose": purpose,
+        "filename": filename,
+        "content_type": content_type or "application/octet-stream",
+        "size": size,
+        "created_at": _now().isoformat(),
+        "expires_at": (_now() + datetime.timedelta(hours=TTL_HOURS)).isoformat(),
+    }
+    part_path.touch()
+    meta_path.write_text(json.dumps(meta))
+    return _status(meta, 0)
+
+
+def load_upload(upload_id: str, user_id) -> dict:
+    """The upload's metadata; 404 when it does not exist, has expired or belongs to someone else."""
+    meta_path, part_path, _ = _paths(upload_id)
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        raise exceptions.EntityNotFoundException("Upload not found")
+    if meta["user_id"] != str(user_id):
+        raise exceptions.EntityNotFoundException("Upload not found")
+    if datetime.datetime.fromisoformat(meta["expires_at"]) <= _now():
+        delete_upload(upload_id)
+        raise exceptions.EntityNotFoundException("Upload expired")
+    return meta
+
+
+def upload_status(upload_id: str, user_id) -> dict:
+    meta = load_upload(upload_id, user_id)
+    return _status(meta, _paths(upload_id)[1].stat().st_size)
+
+
+def delete_upload(upload_id: str) -> None:
+    for path in _paths(upload_id):
+        path.unlink(missing_ok=True)
+
+
+def _acquire_lock(lock_path: Path) -> None:
+    """Portable cross-process mutex: one chunk at a time per upload."""
+    for _ in range(2):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime < LOCK_STALE_SECONDS:
+                    break
+                lock_path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+    raise exceptions.ConflictException("Another chunk of this upload is being written")
+
+
+def _write(out, data: bytes, lock_path: Path) -> None:
+    out.write(data)
+    # Keep the lock fresh so a slow but live request is not mistaken for a dead one
+    os.utime(lock_path)
+
+
+async def append_chunk(request: Request, upload_id: str, user_id, offset: int) -> dict:
+    """Append the request body at `offset`, which must equal the bytes received so far."""
+    meta = await run_in_threadpool(load_upload, upload_id, user_id)
+    _, part_path, lock_path = _paths(upload_id)
+    await run_in_threadpool(_acquire_lock, lock_path)
+    try:
+        received = part_path.stat().st_size
+        if offset != received:
+            raise exceptions.ConflictException(f"Offset mismatch: the upload is at byte {received}")
+        out = await run_in_threadpool(open, part_path, "ab")
+        try:
+            buffer = bytearray()
+            # Whatever arrived before a dropped connection is kept; the client resumes from there
+            async for piece in request.stream():
+                if received + len(buffer) + len(piece) > meta["size"]:
+                    raise exceptions.BadRequestException("Chunk runs past the declared file size")
+                buffer += piece
+                if len(buffer) >= CHUNK_SIZE:
+                    await run_in_threadpool(_write, out, bytes(buffer), lock_path)
+                    received += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await run_in_threadpool(_write, out, bytes(buffer), lock_path)
+                received += len(buffer)
+        finally:
+            await run_in_threadpool(out.close)
+    finally:
+        lock_path.unlink(missing_ok=True)
+    return _status(meta, received)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_for_store(part_path: Path) -> Path:
+    """A second name for the data file, for store_staged to consume; the upload keeps its own."""
+    staged = STAGING_DIR / f"{uuid.uuid4().hex}.part"
+    try:
+        os.link(part_path, staged)
+    except OSError:
+        # No hard links on this filesystem
+        shutil.copyfile(part_path, staged)
+    return staged
+
+
+def finalize_upload(db: Session, upload_id: str, user_id) -> tuple:
+    """
+    Store a complete upload as a blob; returns (metadata, StoredUpload). Blocking.
+    The upload is only deleted once it is stored, so a failed finalize can be retried.
+    """
+    meta = load_upload(upload_id, user_id)
+    _, part_path, lock_path = _paths(upload_id)
+    _acquire_lock(lock_path)
+    try:
+        received = part_path.stat().st_size
+        if received != meta["size"]:
+            raise exceptions.ConflictException(f"Upload incomplete: {received} of {meta['size']} bytes received")
+        # Limits may have been lowered since the upload was created
+        _check_size(received, meta["purpose"], meta["filename"], meta["content_type"])
+        stored: StoredUpload = store_staged(
+            db, _link_for_store(part_path), _hash_file(part_path), received, file_extension(meta["filename"]),
+            meta["content_type"], user_id, meta["purpose"], meta["filename"],
+        )
+        delete_upload(upload_id)
+    finally:
+        lock_path.unlink(missing_ok=True)
+    return meta, stored
+
+
+def purge_expired() -> int:
+    if not RESUMABLE_DIR.exists():
+        return 0
+    purged = 0
+    now = _now()
+    for meta_path in RESUMABLE_DIR.glob("*.json"):
+        try:
+            expires_at = datetime.datetime.fromisoformat(json.loads(meta_path.read_text())["expires_at"])
+        except (OSError, ValueError, KeyError):
+            expires_at = now  # unreadable metadata: the upload cannot be resumed anyway
+        if expires_at <= now:
+            delete_upload(meta_path.stem)
+            purged += 1
+    # Data files whose metadata is gone (delete interrupted half-way)
+    for part_path in RESUMABLE_DIR.glob("*.part"):
+        if not part_path.with_suffix(".json").exists() and time.time() - part_path.stat().st_mtime > LOCK_STALE_SECONDS:
+            part_path.unlink(missing_ok=True)
+    return purged
+
+
+async def purge_periodically():
+    """Background task started from the app lifespan."""
+    while True:
+        try:
+            purged = await asyncio.to_thread(purge_expired)
+            if purged:
+                logger.info(f"Purged {purged} expired resumable uploads")
+        except Exception:
+            logger.exception("Resumable upload purge failed")
+        await asyncio.sleep(PURGE_INTERVAL_SECONDS)
@@ -0,0 +1,147 @@
+"""
+Content-addressed blob storage for uploaded files.
+
+Blobs are stored under their SHA-256, at `blobs/<first 2 hex>/<sha256>.<ext>`,
+so the same file uploaded twice is stored once. `medical.stored_blobs` records
+each blob and `medical.upload_references` records who uploaded it and for what
+(see services/uploads.py).
+
+Two backends, chosen with STORAGE_BACKEND:
+
+  * local (default)  files under backend/static/uploads, served by the
+                     /uploads static mount. One disk per node.
+  * s3               any S3-compatible object store (AWS S3, MinIO,
+                     LocalStack). Needs `boto3`. All API nodes share it.
+
+    STORAGE_BACKEND        local | s3
+    S3_BUCKET              bucket name (s3)
+    S3_ENDPOINT_URL        endpoint of a non-AWS store, e.g. http://localhost:9000 for MinIO (s3)
+    S3_REGION              region (s3, optional)
+    S3_PUBLIC_URL          base URL the bucket is publicly readable at. Unset: files are
+                           served through GET /files/<sha256> (derivatives:
+                           /files/<sha256>/<kind>), which redirects to a
+                           short-lived presigned URL (s3)
+
+S3 credentials come from the usual AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY
+environment variables or instance profile. Objects are written with the same
+Cache-Control as the /uploads mount, private unless STATIC_CACHE_SCOPE=public
+(core/static_files.py).
+"""
+import os
+import shutil
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+from backend.core.static_files import IMMUTABLE_CACHE_CONTROL
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+LOCAL_ROOT = Path(__file__).resolve().parent.parent / "static" / "uploads"
+PRESIGNED_URL_SECONDS = 300
+
+
+def blob_key(sha256: str, ext: str = "") -> str:
+    return f"blobs/{sha256[:2]}/{sha256}{'.' + ext if ext else ''}"
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: Path = LOCAL_ROOT):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def put(self, key: str, source: Path, content_type: str) -> None:
+        """Move the finished temp file `source` into place; atomic when both are on one filesystem."""
+        destination = self.path(key)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, destination)
+        except OSError:
+            # Staging directory on another filesystem: copy next to the target, then rename
+            partial = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+            shutil.copyfile(source, partial)
+            os.replace(partial, destination)
+            os.unlink(source)
+
+    def read(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def url(self, key: str, sha256: str, derivative: str = None) -> str:
+        return f"/uploads/{key}"
+
+    def download_url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None, public_url: str = None):
+        try:
+            import boto3
+        except ImportError as exc:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs the boto3 package (pip install boto3)") from exc
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, source: Path, content_type: str) -> None:
+        # upload_file switches to multipart for large files on its own
+        self.client.upload_file(
+            str(source), self.bucket, key,
+            ExtraArgs={"ContentType": content_type, "CacheControl": IMMUTABLE_CACHE_CONTROL},
+        )
+        os.unlink(source)
+
+    def read(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str, sha256: str, derivative: str = None) -> str:
+        """Stable URL stored in the database; never a presigned one, since those expire."""
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return f"/files/{sha256}/{derivative}" if derivative else f"/files/{sha256}"
+
+    def download_url(self, key: str) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=PRESIGNED_URL_SECONDS,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_storage():
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=os.getenv("S3_BUCKET"),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region=os.getenv("S3_REGION"),
+            public_url=os.getenv("S3_PUBLIC_URL"),
+        )
+    if STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected local or s3")
+    return LocalStorage()
@@ -0,0 +1,144 @@
+"""
+Upload handling shared by the patient, doctor and researcher routers.
+
+`save_upload` copies an UploadFile to a staging file on a worker thread,
+CHUNK_SIZE bytes at a time, so a large scan never blocks the event loop. The
+SHA-256 of the data is computed while it is copied, and the copy stops with a
+413 as soon as the file passes the limit for its type.
+
+The per-type limit is only checked here, after Starlette has parsed the
+multipart body (spooling large files to a temporary file). While the body is
+received it is only bounded by the request-wide MAX_CONTENT_LENGTH that
+RequestSizeLimitMiddleware enforces (main.py), so that is the most a
+rejected upload can cost in bandwidth and temporary disk.
+
+The finished file is then stored by content hash (services/storage.py): if a
+blob with the same SHA-256 already exists the staged copy is discarded,
+otherwise it is moved into the storage backend. Either way a row is added to
+`upload_references` recording the uploader and what the file is for. A failed
+or rejected upload leaves nothing behind and a half-written file is never
+served.
+
+    UPLOAD_MAX_IMAGE_BYTES      limit for images (default 10 MB)
+    UPLOAD_MAX_DOCUMENT_BYTES   limit for PDFs and every other type (default 25 MB)
+    UPLOAD_STAGING_DIR          where uploads are written before they are stored
+                                (default backend/static/.staging, i.e. the local
+                                storage filesystem so storing is a rename)
+"""
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.core import exceptions
+from backend.services.storage import LOCAL_ROOT, blob_key, get_storage
+
+# Outside the /uploads mount, and /static never serves dot-directories, so partial files are never served
+STAGING_DIR = Path(os.getenv("UPLOAD_STAGING_DIR", str(LOCAL_ROOT.parent / ".staging")))
+CHUNK_SIZE = 1024 * 1024
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "bmp", "tif", "tiff", "heic"}
+SIZE_LIMITS = {
+    "image": int(os.getenv("UPLOAD_MAX_IMAGE_BYTES", str(10 * 1024 * 1024))),
+    "document": int(os.getenv("UPLOAD_MAX_DOCUMENT_BYTES", str(25 * 1024 * 1024))),
+}
+
+_EXTENSION = re.compile(r"^[A-Za-z0-9]{1,10}$")
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    url: str
+    sha256: str
+    size: int
+    content_type: str
+    deduplicated: bool
+
+
+def file_extension(filename: str) -> str:
+    """Lower-case extension of a client-supplied name, or "" when it is missing or not plain alphanumerics."""
+    ext = os.path.splitext(os.path.basename(filename or ""))[1].lstrip(".")
+    return ext.lower() if _EXTENSION.match(ext) else ""
+
+
+def upload_kind(filename: str, content_type: str = None) -> str:
+    if file_extension(filename) in IMAGE_EXTENSIONS or (content_type or "").startswith("image/"):
+        return "image"
+    return "document"
+
+
+def _stage(source, limit: int):
+    """Blocking part of `save_upload`: stream `source` into a staging file, hashing it."""
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = STAGING_DIR / f"{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise exceptions.PayloadTooLargeException(f"File exceeds the {limit // (1024 * 1024)} MB limit for this type")
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path, size, digest.hexdigest()
+
+
+def store_staged(db: Session, temp_path: Path, sha256: str, size: int, ext: str, content_type: str,
+                 user_id, purpose: str, original_filename: str = None) -> StoredUpload:
+    """Move a staged file into storage (unless its blob exists) and record the reference. Blocking."""
+    storage = get_storage()
+    try:
+        blob = db.get(models.StoredBlob, sha256)
+        deduplicated = blob is not None
+        if blob is None:
+            key = blob_key(sha256, ext)
+            storage.put(key, temp_path, content_type)
+            # Two identical uploads racing: both write the same bytes to the same key, one row wins
+            db.execute(insert(models.StoredBlob).values(
+                sha256=sha256, size=size, content_type=content_type, backend=storage.name, storage_key=key,
+            ).on_conflict_do_nothing(index_elements=["sha256"]))
+            blob = db.get(models.StoredBlob, sha256)
+        db.add(models.UploadReference(
+            sha256=sha256, user_id=user_id, purpose=purpose, original_filename=original_filename,
+        ))
+        db.commit()
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return StoredUpload(
+        url=storage.url(blob.storage_key, sha256),
+        sha256=sha256,
+        size=blob.size,
+        content_type=blob.content_type,
+        deduplicated=deduplicated,
+    )
+
+
+async def save_upload(db: Session, upload: UploadFile, user_id, purpose: str) -> StoredUpload:
+    """
+    Store `upload` by content hash and record that `user_id` uploaded it for `purpose`
+    (e.g. "doctor.professional_photo"). Returns the URL to save on the owning row.
+    """
+    limit = SIZE_LIMITS[upload_kind(upload.filename, upload.content_type)]
+    await upload.seek(0)
+    temp_path, size, sha256 = await run_in_threadpool(_stage, upload.file, limit)
+    return await run_in_threadpool(
+        store_staged, db, temp_path, sha256, size, file_extension(upload.filename),
+        upload.content_type or "application/octet-stream", user_id, purpose, upload.filename,
+    )
@@ -0,0 +1,117 @@
+"""
+Cold-start report: what importing and starting the app costs.
+
+Starts a fresh interpreter with `python -X importtime`, imports backend.main
+and runs the app's lifespan start-up once, then prints:
+
+  * the wall time of the import and of each start-up phase (the same numbers
+    GET /system/startup serves from a running worker);
+  * the packages that dominate import time, by total self time of every
+    module imported from them.
+
+    python -m backend.startup_report                    # table
+    python -m backend.startup_report --json             # machine-readable
+    python -m backend.startup_report --no-migrate       # skip DB_AUTO_MIGRATE (no database needed)
+    python -m backend.startup_report --max-import-ms 1500
+
+With `--max-import-ms` the command exits with status 1 when importing the app
+takes longer, so it can guard cold start in CI.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in the child: import the app, run its start-up, print the report on the last stdout line
+_CHILD = """
+import asyncio, json
+from backend.main import app
+from backend.core.startup import STARTUP
+
+async def start():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(start())
+print(json.dumps(STARTUP.snapshot()))
+"""
+
+# "import time: <self us> | <cumulative us> | <indented module name>"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+\d+\s+\|\s*(\S+)$")
+
+
+def package_import_times(stderr: str):
+    """Sum `-X importtime` self time per top-level package, in milliseconds."""
+    totals = defaultdict(int)
+    modules = defaultdict(int)
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, module = match.groups()
+        package = module.split(".")[0]
+        totals[package] += int(self_us)
+        modules[package] += 1
+    return sorted(
+        ({"package": name, "self_ms": round(us / 1000, 1), "modules": modules[name]} for name, us in totals.items()),
+        key=lambda row: row["self_ms"],
+        reverse=True,
+    )
+
+
+def measure(migrate: bool):
+    env = dict(os.environ)
+    if not migrate:
+        env["DB_AUTO_MIGRATE"] = "false"
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"Starting the app failed:\n{tail[-4000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["packages"] = package_import_times(result.stderr)
+    return report
+
+
+def print_report(report, top: int):
+    print(f"import backend.main   {report['import_ms']:>9} ms")
+    for phase in report["phases"]:
+        error = f"  ({phase['error']})" if "error" in phase else ""
+        print(f"  {phase['phase']:<20}{phase['duration_ms']:>9} ms{error}")
+    print(f"startup total         {report['startup_ms']:>9} ms")
+    print("\nslowest packages to import (self time, -X importtime overhead included):")
+    for row in report["packages"][:top]:
+        print(f"  {row['package']:<28}{row['self_ms']:>9} ms  {row['modules']:>5} modules")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    parser.add_argument("--top", type=int, default=15, help="packages to list (default 15)")
+    parser.add_argument("--no-migrate", action="store_true", help="run with DB_AUTO_MIGRATE=false")
+    parser.add_argument("--max-import-ms", type=float, help="exit 1 if importing the app takes longer")
+    args = parser.parse_args(argv)
+
+    report = measure(migrate=not args.no_migrate)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+
+    if args.max_import_ms is not None and report["import_ms"] > args.max_import_ms:
+        print(f"\nimport took {report['import_ms']} ms, over the {args.max_import_ms} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+import uuid
+
+import pytest
+
+sa = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.core import activity_cache
+
+
+@pytest.fixture
+def session():
+    engine = sa.create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(sa.text("ATTACH DATABASE ':memory:' AS medical"))
+        for model in (models.User, models.Appointment, models.Prescription):
+            model.__table__.create(connection)
+        with Session(bind=connection) as session:
+            yield session
+
+
+def generation(doctor_id):
+    return activity_cache.feed_generation(doctor_id, None)[0]
+
+
+@pytest.mark.parametrize("model", [models.Appointment, models.Prescription])
+def test_reassigning_a_row_invalidates_both_doctors(session, model):
+    old_doctor, new_doctor = uuid.uuid4(), uuid.uuid4()
+    row = model(id=uuid.uuid4(), user_id=uuid.uuid4(), doctor_id=old_doctor)
+    session.add(row)
+    session.commit()
+    before = generation(old_doctor), generation(new_doctor)
+
+    # Expired by the commit, so the old value is only known through active history
+    row.doctor_id = new_doctor
+    session.commit()
+
+    assert generation(old_doctor) == before[0] + 1
+    assert generation(new_doctor) == before[1] + 1
+
+
+def test_patient_moving_hospital_invalidates_both_hospitals(session):
+    patient = models.User(id=uuid.uuid4(), email="p@example.com", role="patient", hospital_name="North")
+    session.add(patient)
+    session.commit()
+    before = activity_cache.feed_generation(None, "North")[1], activity_cache.feed_generation(None, "South")[1]
+
+    patient.hospital_name = "South"
+    session.commit()
+
+    assert activity_cache.feed_generation(None, "North")[1] == before[0] + 1
+    assert activity_cache.feed_generation(None, "South")[1] == before[1] + 1
@@ -0,0 +1,45 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+sa = pytest.importorskip("sqlalchemy")
+pytest.importorskip("alembic")
+
+MIGRATION = Path(__file__).resolve().parent.parent / "migrations" / "versions" / "0007_created_at_not_null.py"
+
+
+@pytest.fixture
+def migration(monkeypatch):
+    spec = importlib.util.spec_from_file_location("migration_0007", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "BATCH_SIZE", 3)
+    return module
+
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(sa.text("ATTACH DATABASE ':memory:' AS medical"))
+        connection.execute(sa.text("CREATE TABLE medical.claims (id TEXT PRIMARY KEY, created_at TEXT)"))
+        yield connection
+
+
+@pytest.mark.parametrize("count", [0, 2, 3, 7, 9])
+def test_backfill_dates_every_null_row_in_batches(migration, connection, count):
+    for i in range(count):
+        connection.execute(
+            sa.text("INSERT INTO medical.claims VALUES (:id, :created_at)"),
+            {"id": f"{i:04d}", "created_at": None if i % 2 == 0 else "2026-01-01"},
+        )
+    statements = []
+    sa.event.listen(connection, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    migration._backfill(connection, "claims")
+
+    rows = dict(connection.execute(sa.text("SELECT id, created_at FROM medical.claims")).all())
+    assert all(rows[f"{i:04d}"] == ("epoch" if i % 2 == 0 else "2026-01-01") for i in range(count))
+    updates = [statement for statement in statements if statement.startswith("UPDATE")]
+    assert len(updates) == count // migration.BATCH_SIZE + 1
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+Image = pytest.importorskip("PIL.Image")
+
+from backend.services import derivatives
+from backend.services.derivatives import _BLOB_SHA256, SourceTooLarge, render
+
+SHA = "cd" + "1" * 62
+
+
+@pytest.mark.parametrize("url", [
+    f"/uploads/blobs/cd/{SHA}.jpg",
+    f"https://bucket.example.com/blobs/cd/{SHA}.pdf",
+    f"/files/{SHA}",
+    f"/files/{SHA}/thumb",
+    f"blobs/cd/{SHA}",
+])
+def test_blob_sha256_is_found_in_stored_urls(url):
+    assert _BLOB_SHA256.search(url).group(1) == SHA
+
+
+@pytest.mark.parametrize("url", [
+    "/uploads/doctor_photo.jpg",
+    f"/uploads/blobs/cd/{SHA}0.jpg",
+    f"/files/{SHA[:-1]}",
+    f"/other/{SHA}",
+])
+def test_blob_sha256_ignores_other_urls(url):
+    assert _BLOB_SHA256.search(url) is None
+
+
+def _encode(image, fmt="PNG"):
+    out = io.BytesIO()
+    image.save(out, fmt)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "P", "CMYK"])
+def test_render_produces_jpegs_within_their_sizes(mode):
+    fmt = "JPEG" if mode == "CMYK" else "PNG"
+    rendered = render(_encode(Image.new(mode, (2000, 1000)), fmt), is_pdf=False)
+    assert set(rendered) == set(derivatives.SIZES)
+    for kind, data in rendered.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "JPEG" and image.mode == "RGB"
+            assert max(image.size) == derivatives.SIZES[kind]
+
+
+def test_small_images_are_not_enlarged():
+    with Image.open(io.BytesIO(render(_encode(Image.new("RGB", (40, 30))), is_pdf=False)["thumb"])) as image:
+        assert image.size == (40, 30)
+
+
+# Just over the cap is caught by the size check, over twice it by Pillow's bomb guard in Image.open
+@pytest.mark.parametrize("size", [(101, 100), (201, 100)])
+@pytest.mark.filterwarnings("ignore::PIL.Image.DecompressionBombWarning")
+def test_render_refuses_images_over_the_pixel_cap(monkeypatch, size):
+    monkeypatch.setattr(derivatives, "MAX_PIXELS", 100 * 100)
+    data = _encode(Image.new("RGB", size))
+    with pytest.raises(SourceTooLarge):
+        render(data, is_pdf=False)
+    assert render(_encode(Image.new("RGB", (100, 100))), is_pdf=False)
+
+
+def test_pdf_first_page_preview():
+    pymupdf = pytest.importorskip("pymupdf")
+    document = pymupdf.open()
+    document.new_page(width=595, height=842)
+    document.new_page()
+    rendered = render(document.tobytes(), is_pdf=True)
+    with Image.open(io.BytesIO(rendered["preview"])) as image:
+        assert max(image.size) == derivatives.PREVIEW_SIZE
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from backend import crud
+from backend.backfill_doctor_ids import match_doctor
+
+ANN = uuid.uuid4()
+JOANNA = uuid.uuid4()
+RAHUL = uuid.uuid4()
+NAMES = {"ann lee": ANN, "joanna lee": JOANNA, "rahul sharma": RAHUL, "priya shah": None}
+
+
+@pytest.mark.parametrize("raw", ["Dr. Rahul Sharma", "dr rahul sharma", "  RAHUL   SHARMA ", "Dr.Rahul Sharma"])
+def test_normalize_doctor_name(raw):
+    assert crud.normalize_doctor_name(raw) == "rahul sharma"
+
+
+def test_doctor_name_variants_cover_title_spellings():
+    assert crud.doctor_name_variants("Dr. Rahul Sharma") == [
+        "rahul sharma", "dr. rahul sharma", "dr.rahul sharma", "dr rahul sharma",
+    ]
+
+
+def test_match_doctor_exact_name():
+    assert match_doctor("Dr. Ann Lee", NAMES) == ANN
+    assert match_doctor("joanna lee", NAMES) == JOANNA
+
+
+def test_match_doctor_single_contained_name():
+    assert match_doctor("Dr. Rahul Sharma (Cardiology)", NAMES) == RAHUL
+
+
+def test_match_doctor_shared_name_is_ambiguous():
+    assert match_doctor("Priya Shah", NAMES) is None
+
+
+def test_match_doctor_several_contained_names_is_ambiguous():
+    assert match_doctor("Ann Lee / Rahul Sharma", NAMES) is None
+
+
+@pytest.mark.parametrize("raw", [None, "", "   ", "Dr.", "Someone Else"])
+def test_match_doctor_unknown(raw):
+    assert match_doctor(raw, NAMES) is None
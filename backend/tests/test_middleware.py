@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend.core.exceptions import EntityNotFoundException
+from backend.core.middleware import GlobalExceptionHandlerMiddleware, RequestSizeLimitMiddleware
+
+LIMIT = 10
+
+
+def call(app, body_chunks=(), headers=()):
+    """Run an ASGI app on one HTTP request; returns (status, headers, body) as sent."""
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": list(headers), "query_string": b""}
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(body_chunks) - 1}
+                for i, chunk in enumerate(body_chunks)] or [{"type": "http.request", "body": b"", "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), body
+
+
+async def echo(scope, receive, send):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": body})
+
+
+def test_body_within_the_limit_passes_through():
+    assert call(RequestSizeLimitMiddleware(echo, LIMIT), [b"12345", b"67890"])[::2] == (200, b"1234567890")
+
+
+def test_declared_content_length_over_the_limit_is_rejected_before_the_app_runs():
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(True)
+
+    status, _, body = call(RequestSizeLimitMiddleware(app, LIMIT), [b"x"], headers=[(b"content-length", b"11")])
+    assert status == 413 and json.loads(body) == {"detail": "Request body too large"}
+    assert not called
+
+
+def test_chunked_body_is_cut_off_at_the_limit():
+    assert call(RequestSizeLimitMiddleware(echo, LIMIT), [b"123456", b"789012"])[0] == 413
+
+
+def test_invalid_content_length_falls_back_to_counting():
+    middleware = RequestSizeLimitMiddleware(echo, LIMIT)
+    assert call(middleware, [b"123"], headers=[(b"content-length", b"abc")])[0] == 200
+    assert call(middleware, [b"123456789012"], headers=[(b"content-length", b"abc")])[0] == 413
+
+
+def test_api_exception_becomes_json_with_the_request_id():
+    async def app(scope, receive, send):
+        raise EntityNotFoundException("Patient not found")
+
+    status, _, body = call(GlobalExceptionHandlerMiddleware(app))
+    payload = json.loads(body)
+    assert status == 404 and payload["detail"] == "Patient not found" and payload["request_id"]
+
+
+def test_unhandled_error_becomes_a_500():
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    status, _, body = call(GlobalExceptionHandlerMiddleware(app))
+    assert status == 500 and json.loads(body)["detail"] == "Internal Server Error"
+
+
+def test_error_after_the_response_started_is_reraised():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        call(GlobalExceptionHandlerMiddleware(app))
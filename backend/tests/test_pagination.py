@@ -0,0 +1,59 @@
+import base64
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from backend.core.exceptions import BadRequestException
+from backend.core.pagination import decode_cursor, encode_cursor, to_page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 16, 21, 5, 30, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+def test_cursor_accepts_string_ids():
+    row_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(datetime(2026, 1, 1), str(row_id)))[1] == row_id
+
+
+def _token(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    _token(b"null"),
+    _token(b"[1]"),
+    _token(b'["yesterday", "3f2b"]'),
+    _token(b'["2026-01-01T00:00:00", "not-a-uuid"]'),
+    _token(b"\xff\xfe"),
+])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(BadRequestException):
+        decode_cursor(cursor)
+
+
+def _rows(count):
+    return [SimpleNamespace(created_at=datetime(2026, 1, 1, 0, 0, count - i, tzinfo=timezone.utc), id=uuid.uuid4())
+            for i in range(count)]
+
+
+def test_last_page_has_no_cursor():
+    page = to_page(_rows(3), limit=3)
+    assert len(page) == 3 and page.next_cursor is None
+
+
+def test_cursor_points_at_the_last_row_shown():
+    rows = _rows(4)
+    page = to_page(rows, limit=3)
+    assert page == rows[:3]
+    assert decode_cursor(page.next_cursor) == (rows[2].created_at, rows[2].id)
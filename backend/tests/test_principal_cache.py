@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from backend.core import principal_cache
+
+
+def test_entry_loaded_before_an_invalidation_is_not_served():
+    generation = principal_cache.principal_generation("u1")
+    # An update to the user commits while it is being loaded
+    principal_cache.invalidate_principal("u1")
+    principal_cache.cache_principal("u1", generation, "stale user")
+    assert principal_cache.get_cached_principal("u1") is None
+
+
+def test_entry_is_served_until_invalidated():
+    principal_cache.cache_principal("u2", principal_cache.principal_generation("u2"), "user")
+    assert principal_cache.get_cached_principal("u2") == "user"
+    principal_cache.invalidate_principal("u2")
+    assert principal_cache.get_cached_principal("u2") is None
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from backend.core import exceptions
+from backend.services import resumable_uploads
+from backend.services.uploads import StoredUpload
+
+USER = "user-1"
+
+
+class FakeRequest:
+    def __init__(self, *pieces):
+        self.pieces = pieces
+
+    async def stream(self):
+        for piece in self.pieces:
+            yield piece
+
+
+@pytest.fixture(autouse=True)
+def staging(tmp_path, monkeypatch):
+    monkeypatch.setattr(resumable_uploads, "STAGING_DIR", tmp_path)
+    monkeypatch.setattr(resumable_uploads, "RESUMABLE_DIR", tmp_path / "resumable")
+    return tmp_path
+
+
+def create(size=10, purpose="patient.document", filename="scan.pdf"):
+    return resumable_uploads.create_upload(USER, purpose, filename, size, "application/pdf")["id"]
+
+
+def append(upload_id, offset, *pieces):
+    return asyncio.run(resumable_uploads.append_chunk(FakeRequest(*pieces), upload_id, USER, offset))
+
+
+def test_chunks_append_at_the_current_offset():
+    upload_id = create()
+    assert append(upload_id, 0, b"abc", b"de")["offset"] == 5
+    assert append(upload_id, 5, b"fghij")["offset"] == 10
+    assert resumable_uploads.upload_status(upload_id, USER)["offset"] == 10
+
+
+def test_wrong_offset_is_a_conflict():
+    upload_id = create()
+    append(upload_id, 0, b"abc")
+    with pytest.raises(exceptions.ConflictException):
+        append(upload_id, 0, b"abc")
+    assert resumable_uploads.upload_status(upload_id, USER)["offset"] == 3
+
+
+def test_chunk_past_the_declared_size_is_rejected():
+    upload_id = create(size=4)
+    with pytest.raises(exceptions.BadRequestException):
+        append(upload_id, 0, b"abcde")
+
+
+def test_only_one_chunk_at_a_time():
+    upload_id = create()
+    _, _, lock_path = resumable_uploads._paths(upload_id)
+    resumable_uploads._acquire_lock(lock_path)
+    with pytest.raises(exceptions.ConflictException):
+        append(upload_id, 0, b"abc")
+    lock_path.unlink()
+    assert append(upload_id, 0, b"abc")["offset"] == 3
+    assert not lock_path.exists()
+
+
+def test_stale_lock_is_taken_over():
+    upload_id = create()
+    _, _, lock_path = resumable_uploads._paths(upload_id)
+    lock_path.touch()
+    stale = time.time() - resumable_uploads.LOCK_STALE_SECONDS - 1
+    os.utime(lock_path, (stale, stale))
+    assert append(upload_id, 0, b"abc")["offset"] == 3
+
+
+def test_uploads_belong_to_their_owner():
+    upload_id = create()
+    with pytest.raises(exceptions.EntityNotFoundException):
+        resumable_uploads.upload_status(upload_id, "someone-else")
+    with pytest.raises(exceptions.EntityNotFoundException):
+        resumable_uploads.upload_status("../../etc/passwd", USER)
+
+
+def test_images_keep_the_multipart_limit():
+    limit = resumable_uploads.size_limit("doctor.professional_photo", "photo.pdf")
+    with pytest.raises(exceptions.PayloadTooLargeException):
+        create(size=limit + 1, purpose="doctor.professional_photo", filename="photo.pdf")
+
+
+def test_incomplete_upload_cannot_be_finalized():
+    upload_id = create()
+    append(upload_id, 0, b"abc")
+    with pytest.raises(exceptions.ConflictException):
+        resumable_uploads.finalize_upload(None, upload_id, USER)
+
+
+def test_failed_store_leaves_the_upload_to_finalize_again(monkeypatch):
+    upload_id = create()
+    append(upload_id, 0, b"0123456789")
+    consumed = []
+
+    def failing_store(db, temp_path, *args):
+        temp_path.unlink()
+        raise RuntimeError("storage unavailable")
+
+    def store(db, temp_path, sha256, size, *args):
+        consumed.append(temp_path.read_bytes())
+        temp_path.unlink()
+        return StoredUpload(url="/uploads/x", sha256=sha256, size=size, content_type="application/pdf", deduplicated=False)
+
+    monkeypatch.setattr(resumable_uploads, "store_staged", failing_store)
+    with pytest.raises(RuntimeError):
+        resumable_uploads.finalize_upload(None, upload_id, USER)
+    assert resumable_uploads.upload_status(upload_id, USER)["offset"] == 10
+
+    monkeypatch.setattr(resumable_uploads, "store_staged", store)
+    meta, stored = resumable_uploads.finalize_upload(None, upload_id, USER)
+    assert consumed == [b"0123456789"]
+    assert stored.size == 10
+    assert not any(path.exists() for path in resumable_uploads._paths(upload_id))
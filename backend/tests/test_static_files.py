@@ -0,0 +1,128 @@
+import gzip
+import os
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from backend.core import static_files
+from backend.core.static_files import CachedStaticFiles, _BLOB_PATH, _accepted_encodings, precompress
+
+SHA = "ab" + "0" * 62
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", {"gzip", "br"}),
+    ("GZIP;q=0.5, br;q=0", {"gzip"}),
+    ("br;q=0.000, gzip ; q=1", {"gzip"}),
+    ("deflate, gzip;q=0.0", {"deflate"}),
+])
+def test_accepted_encodings(header, expected):
+    assert _accepted_encodings(header) == expected
+
+
+@pytest.mark.parametrize("path, sha256, derivative", [
+    (f"blobs/ab/{SHA}.pdf", SHA, None),
+    (f"/srv/static/uploads/blobs/ab/{SHA}", SHA, None),
+    (f"blobs/ab/{SHA}.thumb.jpg", SHA, ".thumb"),
+    (f"blobs/ab/{SHA}.preview.jpg", SHA, ".preview"),
+])
+def test_blob_path_matches_blobs_and_derivatives(path, sha256, derivative):
+    match = _BLOB_PATH.search(path)
+    assert match and match["sha256"] == sha256 and match["derivative"] == derivative
+
+
+@pytest.mark.parametrize("path", [
+    "doctor_photo.jpg",
+    f"blobs/ab/{SHA[:-1]}.pdf",
+    f"blobs/AB/{SHA.upper()}.pdf",
+    f"blobs/ab/{SHA}.pdf/extra",
+    f"notblobs/ab/{SHA}.pdf",
+])
+def test_blob_path_rejects_other_files(path):
+    assert _BLOB_PATH.search(path) is None
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "blobs" / "ab").mkdir(parents=True)
+    (tmp_path / "blobs" / "ab" / f"{SHA}.pdf").write_bytes(b"%PDF-" + bytes(range(256)) * 8)
+    (tmp_path / "app.js").write_text("console.log('hello');\n" * 200)
+    (tmp_path / ".staging").mkdir()
+    (tmp_path / ".staging" / "upload.part").write_bytes(b"partial")
+    app = Starlette(routes=[Mount("/uploads", CachedStaticFiles(directory=tmp_path))])
+    return tmp_path, TestClient(app)
+
+
+def test_blobs_are_immutable_with_a_content_etag(site):
+    _, client = site
+    response = client.get(f"/uploads/blobs/ab/{SHA}.pdf")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == static_files.IMMUTABLE_CACHE_CONTROL
+    assert response.headers["etag"] == f'"{SHA}"'
+    revalidated = client.get(f"/uploads/blobs/ab/{SHA}.pdf", headers={"if-none-match": f'"{SHA}"'})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+
+
+def test_other_files_are_revalidated(site):
+    _, client = site
+    response = client.get("/uploads/app.js")
+    assert response.headers["cache-control"] == static_files.REVALIDATE_CACHE_CONTROL
+    assert client.get("/uploads/app.js", headers={"if-none-match": response.headers["etag"]}).status_code == 304
+
+
+def test_range_request_gets_partial_content(site):
+    _, client = site
+    response = client.get(f"/uploads/blobs/ab/{SHA}.pdf", headers={"range": "bytes=0-4"})
+    assert response.status_code == 206 and response.content == b"%PDF-"
+
+
+def test_precompressed_variant_is_served_to_clients_that_accept_it(site):
+    root, client = site
+    assert precompress(root) >= 1
+    original = (root / "app.js").read_bytes()
+
+    response = client.get("/uploads/app.js", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert response.content == original  # decoded by the client
+
+    plain = client.get("/uploads/app.js", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.content == original
+
+
+def test_stale_variant_is_ignored(site):
+    root, client = site
+    precompress(root)
+    stat = (root / "app.js.gz").stat()
+    os.utime(root / "app.js", (stat.st_atime, stat.st_mtime + 10))
+    assert "content-encoding" not in client.get("/uploads/app.js", headers={"accept-encoding": "gzip"}).headers
+
+
+def test_range_request_never_gets_a_compressed_variant(site):
+    root, client = site
+    precompress(root)
+    response = client.get("/uploads/app.js", headers={"accept-encoding": "gzip", "range": "bytes=0-6"})
+    assert response.status_code == 206 and "content-encoding" not in response.headers
+    assert response.content == b"console"
+
+
+def test_precompress_skips_small_and_hidden_files(site):
+    root, _ = site
+    (root / "small.css").write_text("a{}")
+    (root / ".staging" / "big.js").write_text("x" * 5000)
+    precompress(root)
+    assert not (root / "small.css.gz").exists()
+    assert not (root / ".staging" / "big.js.gz").exists()
+    assert gzip.decompress((root / "app.js.gz").read_bytes()) == (root / "app.js").read_bytes()
+
+
+def test_dot_directories_are_not_served(site):
+    _, client = site
+    assert client.get("/uploads/.staging/upload.part").status_code == 404
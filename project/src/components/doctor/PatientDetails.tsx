@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { getUser, getPatientLabResults, getPatientPrescriptions, createLabResult, createPrescription, uploadFile } from '../../services/api'
+import { getPatientChart, createLabResult, createPrescription, uploadFile } from '../../services/api'
 import { HealthVisualization } from '../visualization/HealthVisualization'
 import { useAuth } from '../../contexts/AuthContext'
 import { Plus, ArrowLeft, FileText, Download } from 'lucide-react'
@@ -70,14 +70,10 @@ export function PatientDetails() {
         const fetchData = async () => {
             if (!id) return
             try {
-                const [userRes, labRes, presRes] = await Promise.all([
-                    getUser(id),
-                    getPatientLabResults(id),
-                    getPatientPrescriptions(id)
-                ])
-                setPatient(userRes)
-                setLabResults(labRes)
-                setPrescriptions(presRes)
+                const chart = await getPatientChart(id)
+                setPatient(chart.patient)
+                setLabResults(chart.lab_results)
+                setPrescriptions(chart.prescriptions)
             } catch (error) {
                 console.error('Error fetching patient details:', error)
             } finally {
@@ -105,8 +101,8 @@ export function PatientDetails() {
             setNewLabResult(prev => ({ ...prev, document_url: '' }))
 
             // Refresh data
-            const res = await getPatientLabResults(id)
-            setLabResults(res)
+            const chart = await getPatientChart(id)
+            setLabResults(chart.lab_results)
         } catch (error) {
             console.error('Error creating lab result:', error)
         } finally {
@@ -143,8 +139,8 @@ export function PatientDetails() {
             setNewPrescription(prev => ({ ...prev, document_url: '' }))
 
             // Refresh data
-            const res = await getPatientPrescriptions(id)
-            setPrescriptions(res)
+            const chart = await getPatientChart(id)
+            setPrescriptions(chart.prescriptions)
         } catch (error) {
             console.error('Error creating prescription:', error)
         } finally {
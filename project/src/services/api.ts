@@ -353,6 +353,17 @@ export const uploadDoctorDocuments = async (formData: FormData) => {
     }
 };
 
+/** Doctors: patient, profile and latest lab results, prescriptions, visits and allergies in one call */
+export const getPatientChart = async (patientId: string) => {
+    try {
+        const response = await api.get(`/patients/${patientId}/chart`);
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching patient chart:', error);
+        throw error;
+    }
+};
+
 export const getPatientLabResults = async (patientId: string) => {
     try {
         const response = await api.get(`/patient-data/${patientId}/lab-results`);
@@ -14,6 +14,8 @@ export interface DoctorProfile {
   hospital_name?: string
   hospital_state?: string
   hospital_city?: string
+  professional_photo_thumbnail?: string | null
+  document_previews?: Record<string, string>
 }
 
 export interface Profile {